@@ -0,0 +1,136 @@
+"""Synthetic Emedgene-style clinical workbooks for benchmarks.
+
+    python -m benchmarks.generate_workbook 10000 out.xlsx
+"""
+import argparse
+import random
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+
+SEXES = ["M", "F", "U"]
+PANELS = ["Exome", "Genome", "Epilepsy panel", "Cardio panel", "Trio exome"]
+DEPARTMENTS = ["Genetica Medica", "Neurologia Pediatrica", "Cardiologia",
+               "Neonatologia", "Oculistica"]
+STATUSES = ["Received", "In analysis", "Reported"]
+
+
+def synthetic_obo(n_terms=18000, seed=0):
+    """hp.obo-like text with is_a links, alt_ids and obsolete terms."""
+    rng = random.Random(seed)
+    lines = ["format-version: 1.2", "ontology: hp", ""]
+    for i in range(1, n_terms + 1):
+        lines += ["[Term]", f"id: HP:{i:07d}", f"name: Synthetic term {i}"]
+        if i % 9 == 0:
+            lines.append(f"alt_id: HP:{n_terms + i:07d}")
+        if i % 97 == 0:
+            lines += ["is_obsolete: true", f"replaced_by: HP:{i - 1:07d}"]
+        elif i > 1:
+            # heap-shaped DAG: ~log2(n) ancestors per term, like the real HPO depth
+            parents = {i // 2} | ({max(1, i // 3)} if rng.random() < 0.2 else set())
+            for parent in sorted(parents):
+                lines.append(f"is_a: HP:{parent:07d} ! Synthetic term {parent}")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def _phenotypes(rng, valid, alt, bogus_rate):
+    codes = []
+    for _ in range(rng.randint(0, 6)):
+        r = rng.random()
+        if r < bogus_rate:
+            codes.append(f"HP:{rng.randint(9000000, 9999999):07d}")
+        elif r < bogus_rate + 0.05 and alt:
+            codes.append(rng.choice(alt))
+        else:
+            codes.append(rng.choice(valid))
+    sep = rng.choice(["; ", ", ", " ", ";"])
+    return sep.join(codes)
+
+
+def _date(rng, start_year, end_year):
+    day = datetime(start_year, 1, 1) + timedelta(
+        days=rng.randint(0, (end_year - start_year) * 365))
+    style = rng.random()
+    if style < 0.35:
+        return day  # real Excel date cell
+    if style < 0.55:
+        return day.strftime("%Y-%m-%d")
+    if style < 0.70:
+        return f"{day.month}/{day.day}/{day.year}"
+    if style < 0.85:
+        return day.strftime("%d/%m/%Y")
+    if style < 0.92:
+        return day.strftime("%d-%m-%Y")
+    if style < 0.97:
+        return ""
+    return rng.choice(["n.d.", "??", "31/02/2020"])
+
+
+def generate_frame(n_rows, valid_codes, alt_codes=(), seed=0, bogus_rate=0.03):
+    """DataFrame shaped like an Emedgene export (header on the workbook's row 2)."""
+    rng = random.Random(seed)
+    valid = sorted(valid_codes)
+    alt = sorted(alt_codes)
+    return pd.DataFrame({
+        "BioSample Name": [f"GEM{seed:02d}-{i:07d}" for i in range(n_rows)],
+        "Sex": [rng.choice(SEXES) for _ in range(n_rows)],
+        "Phenotypes Id": [_phenotypes(rng, valid, alt, bogus_rate) for _ in range(n_rows)],
+        "Date Of Birth": [_date(rng, 1940, 2023) for _ in range(n_rows)],
+        "Due Date": [_date(rng, 2024, 2026) for _ in range(n_rows)],
+        "DataRichiesta": [_date(rng, 2022, 2025) for _ in range(n_rows)],
+        "DataRicezioneCampione": [_date(rng, 2022, 2025) for _ in range(n_rows)],
+        "Test Panel": [rng.choice(PANELS) for _ in range(n_rows)],
+        "Referring Department": [rng.choice(DEPARTMENTS) for _ in range(n_rows)],
+        "Status": [rng.choice(STATUSES) for _ in range(n_rows)],
+        "Notes": [f"Family history reviewed, visit {rng.randint(1, 9)}"
+                  if rng.random() < 0.3 else "" for _ in range(n_rows)],
+    })
+
+
+def write_workbook(df, path):
+    # title row first, so the column names sit on row 2 like the lab exports
+    with pd.ExcelWriter(path, engine="openpyxl") as writer:
+        df.to_excel(writer, startrow=1, index=False)
+        writer.sheets["Sheet1"].cell(row=1, column=1, value="Emedgene export (synthetic)")
+
+
+def write_export(df, path):
+    """Write df as .xlsx, .csv/.tsv (same title row) or .parquet by extension."""
+    lower = path.lower()
+    if lower.endswith((".csv", ".tsv")):
+        sep = "\t" if lower.endswith(".tsv") else ","
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            f.write("Emedgene export (synthetic)\n")
+            df.to_csv(f, sep=sep, index=False, lineterminator="\n")
+    elif lower.endswith(".parquet"):
+        # Parquet needs one type per column; the mixed date cells become text
+        df.astype(str).where(df.notna()).to_parquet(path, index=False)
+    else:
+        write_workbook(df, path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("rows", type=int)
+    parser.add_argument("output", help=".xlsx, .csv, .tsv or .parquet path")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--hpo-file", default=None,
+                        help="draw codes from this hp.obo (default: synthetic ontology)")
+    args = parser.parse_args(argv)
+
+    if args.hpo_file:
+        from tools.hpo_index import load_hpo_ontology
+        ontology = load_hpo_ontology(args.hpo_file)
+        valid, alt = ontology.codes, list(ontology.alt_ids)
+    else:
+        valid = [f"HP:{i:07d}" for i in range(1, 18001)]
+        alt = [f"HP:{18000 + i:07d}" for i in range(9, 18001, 9)]
+
+    df = generate_frame(args.rows, valid, alt, seed=args.seed)
+    write_export(df, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""Time the conversion stages on synthetic workbooks and record a JSON baseline.
+
+    python -m benchmarks.run_benchmarks --sizes 1000 10000 100000
+    python -m benchmarks.run_benchmarks --output benchmarks/baseline.json
+    python -m benchmarks.run_benchmarks --compare benchmarks/baseline.json
+
+Each stage is timed on its own (best of --repeat runs) and, unless --no-memory
+is given, run once more under tracemalloc to record its peak allocation.
+With --compare the run fails (exit code 1) when a stage is slower than the
+baseline by more than --tolerance.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from benchmarks.generate_workbook import generate_frame, synthetic_obo, write_export
+from tools import hpo_index
+from tools.emedgene_csv_converter_core import (DEFAULT_HPO_PATH, _init_worker, force_dates_iso,
+                                               load_hpo_list, load_hpo_ontology,
+                                               normalize_hpo_column, preselected_date_columns,
+                                               read_excel_table, resource_path, run_conversion,
+                                               run_conversion_parallel, sample_id_column_default,
+                                               write_clean_csv)
+from tools.table_readers import available_backends
+
+
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+READER_FORMATS = [".xlsx", ".csv", ".tsv", ".parquet"]
+HPO_COLUMN = "Phenotypes Id"
+
+
+def _measure(func, repeat, memory):
+    """Best wall time of `repeat` runs, plus the tracemalloc peak of one run."""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - t0)
+
+    peak_mb = None
+    if memory:
+        tracemalloc.start()
+        try:
+            func()
+            peak_mb = tracemalloc.get_traced_memory()[1] / 1e6
+        finally:
+            tracemalloc.stop()
+    return best, peak_mb
+
+
+def _record(results, stage, rows, seconds, peak_mb):
+    results[stage] = {
+        "seconds": round(seconds, 5),
+        "rows_per_second": round(rows / seconds, 1) if rows and seconds > 0 else None,
+        "peak_mb": round(peak_mb, 2) if peak_mb is not None else None,
+    }
+    print(f"  {stage:<28} {seconds:9.4f}s"
+          + (f" {results[stage]['rows_per_second']:>14,.0f} rows/s" if rows else " " * 22)
+          + (f" {peak_mb:9.1f} MB" if peak_mb is not None else ""))
+
+
+def bench_ontology(obo_path, repeat, memory):
+    results = {}
+
+    def parse():
+        hpo_index.invalidate_hpo_cache()
+        for path in hpo_index.index_paths(obo_path):
+            if os.path.exists(path):
+                os.remove(path)
+        load_hpo_list(obo_path)
+
+    def cached_index():
+        hpo_index.invalidate_hpo_cache()
+        load_hpo_list(obo_path)
+
+    print("ontology")
+    _record(results, "load_hpo_list (parse)", 0, *_measure(parse, repeat, memory))
+    _record(results, "load_hpo_list (index)", 0, *_measure(cached_index, repeat, memory))
+    _record(results, "load_hpo_list (memory)", 0,
+            *_measure(lambda: load_hpo_list(obo_path), repeat, memory))
+    return results
+
+
+def bench_readers(results, df, n_rows, repeat, memory, workdir):
+    """Time every installed backend on the same data in each input format."""
+    for ext in READER_FORMATS:
+        path = os.path.join(workdir, f"bench_{n_rows}{ext}")
+        try:
+            write_export(df, path)
+        except ImportError:
+            continue  # e.g. no Parquet engine installed
+        for backend in available_backends(path):
+            _record(results, f"read {ext} ({backend})", n_rows,
+                    *_measure(lambda: read_excel_table(path, 2, reader=backend),
+                              repeat, memory))
+
+
+def bench_size(n_rows, ontology, repeat, memory, workdir, with_read, row_pool=None):
+    results = {}
+    df = generate_frame(n_rows, ontology.codes, list(ontology.alt_ids), seed=1)
+    date_cols = [c for c in df.columns if c in preselected_date_columns]
+    sample_ids = df[sample_id_column_default]
+    print(f"{n_rows:,} rows")
+
+    if with_read:
+        bench_readers(results, df, n_rows, repeat, memory, workdir)
+
+    _record(results, "force_dates_iso", n_rows,
+            *_measure(lambda: force_dates_iso(df.copy(), date_cols), repeat, memory))
+    _record(results, "normalize_hpo_column", n_rows,
+            *_measure(lambda: normalize_hpo_column(df[HPO_COLUMN], ontology, sample_ids),
+                      repeat, memory))
+
+    def convert():
+        return run_conversion(df, HPO_COLUMN, date_cols, ontology, sample_id_column_default)
+
+    _record(results, "run_conversion", n_rows, *_measure(convert, repeat, memory))
+
+    if row_pool is not None:
+        def convert_parallel():
+            return run_conversion_parallel(df, HPO_COLUMN, date_cols, ontology,
+                                           sample_id_column_default, executor=row_pool,
+                                           min_rows=0)
+
+        # tracemalloc only sees this process, so no memory figure here
+        _record(results, f"run_conversion_parallel ({row_pool._max_workers})", n_rows,
+                *_measure(convert_parallel, repeat, False))
+
+    processed, _ = convert()
+    out_csv = os.path.join(workdir, f"bench_{n_rows}_CLEAN.csv")
+    _record(results, "write_clean_csv", n_rows,
+            *_measure(lambda: write_clean_csv(processed, out_csv), repeat, memory))
+    return results
+
+
+def compare(current, baseline, tolerance):
+    """Stages slower than baseline * (1 + tolerance)."""
+    regressions = []
+    for group, stages in current["results"].items():
+        for stage, values in stages.items():
+            old = baseline.get("results", {}).get(group, {}).get(stage)
+            if old and old["seconds"] and values["seconds"] > old["seconds"] * (1 + tolerance):
+                regressions.append((group, stage, old["seconds"], values["seconds"]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="G-CLIP conversion benchmarks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-memory", action="store_true",
+                        help="skip the tracemalloc pass (faster)")
+    parser.add_argument("--with-read", action="store_true",
+                        help="also write each size as .xlsx/.csv/.tsv/.parquet and time "
+                             "every installed reader backend on it")
+    parser.add_argument("--row-workers", type=int, default=None,
+                        help="also time run_conversion_parallel on this many processes")
+    parser.add_argument("--hpo-file", default=None,
+                        help="hp.obo to use (default: assets/hp.obo, else a synthetic one)")
+    parser.add_argument("--output", default=os.path.join("benchmarks", "latest.json"))
+    parser.add_argument("--compare", default=None, help="baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed slowdown vs. baseline (default: %(default)s)")
+    args = parser.parse_args(argv)
+    memory = not args.no_memory
+
+    with tempfile.TemporaryDirectory() as workdir:
+        obo_path = args.hpo_file or resource_path(DEFAULT_HPO_PATH)
+        if not os.path.exists(obo_path):
+            obo_path = os.path.join(workdir, "hp.obo")
+            with open(obo_path, "w", encoding="utf-8") as f:
+                f.write(synthetic_obo())
+
+        results = {"ontology": bench_ontology(obo_path, args.repeat, memory)}
+        ontology = load_hpo_ontology(obo_path)
+        row_pool = None
+        if args.row_workers:
+            row_pool = ProcessPoolExecutor(max_workers=args.row_workers,
+                                           initializer=_init_worker, initargs=(ontology,))
+        try:
+            for n_rows in args.sizes:
+                results[str(n_rows)] = bench_size(n_rows, ontology, args.repeat, memory,
+                                                  workdir, args.with_read, row_pool)
+        finally:
+            if row_pool is not None:
+                row_pool.shutdown()
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": sys.version.split()[0],
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "ontology_terms": len(ontology),
+        },
+        "results": results,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        for group, stage, old, new in regressions:
+            print(f"REGRESSION {group} / {stage}: {old:.4f}s -> {new:.4f}s")
+        if regressions:
+            return 1
+        print(f"No regressions against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
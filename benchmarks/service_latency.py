@@ -0,0 +1,128 @@
+"""Latency of the local conversion service under concurrent load.
+
+    python -m benchmarks.service_latency --clients 8 --requests 200 --batch 50
+
+Starts tools.conversion_service on a free port, then every client thread
+posts --requests batches of --batch phenotype strings (or rows with
+--endpoint normalize) over a keep-alive connection. Prints throughput and
+p50/p95/p99 latency, and writes them to --output as JSON.
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from benchmarks.generate_workbook import generate_frame, synthetic_obo
+from tools.conversion_service import start_server
+from tools.emedgene_csv_converter_core import DEFAULT_HPO_PATH, resource_path
+from tools.hpo_index import load_hpo_ontology
+
+
+def _payloads(ontology, endpoint, batch, count, seed=0):
+    df = generate_frame(batch * min(count, 20), ontology.codes, list(ontology.alt_ids), seed=seed)
+    df = df.astype(object).where(df.notna(), None)
+    bodies = []
+    for i in range(min(count, 20)):
+        part = df.iloc[i * batch:(i + 1) * batch]
+        if endpoint == "validate-hpo":
+            body = {"values": ["" if v is None else v for v in part["Phenotypes Id"]]}
+        else:
+            body = {"rows": [{k: (v.isoformat() if hasattr(v, "isoformat") else v)
+                              for k, v in row.items()} for row in part.to_dict("records")]}
+        bodies.append(json.dumps(body).encode("utf-8"))
+    return bodies
+
+
+def _client(port, endpoint, bodies, n_requests, latencies, errors):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    rng = random.Random()
+    try:
+        for _ in range(n_requests):
+            body = rng.choice(bodies)
+            t0 = time.perf_counter()
+            conn.request("POST", f"/{endpoint}", body, {"Content-Type": "application/json"})
+            response = conn.getresponse()
+            response.read()
+            latencies.append(time.perf_counter() - t0)
+            if response.status != 200:
+                errors.append(response.status)
+    finally:
+        conn.close()
+
+
+def run(hpo_path, clients, n_requests, batch, endpoint):
+    ontology = load_hpo_ontology(hpo_path)
+    bodies = _payloads(ontology, endpoint, batch, n_requests)
+    server = start_server(hpo_path, port=0)
+    port = server.server_address[1]
+
+    latencies, errors = [], []
+    threads = [threading.Thread(target=_client,
+                                args=(port, endpoint, bodies, n_requests, latencies, errors))
+               for _ in range(clients)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - t0
+    server.shutdown()
+    server.server_close()
+
+    ms = np.array(latencies) * 1000
+    return {
+        "endpoint": endpoint,
+        "clients": clients,
+        "requests": len(latencies),
+        "batch": batch,
+        "errors": len(errors),
+        "seconds": round(wall, 3),
+        "requests_per_second": round(len(latencies) / wall, 1),
+        "rows_per_second": round(len(latencies) * batch / wall, 1),
+        "p50_ms": round(float(np.percentile(ms, 50)), 2),
+        "p95_ms": round(float(np.percentile(ms, 95)), 2),
+        "p99_ms": round(float(np.percentile(ms, 99)), 2),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="G-CLIP conversion service latency")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200, help="requests per client")
+    parser.add_argument("--batch", type=int, default=50, help="values/rows per request")
+    parser.add_argument("--endpoint", choices=["validate-hpo", "normalize"],
+                        default="validate-hpo")
+    parser.add_argument("--hpo-file", default=None,
+                        help="hp.obo to use (default: assets/hp.obo, else a synthetic one)")
+    parser.add_argument("--output", default=os.path.join("benchmarks", "service_latest.json"))
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        hpo_path = args.hpo_file or resource_path(DEFAULT_HPO_PATH)
+        if not os.path.exists(hpo_path):
+            hpo_path = os.path.join(workdir, "hp.obo")
+            with open(hpo_path, "w", encoding="utf-8") as f:
+                f.write(synthetic_obo())
+        result = run(hpo_path, args.clients, args.requests, args.batch, args.endpoint)
+
+    print(f"{result['endpoint']}: {result['requests']} requests x {result['batch']} from "
+          f"{result['clients']} clients in {result['seconds']}s "
+          f"({result['requests_per_second']:,.0f} req/s, {result['rows_per_second']:,.0f} rows/s)")
+    print(f"latency p50 {result['p50_ms']} ms, p95 {result['p95_ms']} ms, "
+          f"p99 {result['p99_ms']} ms, errors {result['errors']}")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    return 1 if result["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,16 +1,21 @@
+import time
+
+# Startup clock, taken before anything else is imported
+STARTUP_T0 = time.perf_counter()
+
 import tkinter as tk
 from tkinter import Menu, Toplevel, messagebox
 from PIL import Image, ImageTk
 import os
 import sys
-import time
 import json
+import queue
 import threading
 import urllib.request
 import webbrowser
 
-# import tools and components
-from tools.emedgene_csv_converter import CSVConverterPage
+# Tools (and pandas behind them) are imported on first use, see show_tool
+from tools.tool_registry import discover_tools, load_tool, warm_up_tools
 from welcome_page import WelcomePage
 
 
@@ -33,52 +38,142 @@ def resource_path(relative_path):
 
 
 logo_path = resource_path(os.path.join("assets", "bfx_logo.png"))
+hpo_path = resource_path(os.path.join("assets", "hp.obo"))
+
+# Startup measurement: set GCLIP_STARTUP_LOG to a file to append one JSON line
+# per launch; GCLIP_EXIT_AFTER_STARTUP=1 closes the app once it is ready
+# (used to time release builds, e.g. the PyInstaller --onefile exe).
+STARTUP_LOG_ENV = "GCLIP_STARTUP_LOG"
+EXIT_AFTER_STARTUP_ENV = "GCLIP_EXIT_AFTER_STARTUP"
+# GCLIP_WARM_UP=0 skips importing the heavy tools in the background
+WARM_UP_ENV = "GCLIP_WARM_UP"
+
+
+# ---------------- BACKGROUND TASKS ----------------
+# Worker threads never touch Tk: callbacks are queued and run on the UI thread
+# by poll_ui_queue.
+ui_queue = queue.Queue()
+UI_POLL_MS = 100
+
+
+def run_in_background(work, on_done=None):
+    """Run work() on a daemon thread, then on_done(result, error) on the UI thread."""
+    def runner():
+        result, error = None, None
+        try:
+            result = work()
+        except Exception as e:
+            error = e
+        if on_done is not None:
+            ui_queue.put(lambda: on_done(result, error))
+
+    threading.Thread(target=runner, daemon=True).start()
+
+
+def poll_ui_queue():
+    try:
+        while True:
+            ui_queue.get_nowait()()
+    except queue.Empty:
+        pass
+    root.after(UI_POLL_MS, poll_ui_queue)
+
+
+def warm_up():
+    """Import the warm_up tools (and their data, e.g. the HPO index) ahead of first use."""
+    t0 = time.perf_counter()
+    warm_up_tools(tool_specs.values())
+    print(f"Warm-up done in {time.perf_counter() - t0:.2f}s")
+
+
+def record_startup_time():
+    elapsed = time.perf_counter() - STARTUP_T0
+    print(f"Startup time: {elapsed:.3f}s")
+
+    log_path = os.environ.get(STARTUP_LOG_ENV)
+    if log_path:
+        entry = {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "version": APP_VERSION,
+            "frozen": bool(getattr(sys, "frozen", False)),
+            "startup_seconds": round(elapsed, 4),
+        }
+        try:
+            with open(log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+        except OSError as e:
+            print("Startup log error:", e)
+
+    if os.environ.get(EXIT_AFTER_STARTUP_ENV) == "1":
+        root.after(0, root.destroy)
 
 
 # ---------------- MANUAL UPDATE OF HPO (HELP MENU) ----------------
+hpo_update_running = False
+
+
 def update_hpo():
-    try:
-        url = "https://raw.githubusercontent.com/obophenotype/human-phenotype-ontology/master/hp.obo"
-        save_path = resource_path(os.path.join("assets", "hp.obo"))
+    """Conditional, atomic download of hp.obo on a worker thread."""
+    global hpo_update_running
+    if hpo_update_running:
+        messagebox.showinfo("HPO Update", "An HPO update is already running.")
+        return
+    hpo_update_running = True
 
-        messagebox.showinfo(
-            "HPO Update", "Downloading the latest HPO ontology...")
+    def work():
+        from tools.hpo_updater import update_hpo_file
+        return update_hpo_file(hpo_path)
 
-        urllib.request.urlretrieve(url, save_path)
+    def on_done(result, error):
+        global hpo_update_running
+        hpo_update_running = False
 
-        messagebox.showinfo(
-            "HPO Update", "✅ HPO ontology updated successfully!")
+        if error is not None:
+            messagebox.showerror("Error", f"Failed to update HPO ontology:\n{error}")
+        elif result["status"] == "not-modified":
+            messagebox.showinfo(
+                "HPO Update", "The local HPO ontology is already up to date.")
+        else:
+            messagebox.showinfo(
+                "HPO Update",
+                f"✅ HPO ontology updated successfully! ({result['terms']} terms)")
 
-    except Exception as e:
-        messagebox.showerror("Error", f"Failed to update HPO ontology:\n{e}")
+    messagebox.showinfo(
+        "HPO Update", "Downloading the latest HPO ontology in the background...")
+    run_in_background(work, on_done)
 
 
 # ---------------- CHECK FOR NEW VERSION ----------------
-def check_for_updates():
-    try:
-        response = urllib.request.urlopen(GITHUB_REPO, timeout=3)
-        data = json.load(response)
-        latest = data.get("tag_name", "").replace("v", "")
+def fetch_latest_version():
+    response = urllib.request.urlopen(GITHUB_REPO, timeout=3)
+    data = json.load(response)
+    return data.get("tag_name", "").replace("v", "")
+
 
-        if latest and latest != APP_VERSION:
+def check_for_updates():
+    """Startup check: runs off the UI thread and never blocks interaction."""
+    def on_done(latest, error):
+        # Silent fail — no internet or GitHub unavailable
+        if error is None and latest and latest != APP_VERSION:
             messagebox.showinfo(
                 "Update Available",
                 f"A newer version ({latest}) of G-CLIP is available.\n"
                 f"Current version: {APP_VERSION}\n\n"
                 "Visit GitHub Releases page to download the update."
             )
-    except Exception:
-        # Silent fail — no internet or GitHub unavailable
-        pass
 
+    run_in_background(fetch_latest_version, on_done)
 
-def manual_check_updates():
-    try:
-        response = urllib.request.urlopen(GITHUB_REPO, timeout=3)
-        data = json.load(response)
-        latest = data.get("tag_name", "").replace("v", "")
 
-        if latest and latest != APP_VERSION:
+def manual_check_updates():
+    def on_done(latest, error):
+        if error is not None:
+            messagebox.showerror(
+                "Update Check Failed",
+                "Unable to check for updates.\n"
+                "You might be offline or GitHub is unavailable."
+            )
+        elif latest and latest != APP_VERSION:
             answer = messagebox.askyesno(
                 "Update Available",
                 f"A newer version ({latest}) of G-CLIP is available.\n"
@@ -93,12 +188,7 @@ def manual_check_updates():
                 f"You already have the latest version ({APP_VERSION})."
             )
 
-    except Exception:
-        messagebox.showerror(
-            "Update Check Failed",
-            "Unable to check for updates.\n"
-            "You might be offline or GitHub is unavailable."
-        )
+    run_in_background(fetch_latest_version, on_done)
 
 
 # ---------------- ABOUT WINDOW ----------------
@@ -123,7 +213,7 @@ def show_about():
         print("Logo error in About:", e)
 
     # Show date of local HPO file if available
-    hpo_file = resource_path(os.path.join("assets", "hp.obo"))
+    hpo_file = hpo_path
     hpo_status = ""
     try:
         if os.path.exists(hpo_file):
@@ -184,17 +274,25 @@ def show_splash(root):
             pady=15
         ).pack()
 
-        def close_splash():
-            time.sleep(2.5)
-            splash.destroy()
-            root.deiconify()
-            check_for_updates()
-
-        threading.Thread(target=close_splash).start()
+        splash.update()  # paint it now; the main window is built meanwhile
+        return splash
 
     except Exception as e:
         print("Splash error:", e)
-        root.deiconify()
+        return None
+
+
+def finish_startup(splash):
+    """Swap the splash for the main window once it is built."""
+    if splash is not None:
+        splash.destroy()
+    root.deiconify()
+    root.after_idle(record_startup_time)
+
+    # nothing below may delay interactivity
+    check_for_updates()
+    if os.environ.get(WARM_UP_ENV) != "0":
+        run_in_background(warm_up)
 
 
 # ---------------- CENTER WINDOW UTILITY ----------------
@@ -216,12 +314,13 @@ center_window(root, W_WIDTH, W_HEIGHT)
 
 # Show splash
 root.withdraw()
-show_splash(root)
+splash = show_splash(root)
 
 # Workspace
 container = tk.Frame(root)
 container.pack(fill="both", expand=True)
 
+tool_specs = {spec.name: spec for spec in discover_tools()}
 tool_pages = {}
 
 # Default page: welcome screen
@@ -235,15 +334,9 @@ def show_tool(name):
         # hide welcome page
         welcome_page.pack_forget()
 
-        # create tool page if not created yet
+        # create tool page if not created yet (imports its module on first use)
         if name not in tool_pages:
-            if name == "csv":
-                tool_pages[name] = CSVConverterPage(container)
-            # Future tools:
-            # elif name == "qc":
-            #     tool_pages[name] = QCToolPage(container)
-
-            tool_pages[name].pack(fill="both", expand=True)
+            tool_pages[name] = load_tool(tool_specs[name])(container)
 
         # hide others
         for t, page in tool_pages.items():
@@ -262,8 +355,8 @@ menu_bar = Menu(root)
 
 # Tools menu
 tools_menu = Menu(menu_bar, tearoff=0)
-tools_menu.add_command(
-    label="Excel to Emedgene CSV Converter", command=lambda: show_tool("csv"))
+for spec in tool_specs.values():
+    tools_menu.add_command(label=spec.label, command=lambda name=spec.name: show_tool(name))
 menu_bar.add_cascade(label="Tools", menu=tools_menu)
 
 # Help menu
@@ -275,6 +368,10 @@ menu_bar.add_cascade(label="Help", menu=help_menu)
 
 root.config(menu=menu_bar)
 
+# Main window is ready: close the splash and start background work
+root.after(0, finish_startup, splash)
+root.after(UI_POLL_MS, poll_ui_queue)
+
 # ---------------- RUN APP ----------------
 try:
     root.mainloop()
@@ -0,0 +1,59 @@
+import pytest
+
+
+MINI_OBO = """format-version: 1.2
+ontology: hp
+
+[Term]
+id: HP:0000001
+name: All
+
+[Term]
+id: HP:0000118
+name: Phenotypic abnormality
+is_a: HP:0000001 ! All
+
+[Term]
+id: HP:0000707
+name: Abnormality of the nervous system
+is_a: HP:0000118 ! Phenotypic abnormality
+
+[Term]
+id: HP:0001250
+name: Seizure
+alt_id: HP:0002279
+is_a: HP:0000707 ! Abnormality of the nervous system
+
+[Term]
+id: HP:0012345
+name: Old seizure term
+is_obsolete: true
+replaced_by: HP:0001250
+
+[Term]
+id: HP:0000478
+name: Abnormality of the eye
+is_a: HP:0000118 ! Phenotypic abnormality
+
+[Typedef]
+id: part_of
+name: part of
+"""
+
+
+@pytest.fixture
+def mini_obo(tmp_path):
+    path = tmp_path / "hp.obo"
+    path.write_text(MINI_OBO, encoding="utf-8")
+    return str(path)
+
+
+@pytest.fixture(scope="session")
+def _cache_dir(tmp_path_factory):
+    return str(tmp_path_factory.mktemp("cache"))
+
+
+@pytest.fixture(autouse=True)
+def _isolated_cache(_cache_dir, monkeypatch):
+    # compiled HPO indexes go to a temp folder, not the user's ~/.g-clip
+    monkeypatch.setenv("GCLIP_CACHE_DIR", _cache_dir)
@@ -0,0 +1,31 @@
+import json
+
+from benchmarks.generate_workbook import generate_frame
+from benchmarks.run_benchmarks import main
+
+
+def test_generated_frame_has_emedgene_columns():
+    df = generate_frame(50, ["HP:0000001", "HP:0001250"], ["HP:0002279"], seed=3)
+
+    assert len(df) == 50
+    assert {"BioSample Name", "Phenotypes Id", "Date Of Birth", "DataRichiesta"} <= set(df.columns)
+    assert df["BioSample Name"].is_unique
+
+
+def test_benchmark_smoke_run_and_compare(tmp_path, mini_obo):
+    out = tmp_path / "bench.json"
+    args = ["--sizes", "200", "--repeat", "1", "--no-memory",
+            "--hpo-file", mini_obo, "--output", str(out)]
+
+    assert main(args) == 0
+    report = json.loads(out.read_text(encoding="utf-8"))
+    assert set(report["results"]["200"]) == {
+        "force_dates_iso", "normalize_hpo_column", "run_conversion", "write_clean_csv"}
+
+    # a baseline that is 1000x faster must be reported as a regression
+    for stages in report["results"].values():
+        for values in stages.values():
+            values["seconds"] /= 1000
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps(report), encoding="utf-8")
+    assert main(args + ["--compare", str(baseline)]) == 1
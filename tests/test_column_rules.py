@@ -0,0 +1,101 @@
+import json
+
+import pandas as pd
+import pytest
+
+from tools.column_rules import RuleSet, load_rules
+from tools.emedgene_csv_converter_core import (clean_csv_text, collect_inputs, convert_file,
+                                               load_hpo_ontology, main, run_conversion,
+                                               run_conversion_parallel)
+from tools.watch_folder import _is_candidate
+
+
+RULES = {"columns": {
+    "BioSample Name": {"required": True, "pattern": r"S\d+", "unique": True},
+    "Sex": {"transforms": ["strip", "upper", {"map": {"MALE": "M", "FEMALE": "F"}}],
+            "allowed": ["M", "F", "U"], "on_invalid": "blank"},
+    "Age": {"min": 0, "max": 120, "severity": "warning"},
+    "Lab": {"required": True},
+}}
+
+
+def _frame():
+    return pd.DataFrame({
+        "BioSample Name": ["S1", "S2", "S2", "X9"],
+        "Phenotypes Id": ["HP:0001250", "HP:7777777", None, "HP:0002279"],
+        "Date Of Birth": ["13/01/2020", "bad", "02/03/2020", None],
+        "Sex": [" male", "female ", "f", "other"],
+        "Age": ["34", "abc", "130", None],
+    })
+
+
+def test_rules_transform_and_check():
+    df = _frame()
+    violations = RuleSet(RULES).apply(df, df["BioSample Name"])
+
+    assert df["Sex"].tolist() == ["M", "F", "F", ""]
+    found = {(v.row, v.column, v.rule) for v in violations}
+    assert found == {
+        (1, "BioSample Name", "unique"), (2, "BioSample Name", "unique"),
+        (3, "BioSample Name", "pattern"), (3, "Sex", "allowed"),
+        (1, "Age", "number"), (2, "Age", "max"), (None, "Lab", "required"),
+    }
+    assert {v.severity for v in violations if v.column == "Age"} == {"warning"}
+
+    with pytest.raises(ValueError, match="unknown rule"):
+        RuleSet({"columns": {"Sex": {"alowed": ["M"]}}})
+
+
+def test_conversion_with_rules_writes_validation_report(tmp_path, mini_obo):
+    ontology = load_hpo_ontology(mini_obo)
+    rules_path = tmp_path / "rules.json"
+    rules_path.write_text(json.dumps(RULES), encoding="utf-8")
+    rules = load_rules(str(rules_path))
+
+    args = (_frame(), "Phenotypes Id", ["Date Of Birth"], ontology, "BioSample Name")
+    expected, found = [], []
+    single, _ = run_conversion(*args, rules=rules, violations=expected)
+    parallel, _ = run_conversion_parallel(*args, workers=2, min_rows=0, rules=rules,
+                                          violations=found)
+    assert clean_csv_text(parallel) == clean_csv_text(single)
+    assert found == expected
+    assert [v.rule for v in expected[:2]] == ["hpo_code", "date"]
+    assert expected[1].value == "bad"
+
+    path = tmp_path / "run.csv"
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("Export\n")
+        _frame().to_csv(f, index=False)
+    assert main([str(path), "--hpo-file", mini_obo, "--rules", str(rules_path)]) == 0
+
+    report = pd.read_csv(tmp_path / "run_VALIDATION_REPORT.csv", dtype=str, keep_default_na=False)
+    assert len(report) == len(expected)
+    assert report.loc[0].tolist() == ["3", "S2", "Phenotypes Id", "hpo_code", "error",
+                                      "HP:7777777", "invalid or obsolete HPO code"]
+    assert not (tmp_path / "run_HPO_ERROR_REPORT.txt").exists()
+
+    result = convert_file(str(path), ontology, output_dir=str(tmp_path / "out"))
+    assert "violations" not in result
+    assert (tmp_path / "out" / "run_HPO_ERROR_REPORT.txt").exists()
+
+
+def test_date_violations_with_repeated_index_labels(mini_obo):
+    df = _frame()
+    df.index = [0, 0, 1, 1]
+
+    violations = []
+    run_conversion(df, "Phenotypes Id", ["Date Of Birth"], load_hpo_ontology(mini_obo),
+                   "BioSample Name", violations=violations)
+
+    date = [v for v in violations if v.rule == "date"]
+    assert [(v.row, v.sample, v.value) for v in date] == [(0, "S2", "bad")]
+
+
+def test_outputs_are_not_picked_up_as_inputs(tmp_path):
+    names = ["a.csv", "a_CLEAN.csv", "a_DELTA_CLEAN.csv", "a_VALIDATION_REPORT.csv",
+             "a_HPO_ERROR_REPORT.txt"]
+    for name in names:
+        (tmp_path / name).write_text("x\n", encoding="utf-8")
+
+    assert collect_inputs([str(tmp_path)]) == [str(tmp_path / "a.csv")]
+    assert [n for n in names if _is_candidate(n)] == ["a.csv"]
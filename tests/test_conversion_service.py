@@ -0,0 +1,61 @@
+import io
+import json
+import urllib.error
+import urllib.request
+
+import pandas as pd
+import pytest
+
+from tools.conversion_service import start_server
+
+
+@pytest.fixture
+def service(mini_obo):
+    server = start_server(mini_obo, port=0)
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def _post(url, body, content_type="application/json"):
+    data = json.dumps(body).encode("utf-8") if content_type == "application/json" else body
+    request = urllib.request.Request(url, data=data, headers={"Content-Type": content_type})
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return response.read().decode("utf-8")
+
+
+def test_validate_and_normalize(service):
+    result = json.loads(_post(service + "/validate-hpo",
+                              {"values": ["HP:0002279, HP:1234567", "", "HP:0012345"]}))
+    assert result["results"] == [
+        {"codes": ["HP:0001250"], "invalid": ["HP:1234567"]},
+        {"codes": [], "invalid": []},
+        {"codes": ["HP:0001250"], "invalid": []},
+    ]
+
+    result = json.loads(_post(service + "/normalize", {"rows": [
+        {"BioSample Name": "S1", "Phenotypes Id": "HP:0000478", "Date Of Birth": "5/19/1991"},
+        {"BioSample Name": "S2", "Phenotypes Id": "HP:7654321", "Date Of Birth": None},
+    ]}))
+    assert result["rows"][0]["Date Of Birth"] == "1991-05-19"
+    assert result["invalid"] == [{"row": 1, "sample": "S2", "codes": ["HP:7654321"]}]
+
+
+def test_convert_upload(service):
+    buffer = io.BytesIO()
+    pd.DataFrame({"BioSample Name": ["S1"], "Phenotypes Id": ["HP:0002279"]}).to_excel(
+        buffer, startrow=1, index=False)
+
+    text = _post(service + "/convert?filename=run.xlsx", buffer.getvalue(),
+                 "application/octet-stream")
+
+    assert text.splitlines() == ["[DATA],", "BioSample Name,Phenotypes Id", "S1,HP:0001250"]
+
+
+def test_bad_requests(service):
+    with pytest.raises(urllib.error.HTTPError) as e:
+        _post(service + "/validate-hpo", {"values": "HP:0000478"})
+    assert e.value.code == 400
+    with pytest.raises(urllib.error.HTTPError) as e:
+        _post(service + "/convert?filename=run.pdf", b"%PDF", "application/pdf")
+    assert e.value.code == 415
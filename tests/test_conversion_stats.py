@@ -0,0 +1,38 @@
+import json
+import os
+
+import pandas as pd
+
+from tools.conversion_stats import ConversionStats
+from tools.emedgene_csv_converter_core import convert_file, load_hpo_ontology
+
+
+def test_convert_file_writes_stats_sidecar(tmp_path, mini_obo):
+    path = tmp_path / "stats.xlsx"
+    pd.DataFrame({
+        "BioSample Name": ["S1", "S2", "S3"],
+        "Phenotypes Id": ["HP:0001250", "HP:1234567, HP:7654321", "HP:0000478"],
+        "Date Of Birth": ["5/19/1991", "5/19/1991", "not a date"],
+    }).to_excel(path, startrow=1, index=False)
+
+    stats = ConversionStats()
+    result = convert_file(str(path), load_hpo_ontology(mini_obo), stats=stats)
+
+    assert set(stats.stages) == {"read", "dates", "hpo", "write"}
+    assert stats.rows == 3
+    assert stats.invalid_rows == 1 and stats.invalid_codes == 2
+    assert stats.date_columns["Date Of Birth"] == {"unique_values": 2, "failed_rows": 1}
+    with open(result["stats"], encoding="utf-8") as f:
+        saved = json.load(f)
+    assert saved["rows"] == 3 and saved["total_seconds"] >= 0
+
+
+def test_convert_file_without_stats_writes_no_sidecar(tmp_path, mini_obo):
+    path = tmp_path / "plain.xlsx"
+    pd.DataFrame({"BioSample Name": ["S1"], "Phenotypes Id": ["HP:0001250"]}).to_excel(
+        path, startrow=1, index=False)
+
+    result = convert_file(str(path), load_hpo_ontology(mini_obo))
+
+    assert result["stats"] is None
+    assert not os.path.exists(tmp_path / "plain_STATS.json")
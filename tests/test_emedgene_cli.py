@@ -0,0 +1,47 @@
+import os
+
+import pandas as pd
+
+from tools.emedgene_csv_converter_core import main
+
+
+def _write_workbook(path, df):
+    # the GUI default expects the column names on Excel row 2
+    df.to_excel(path, startrow=1, index=False)
+
+
+def test_cli_converts_folder(tmp_path, mini_obo):
+    in_dir = tmp_path / "run"
+    in_dir.mkdir()
+    _write_workbook(in_dir / "batch1.xlsx", pd.DataFrame({
+        "BioSample Name": ["S1", "S2"],
+        "Phenotypes Id": ["HP:0001250", "HP:0002279, HP:1234567"],
+        "Date Of Birth": ["5/19/1991", "2020-01-03"],
+    }))
+    _write_workbook(in_dir / "batch2.xlsx", pd.DataFrame({
+        "BioSample Name": ["S3"],
+        "Phenotypes Id": ["HP:0000478"],
+        "Date Of Birth": ["1/2/2001"],
+    }))
+
+    code = main([str(in_dir), "--hpo-file", mini_obo, "--workers", "2"])
+
+    assert code == 0
+    with open(in_dir / "batch1_CLEAN.csv", encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    assert lines[0] == "[DATA],,"
+    assert lines[2] == "S1,HP:0001250,1991-05-19"
+    assert lines[3] == "S2,HP:0001250,2020-01-03"
+    with open(in_dir / "batch1_HPO_ERROR_REPORT.txt", encoding="utf-8") as f:
+        assert "Row 3 | Sample: S2 | Invalid: HP:1234567" in f.read()
+    assert os.path.exists(in_dir / "batch2_CLEAN.csv")
+    assert not os.path.exists(in_dir / "batch2_HPO_ERROR_REPORT.txt")
+
+
+def test_cli_reports_failures(tmp_path, mini_obo, capsys):
+    missing = tmp_path / "missing.xlsx"
+
+    code = main([str(missing), "--hpo-file", mini_obo, "--workers", "1"])
+
+    assert code == 1
+    assert "FAILED" in capsys.readouterr().out
@@ -1,6 +1,9 @@
-from tools.emedgene_csv_converter_core import run_conversion
-from tools.emedgene_csv_converter import load_hpo_list, resource_path
+from tools.emedgene_csv_converter_core import (copy_on_write_active, load_hpo_list, resource_path,
+                                               run_conversion)
 import pandas as pd
+import numpy as np
+import pytest
+import tracemalloc
 import os
 
 
@@ -33,3 +36,37 @@ def test_mock_data():
     expected = expected.fillna("")
     processed = processed.fillna("")
     pd.testing.assert_frame_equal(expected, processed, check_dtype=False)
+
+
+def test_run_conversion_shares_untouched_columns():
+    if not copy_on_write_active():
+        pytest.skip("needs pandas copy-on-write")
+
+    # wide sheet: 200 untouched numeric columns plus the two rewritten ones
+    n = 2000
+    df = pd.DataFrame(np.arange(n * 200, dtype=float).reshape(n, 200),
+                      columns=[f"c{i}" for i in range(200)])
+    df["BioSample Name"] = [f"S{i}" for i in range(n)]
+    df["Phenotypes Id"] = "HP:0001250"
+    df["Date Of Birth"] = "5/19/1991"
+    original = df.copy()
+
+    def convert(share_columns):
+        tracemalloc.start()
+        try:
+            out, _ = run_conversion(df, "Phenotypes Id", ["Date Of Birth"], {"HP:0001250"},
+                                    "BioSample Name", share_columns=share_columns)
+            return out, tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    shared, shared_peak = convert(True)
+    copied, copied_peak = convert(False)
+
+    assert np.shares_memory(shared["c0"].to_numpy(), df["c0"].to_numpy())
+    assert shared_peak < copied_peak / 2
+    pd.testing.assert_frame_equal(shared, copied)
+    # writes to the result never leak into the loaded frame
+    shared.loc[0, "c0"] = -1.0
+    pd.testing.assert_frame_equal(df, original)
+    assert shared.loc[1, "Date Of Birth"] == "1991-05-19"
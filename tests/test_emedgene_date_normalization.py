@@ -1,5 +1,7 @@
+from datetime import datetime
+
 import pandas as pd
-from tools.emedgene_csv_converter_core import force_dates_iso
+from tools.emedgene_csv_converter_core import force_dates_iso, normalize_date_series, try_parse_date
 
 
 def test_date_normalization():
@@ -9,3 +11,35 @@ def test_date_normalization():
 
     force_dates_iso(df, ["DOB"])
     assert df["DOB"].tolist() == ["1991-05-19", "2020-01-03", "2001-01-02", ""]
+
+
+def test_vectorized_dates_match_per_value_parser():
+    values = ["5/19/1991", "19/05/1991", "2020-01-03", "01-02-2001",
+              "2020-01-03 10:11:12", "5/19/91", "not a date", "", None,
+              datetime(2001, 2, 3), "5/19/1991", "01-02-2001"]
+    series = pd.Series(values, dtype=object)
+
+    assert normalize_date_series(series).tolist() == [try_parse_date(v) for v in values]
+
+
+def test_day_first_column_is_parsed_consistently():
+    df = pd.DataFrame({"DataRichiesta": ["19/05/2021", "03/04/2021", "25/12/2020", "5/19/2021", ""]})
+
+    profiles = force_dates_iso(df, ["DataRichiesta"])
+    profile = profiles["DataRichiesta"]
+
+    assert profile.dayfirst and profile.conflicting
+    assert profile.date_format == "%d/%m/%Y"
+    # 03/04 follows the column's day-first order instead of month-first
+    assert df["DataRichiesta"].tolist() == ["2021-05-19", "2021-04-03", "2020-12-25", "2021-05-19", ""]
+    assert profile.nonconforming_rows == [3]
+
+
+def test_ambiguous_column_is_flagged():
+    df = pd.DataFrame({"Due Date": ["01/02/2021", "03/04/2021", "bad"]})
+
+    profile = force_dates_iso(df, ["Due Date"])["Due Date"]
+
+    assert profile.ambiguous and not profile.dayfirst
+    assert df["Due Date"].tolist() == ["2021-01-02", "2021-03-04", "WRONG_DATE_CONVERSION"]
+    assert profile.failed_rows == [2]
@@ -1,5 +1,6 @@
 from tools.emedgene_csv_converter_core import normalize_hpo_field, load_hpo_list
-from tools.emedgene_csv_converter_core import resource_path
+from tools.emedgene_csv_converter_core import normalize_hpo_column, resource_path
+import pandas as pd
 import os
 
 
@@ -14,3 +15,16 @@ def test_load_hpo_list_has_codes():
     codes = load_hpo_list(hpo_path)
     assert isinstance(codes, set)
     assert "HP:0000001" in codes  # root term in HPO
+
+
+def test_normalize_hpo_column_matches_per_row_logic():
+    valid = {"HP:0000001", "HP:0001250"}
+    raw = pd.Series(["HP:0001250, HP:9999999", None, "HP:0000001 HP:0001250",
+                     "HP:8888888", 42], index=[10, 3, 7, 3, 0])
+    samples = pd.Series(["A", "B", "C", "D", "E"], index=raw.index)
+
+    normalized, invalid = normalize_hpo_column(raw, valid, samples)
+
+    assert normalized.tolist() == ["HP:0001250", "", "HP:0000001; HP:0001250", "", ""]
+    # labels are kept, samples come from the same row even with a shuffled index
+    assert invalid == [(10, "A", ["HP:9999999"]), (3, "D", ["HP:8888888"])]
@@ -0,0 +1,84 @@
+import pandas as pd
+
+from tools.emedgene_csv_converter_core import convert_file
+from tools.incremental import convert_file_incremental
+from tools.hpo_index import load_hpo_ontology
+
+
+def _week1():
+    return pd.DataFrame({
+        "BioSample Name": ["S1", "S2", "S3"],
+        "Phenotypes Id": ["HP:0002279", "HP:7654321", "HP:0000478"],
+        "Date Of Birth": ["5/19/1991", "1/2/2001", "3/4/2000"],
+        "Age": [33, 24, None],
+    })
+
+
+def _week2():
+    df = _week1()
+    df.loc[1, "Phenotypes Id"] = "HP:0001250"
+    df.loc[3] = ["S4", "HP:0000478", "2/3/2004", 21]
+    return df
+
+
+def _read(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def test_second_run_only_converts_changed_rows(tmp_path, mini_obo):
+    onto = load_hpo_ontology(mini_obo)
+    path = str(tmp_path / "master.xlsx")
+
+    first = convert_file_incremental(path, onto, df=_week1())
+    second = convert_file_incremental(path, onto, df=_week2(), delta=True)
+    full = convert_file(str(tmp_path / "reference.xlsx"), onto, df=_week2())
+
+    assert first["converted_rows"] == 3
+    assert (second["converted_rows"], second["reused_rows"]) == (2, 2)
+    assert _read(second["csv"]) == _read(full["csv"])
+    assert second["hpo_report"] is None  # S2 was fixed
+    delta = _read(second["delta"]).splitlines()
+    assert [line.split(",")[0] for line in delta[2:]] == ["S2", "S4"]
+
+    again = convert_file_incremental(path, onto, df=_week2())
+    assert again["converted_rows"] == 0 and _read(again["csv"]) == _read(full["csv"])
+
+
+def test_cached_invalid_codes_stay_reported(tmp_path, mini_obo):
+    onto = load_hpo_ontology(mini_obo)
+    path = str(tmp_path / "master.xlsx")
+
+    convert_file_incremental(path, onto, df=_week1())
+    result = convert_file_incremental(path, onto, df=_week1())
+
+    assert result["reused_rows"] == 3
+    assert "Row 3 | Sample: S2 | Invalid: HP:7654321" in _read(result["hpo_report"])
+
+
+def test_edited_output_or_new_ontology_forces_full_run(tmp_path, mini_obo):
+    onto = load_hpo_ontology(mini_obo)
+    path = str(tmp_path / "master.xlsx")
+
+    first = convert_file_incremental(path, onto, df=_week1())
+    with open(first["csv"], "a", encoding="utf-8") as f:
+        f.write("edited by hand\n")
+    assert convert_file_incremental(path, onto, df=_week1())["reused_rows"] == 0
+
+    assert convert_file_incremental(path, onto, df=_week1())["reused_rows"] == 3
+    smaller = set(onto.codes) - {"HP:0000478"}
+    assert convert_file_incremental(path, smaller, df=_week1())["reused_rows"] == 0
+
+
+def test_numeric_column_changing_dtype_keeps_rows(tmp_path, mini_obo):
+    onto = load_hpo_ontology(mini_obo)
+    path = str(tmp_path / "master.xlsx")
+    week1 = _week1().assign(Age=[33, 24, 50])
+    week2 = _week1()  # Age [33.0, 24.0, NaN]: S3 lost its age, the column is float now
+
+    convert_file_incremental(path, onto, df=week1)
+    second = convert_file_incremental(path, onto, df=week2)
+    full = convert_file(str(tmp_path / "reference.xlsx"), onto, df=week2)
+
+    assert (second["converted_rows"], second["reused_rows"]) == (1, 2)
+    assert _read(second["csv"]) == _read(full["csv"])
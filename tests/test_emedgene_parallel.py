@@ -0,0 +1,46 @@
+import pandas as pd
+
+from tools.conversion_stats import ConversionStats
+from tools.emedgene_csv_converter_core import (clean_csv_text, load_hpo_ontology, main,
+                                               run_conversion, run_conversion_parallel)
+
+
+def _frame(n=90):
+    return pd.DataFrame({
+        "BioSample Name": [f"S{i}" for i in range(n)],
+        "Phenotypes Id": ["HP:0002279, HP:7777777", "HP:0001250", None] * (n // 3),
+        "Date Of Birth": ["13/01/2020", "02/03/2020", "nope"] * (n // 3),
+        "Note": ["x"] * n,
+    }, index=range(100, 100 + n))
+
+
+def test_parallel_matches_single_process(mini_obo):
+    ontology = load_hpo_ontology(mini_obo)
+    df = _frame()
+    args = (df, "Phenotypes Id", ["Date Of Birth"], ontology, "BioSample Name")
+
+    expected_dates, actual_dates = {}, {}
+    stats = ConversionStats()
+    expected, expected_invalid = run_conversion(*args, date_report=expected_dates)
+    actual, actual_invalid = run_conversion_parallel(*args, workers=3, min_rows=0,
+                                                     date_report=actual_dates, stats=stats)
+
+    assert clean_csv_text(actual) == clean_csv_text(expected)
+    assert actual.index.equals(df.index)
+    assert actual_invalid == expected_invalid
+    assert actual_dates == expected_dates
+    assert expected_dates["Date Of Birth"].failed_rows[:2] == [102, 105]
+    assert set(stats.stages) == {"date_formats", "normalize"}
+
+
+def test_cli_row_workers(tmp_path, mini_obo):
+    path = tmp_path / "big.csv"
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("Export\n")
+        _frame().to_csv(f, index=False)
+
+    assert main([str(path), "--hpo-file", mini_obo, "--row-workers", "2"]) == 0
+    with open(tmp_path / "big_CLEAN.csv", encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    assert lines[2] == "S0,HP:0001250,2020-01-13,x"
+    assert len(lines) == 92
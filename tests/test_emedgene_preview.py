@@ -0,0 +1,52 @@
+from datetime import datetime
+
+import pandas as pd
+
+from tools.emedgene_csv_converter_core import (guess_date_columns, load_hpo_ontology, peek_excel,
+                                               run_conversion)
+from tools.preview_grid import PAGE_ROWS, PreviewData
+
+
+def test_peek_reads_header_and_sample_only(tmp_path):
+    path = tmp_path / "wide.xlsx"
+    pd.DataFrame({
+        "BioSample Name": [f"S{i}" for i in range(200)],
+        "Prelievo": [datetime(2021, 3, i % 28 + 1) for i in range(200)],
+        "Consenso": ["12/03/2021" if i % 10 else "" for i in range(200)],
+        "Note": ["free text"] * 200,
+    }).to_excel(path, startrow=1, index=False)
+
+    sample = peek_excel(path, header_row=2, sample_rows=20)
+
+    assert list(sample.columns) == ["BioSample Name", "Prelievo", "Consenso", "Note"]
+    assert len(sample) == 20
+    assert guess_date_columns(sample) == ["Prelievo", "Consenso"]
+
+
+def test_preview_grid_pages_and_highlights(mini_obo):
+    n = PAGE_ROWS * 3 + 7
+    df = pd.DataFrame({
+        "BioSample Name": [f"S{i}" for i in range(n)],
+        "Phenotypes Id": ["HP:0001250, HP:9999999" if i == 600 else "HP:0002279"
+                          for i in range(n)],
+        "Date Of Birth": ["not a date" if i == 1300 else "2020-01-02" for i in range(n)],
+    })
+    processed, invalid = run_conversion(df, "Phenotypes Id", ["Date Of Birth"],
+                                        load_hpo_ontology(mini_obo), "BioSample Name")
+
+    data = PreviewData(df, processed, invalid, ["Date Of Birth"], "Phenotypes Id")
+
+    assert len(data) == n
+    assert data.marks == {(600, 1): "hpo", (1300, 2): "date"}
+    assert "HP:9999999" in data.describe(600, 1)
+    inputs, outputs = data.row(n - 1)
+    assert inputs == [f"S{n - 1}", "HP:0002279", "2020-01-02"]
+    assert outputs[1] == "HP:0001250"
+    assert len(data._pages) == 1  # only the page that was asked for
+
+    # HPO lists kept as term ids render the same text
+    compact = PreviewData(df, processed, invalid, ["Date Of Birth"], "Phenotypes Id",
+                          ontology=load_hpo_ontology(mini_obo))
+    assert compact.hpo_lists is not None
+    assert compact.row(600) == data.row(600)
+    assert compact.row(1300) == data.row(1300)
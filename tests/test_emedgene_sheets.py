@@ -0,0 +1,77 @@
+import pandas as pd
+
+from tools.emedgene_csv_converter_core import convert_sheets, main
+from tools.hpo_index import load_hpo_ontology
+from tools.table_readers import list_sheets
+
+
+def _workbook(path):
+    with pd.ExcelWriter(path) as writer:
+        pd.DataFrame({
+            "BioSample Name": ["S1", "S2"],
+            "Phenotypes Id": ["HP:0002279", "HP:7654321"],
+            "Date Of Birth": ["5/19/1991", "1/2/2001"],
+        }).to_excel(writer, sheet_name="Run 1", startrow=1, index=False)
+        # second clinic: header one row lower, date column under another name
+        pd.DataFrame({
+            "BioSample Name": ["S3"],
+            "Phenotypes Id": ["HP:0000478"],
+            "DataRichiesta": ["2020-01-03"],
+        }).to_excel(writer, sheet_name="Clinic|B", startrow=2, index=False)
+
+
+def test_each_sheet_gets_its_own_outputs(tmp_path, mini_obo):
+    path = tmp_path / "lab.xlsx"
+    _workbook(path)
+
+    results = convert_sheets(str(path), load_hpo_ontology(mini_obo), workers=2,
+                             sheet_options={"Clinic|B": {"header_row": 3}},
+                             date_cols=["Date Of Birth", "DataRichiesta"])
+
+    assert list_sheets(path) == ["Run 1", "Clinic|B"]
+    assert results["Run 1"]["csv"].endswith("lab_Run 1_CLEAN.csv")
+    assert results["Run 1"]["invalid_rows"] == 1
+    assert results["Clinic|B"]["csv"].endswith("lab_Clinic_B_CLEAN.csv")
+    with open(results["Clinic|B"]["csv"], encoding="utf-8") as f:
+        assert f.read().splitlines()[2] == "S3,HP:0000478,2020-01-03"
+
+
+def test_merged_output(tmp_path, mini_obo):
+    path = tmp_path / "lab.xlsx"
+    _workbook(path)
+
+    result = convert_sheets(str(path), load_hpo_ontology(mini_obo), merge=True,
+                            sheet_options={"Clinic|B": {"header_row": 3}})
+
+    assert result["rows"] == 3 and result["sheets"] == ["Run 1", "Clinic|B"]
+    merged = pd.read_csv(result["csv"], skiprows=1, dtype=str, keep_default_na=False)
+    assert merged.columns.tolist() == ["BioSample Name", "Phenotypes Id",
+                                       "Date Of Birth", "DataRichiesta"]
+    assert merged["DataRichiesta"].tolist() == ["", "", "2020-01-03"]
+    with open(result["hpo_report"], encoding="utf-8") as f:
+        assert "Row 3 (Run 1) | Sample: S2 | Invalid: HP:7654321" in f.read()
+
+
+def test_cli_sheets(tmp_path, mini_obo, capsys):
+    path = tmp_path / "lab.xlsx"
+    _workbook(path)
+
+    code = main([str(path), "--hpo-file", mini_obo, "--workers", "1", "--sheets", "Run 1",
+                 "--stats"])
+
+    assert code == 0
+    assert (tmp_path / "lab_Run 1_CLEAN.csv").exists()
+    assert (tmp_path / "lab_Run 1_STATS.json").exists()
+    assert not (tmp_path / "lab_Clinic_B_CLEAN.csv").exists()
+    assert "1/1 sheets converted" in capsys.readouterr().out
+
+
+def test_cli_rejects_stats_for_merged_sheets(tmp_path, mini_obo):
+    path = tmp_path / "lab.xlsx"
+    _workbook(path)
+
+    code = main([str(path), "--hpo-file", mini_obo, "--sheets", "all", "--merge-sheets",
+                 "--stats"])
+
+    assert code == 2
+    assert not (tmp_path / "lab_CLEAN.csv").exists()
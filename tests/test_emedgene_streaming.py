@@ -0,0 +1,77 @@
+import os
+
+import pandas as pd
+import pytest
+
+import tools.emedgene_csv_converter_core as core
+from tools.emedgene_csv_converter_core import (convert_file, convert_file_streaming,
+                                               iter_excel_chunks)
+from tools.hpo_index import load_hpo_ontology
+
+
+def _workbook(path, n=23):
+    df = pd.DataFrame({
+        "BioSample Name": [f"S{i}" for i in range(n)],
+        "Phenotypes Id": ["HP:0001250; HP:7654321" if i % 5 == 0 else "HP:0002279"
+                          for i in range(n)],
+        "Date Of Birth": [f"{i % 28 + 1}/05/1990" for i in range(n)],
+        "Note": ["x"] * n,
+        # real Excel cells: a date column that is not converted, numbers with
+        # a blank in a later chunk only, whole numbers
+        "Collected": pd.date_range("2020-03-04", periods=n, freq="D"),
+        "Volume": [None if i == 20 else 5 for i in range(n)],
+        "Lane": list(range(n)),
+        "Consent": [None if i == 15 else i % 2 == 0 for i in range(n)],
+    })
+    df.to_excel(path, startrow=1, index=False)
+
+
+def test_chunks_keep_global_row_index(tmp_path):
+    path = tmp_path / "big.xlsx"
+    _workbook(path)
+
+    chunks = list(iter_excel_chunks(path, header_row=2, chunk_rows=10))
+
+    assert [len(c) for c in chunks] == [10, 10, 3]
+    assert chunks[1].index[0] == 10
+    assert list(chunks[0].columns) == ["BioSample Name", "Phenotypes Id",
+                                       "Date Of Birth", "Note", "Collected", "Volume", "Lane",
+                                       "Consent"]
+
+
+def test_streaming_matches_in_memory_conversion(tmp_path, mini_obo):
+    path = tmp_path / "big.xlsx"
+    _workbook(path)
+    onto = load_hpo_ontology(mini_obo)
+
+    stream_dir, memory_dir = tmp_path / "stream", tmp_path / "memory"
+    streamed = convert_file_streaming(path, onto, output_dir=str(stream_dir),
+                                      chunk_rows=7, sniff_rows=14)
+    in_memory = convert_file(path, onto, output_dir=str(memory_dir))
+
+    assert streamed["rows"] == in_memory["rows"] == 23
+    for key in ("csv", "hpo_report"):
+        with open(streamed[key], encoding="utf-8") as a, open(in_memory[key], encoding="utf-8") as b:
+            assert a.read() == b.read()
+    with open(streamed["csv"], encoding="utf-8") as f:
+        assert f.read().splitlines()[2].endswith(",20200304,5.0,0,1.0")
+
+
+def test_failed_stream_leaves_no_partial_output(tmp_path, mini_obo, monkeypatch):
+    path = tmp_path / "big.xlsx"
+    _workbook(path)
+    onto = load_hpo_ontology(mini_obo)
+    convert_chunk = core.run_conversion
+    calls = []
+
+    def fail_on_second_chunk(*args, **kwargs):
+        calls.append(1)
+        if len(calls) == 2:
+            raise RuntimeError("killed")
+        return convert_chunk(*args, **kwargs)
+
+    monkeypatch.setattr(core, "run_conversion", fail_on_second_chunk)
+    with pytest.raises(RuntimeError):
+        convert_file_streaming(path, onto, chunk_rows=7, sniff_rows=7)
+
+    assert sorted(os.listdir(tmp_path)) == ["big.xlsx", "hp.obo"]
@@ -0,0 +1,48 @@
+import pandas as pd
+
+from tools.emedgene_csv_converter_core import clean_csv_text, load_hpo_ontology, run_conversion
+from tools.frame_memory import HPOTermLists, compact_frame
+
+
+def _clinical_frame(n=300):
+    return pd.DataFrame({
+        "BioSample Name": [f"S{i:04d}" for i in range(n)],
+        "Sex": ["M", "F", None][:3] * (n // 3),
+        "Notes": [f"free text {i}" for i in range(n)],
+        "Phenotypes Id": ["HP:0001250", "HP:0002279, HP:9999999", None] * (n // 3),
+        "Date Of Birth": ["12/03/2020", "not a date", "2020-01-31"] * (n // 3),
+        "Age": list(range(n)),
+    })
+
+
+def test_compact_frame_keeps_clean_csv_identical(mini_obo):
+    df = _clinical_frame()
+    compact, report = compact_frame(df)
+
+    assert isinstance(compact["Sex"].dtype, pd.CategoricalDtype)
+    assert isinstance(compact["Phenotypes Id"].dtype, pd.CategoricalDtype)
+    assert compact["Age"].dtype == df["Age"].dtype
+    assert report["after_mb"] < report["before_mb"]
+    assert set(report["columns"]) == set(df.columns)
+
+    ontology = load_hpo_ontology(mini_obo)
+    args = ("Phenotypes Id", ["Date Of Birth"], ontology, "BioSample Name")
+    expected, expected_invalid = run_conversion(df, *args)
+    actual, actual_invalid = run_conversion(compact, *args)
+    assert clean_csv_text(actual) == clean_csv_text(expected)
+    assert actual_invalid == expected_invalid
+
+
+def test_hpo_term_lists_round_trip(mini_obo):
+    ontology = load_hpo_ontology(mini_obo)
+    normalized = pd.Series(["HP:0001250", "", "HP:0001250; HP:0000118", None],
+                           index=[10, 11, 12, 13], name="Phenotypes Id")
+
+    lists = HPOTermLists.from_series(normalized, ontology)
+
+    assert len(lists) == 4
+    assert lists.ids.dtype == "int32"
+    assert lists.codes(2) == ["HP:0001250", "HP:0000118"]
+    restored = lists.to_series()
+    assert restored.tolist() == ["HP:0001250", "", "HP:0001250; HP:0000118", ""]
+    assert restored.index.tolist() == [10, 11, 12, 13]
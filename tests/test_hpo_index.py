@@ -0,0 +1,50 @@
+import os
+import shutil
+
+import pytest
+
+import tools.hpo_index as hpo_index
+from tools.hpo_index import cache_dir, index_path_for, invalidate_hpo_cache, load_hpo_codes
+
+
+def test_index_is_built_in_user_cache(mini_obo):
+    codes = load_hpo_codes(mini_obo)
+    assert "HP:0001250" in codes
+    assert "HP:0012345" in codes
+    assert os.path.dirname(index_path_for(mini_obo)) == cache_dir()
+    assert os.path.exists(index_path_for(mini_obo))
+
+
+def test_index_is_reused_without_parsing(mini_obo, monkeypatch, tmp_path):
+    expected = load_hpo_codes(mini_obo)
+    invalidate_hpo_cache()
+
+    def fail(_):
+        raise AssertionError("hp.obo parsed again")
+
+    monkeypatch.setattr(hpo_index, "parse_obo_terms", fail)
+    assert load_hpo_codes(mini_obo) == expected
+
+    # same ontology unpacked to a new folder (the --onefile build, every launch)
+    moved = tmp_path / "_MEI12345" / "hp.obo"
+    moved.parent.mkdir()
+    shutil.copy(mini_obo, moved)
+    assert load_hpo_codes(str(moved)) == expected
+
+
+def test_index_is_rebuilt_when_obo_changes(mini_obo):
+    load_hpo_codes(mini_obo)
+    with open(mini_obo, "a", encoding="utf-8") as f:
+        f.write("\n[Term]\nid: HP:9999999\nname: New term\n")
+
+    assert "HP:9999999" in load_hpo_codes(mini_obo)
+
+
+def test_failed_index_write_leaves_no_temp_file(tmp_path):
+    class Unwritable:
+        def to_arrays(self):
+            raise ValueError("broken ontology")
+
+    with pytest.raises(ValueError):
+        hpo_index._write_index(str(tmp_path / "hp_0.index.npz"), Unwritable(), {})
+    assert os.listdir(tmp_path) == []
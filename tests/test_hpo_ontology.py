@@ -0,0 +1,75 @@
+import pandas as pd
+
+from tools.emedgene_csv_converter_core import run_conversion
+from tools.hpo_index import HPOOntology, invalidate_hpo_cache, load_hpo_ontology
+
+
+def test_canonicalize_alt_and_obsolete(mini_obo):
+    onto = HPOOntology.from_obo(mini_obo)
+    assert onto.canonicalize("HP:0001250") == "HP:0001250"
+    assert onto.canonicalize("HP:0002279") == "HP:0001250"  # alt_id
+    assert onto.canonicalize("HP:0012345") == "HP:0001250"  # replaced_by
+    assert onto.canonicalize("HP:7777777") is None
+
+
+def test_is_a_uses_transitive_closure(mini_obo):
+    onto = HPOOntology.from_obo(mini_obo)
+    assert onto.is_a("HP:0001250", "HP:0000001")
+    assert onto.is_a("HP:0001250", "HP:0000707")
+    assert onto.is_a("HP:0002279", "HP:0000118")
+    assert onto.is_a("HP:0001250", "HP:0001250")
+    assert not onto.is_a("HP:0001250", "HP:0000478")
+    assert onto.ancestors("HP:0000707") == {"HP:0000118", "HP:0000001"}
+
+
+def test_ontology_round_trips_through_index(mini_obo):
+    built = load_hpo_ontology(mini_obo)
+    invalidate_hpo_cache()
+    loaded = load_hpo_ontology(mini_obo)
+
+    assert loaded is not built
+    assert loaded.terms == built.terms
+    assert loaded.alt_ids == built.alt_ids
+    assert loaded.replaced_by == built.replaced_by
+    assert loaded.is_a("HP:0001250", "HP:0000118")
+
+
+def test_run_conversion_remaps_codes(mini_obo):
+    df = pd.DataFrame({
+        "BioSample Name": ["S1", "S2"],
+        "Phenotypes Id": ["HP:0002279, HP:0000478", "HP:0012345; HP:1234567"],
+    })
+
+    processed, invalid = run_conversion(
+        df, "Phenotypes Id", [], load_hpo_ontology(mini_obo), "BioSample Name")
+
+    assert processed["Phenotypes Id"].tolist() == [
+        "HP:0001250; HP:0000478", "HP:0001250"]
+    assert invalid == [(1, "S2", ["HP:1234567"])]
+
+
+def test_remapped_duplicates_are_dropped(mini_obo):
+    df = pd.DataFrame({
+        "BioSample Name": ["S1", "S2"],
+        "Phenotypes Id": ["HP:0000478, HP:0002279; HP:0001250",
+                          "HP:0012345, HP:0000478, HP:0001250"],
+    })
+
+    processed, _ = run_conversion(
+        df, "Phenotypes Id", [], load_hpo_ontology(mini_obo), "BioSample Name")
+
+    assert processed["Phenotypes Id"].tolist() == [
+        "HP:0000478; HP:0001250", "HP:0001250; HP:0000478"]
+
+
+def test_literal_duplicates_are_kept(mini_obo):
+    df = pd.DataFrame({
+        "BioSample Name": ["S1", "S2"],
+        "Phenotypes Id": ["HP:0000478; HP:0000478", "HP:0000478, HP:0002279, HP:0000478"],
+    })
+
+    processed, _ = run_conversion(
+        df, "Phenotypes Id", [], load_hpo_ontology(mini_obo), "BioSample Name")
+
+    assert processed["Phenotypes Id"].tolist() == [
+        "HP:0000478; HP:0000478", "HP:0000478; HP:0001250; HP:0000478"]
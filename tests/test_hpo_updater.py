@@ -0,0 +1,98 @@
+import http.server
+import json
+import os
+import threading
+
+import pytest
+
+from tests.conftest import MINI_OBO
+from tools.hpo_index import HPOOntology, index_paths, load_hpo_codes
+from tools.hpo_updater import meta_path_for, update_hpo_file
+
+
+class _OboHandler(http.server.BaseHTTPRequestHandler):
+    body = MINI_OBO.encode("utf-8")
+    etag = '"v1"'
+    requests = []
+
+    def do_GET(self):
+        self.requests.append(dict(self.headers))
+        if self.headers.get("If-None-Match") == self.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", self.etag)
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def obo_server():
+    _OboHandler.body = MINI_OBO.encode("utf-8")
+    _OboHandler.etag = '"v1"'
+    _OboHandler.requests = []
+    server = http.server.HTTPServer(("127.0.0.1", 0), _OboHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/hp.obo"
+    server.shutdown()
+    server.server_close()
+
+
+def test_download_then_not_modified(tmp_path, obo_server):
+    dest = str(tmp_path / "hp.obo")
+
+    first = update_hpo_file(dest, url=obo_server)
+    second = update_hpo_file(dest, url=obo_server)
+
+    assert first["status"] == "updated" and first["terms"] == 6
+    assert second["status"] == "not-modified"
+    assert _OboHandler.requests[1]["If-None-Match"] == '"v1"'
+    assert "HP:0001250" in load_hpo_codes(dest)
+    assert (tmp_path / "hp.obo.meta.json").exists()
+
+
+def test_new_version_rebuilds_index(tmp_path, obo_server):
+    dest = str(tmp_path / "hp.obo")
+    update_hpo_file(dest, url=obo_server)
+    assert "HP:9999999" not in load_hpo_codes(dest)
+
+    _OboHandler.body = (MINI_OBO + "\n[Term]\nid: HP:9999999\nname: New\n").encode("utf-8")
+    _OboHandler.etag = '"v2"'
+
+    assert update_hpo_file(dest, url=obo_server)["status"] == "updated"
+    assert "HP:9999999" in load_hpo_codes(dest)
+
+
+def test_update_parses_the_download_once(tmp_path, obo_server, monkeypatch):
+    dest = str(tmp_path / "hp.obo")
+    parsed = []
+    from_obo = HPOOntology.from_obo.__func__
+    monkeypatch.setattr(HPOOntology, "from_obo",
+                        classmethod(lambda cls, path: parsed.append(path) or from_obo(cls, path)))
+
+    update_hpo_file(dest, url=obo_server)
+
+    assert len(parsed) == 1
+    assert "HP:0001250" in load_hpo_codes(dest) and len(parsed) == 1
+    assert os.path.exists(index_paths(dest)[0])
+
+
+def test_broken_download_keeps_existing_file(tmp_path, obo_server):
+    dest = tmp_path / "hp.obo"
+    update_hpo_file(str(dest), url=obo_server)
+    before = dest.read_text(encoding="utf-8")
+
+    _OboHandler.body = b"<html>rate limited</html>"
+    _OboHandler.etag = '"broken"'
+
+    with pytest.raises(ValueError):
+        update_hpo_file(str(dest), url=obo_server)
+    assert dest.read_text(encoding="utf-8") == before
+    with open(meta_path_for(str(dest)), encoding="utf-8") as f:
+        assert json.load(f)["etag"] == '"v1"'
+    assert [p.name for p in tmp_path.iterdir() if p.name.endswith(".download")] == []
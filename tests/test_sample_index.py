@@ -0,0 +1,50 @@
+import pandas as pd
+
+from tools.emedgene_csv_converter_core import convert_file, load_hpo_ontology, main
+from tools.sample_index import SampleIndex
+
+
+def test_register_reports_earlier_sources(tmp_path):
+    index = SampleIndex(str(tmp_path / "samples.sqlite"))
+
+    assert index.register(["S1", "S2", "S2"], "week1.xlsx", "2026-01-05T10:00:00",
+                          run_key="a") == {}
+    assert index.register(["S1", "S2"], "week1.xlsx", run_key="a") == {}  # unchanged re-run
+    # the same name saved over with new content is a resubmission
+    assert index.register(["S2", "S3"], "week1.xlsx", run_key="b") == {
+        "S2": ("week1.xlsx", "2026-01-05T10:00:00")}
+    assert set(index.register(["S3", "S4"], "week2.xlsx", run_key="c")) == {"S3"}
+    assert set(index.lookup(["S3", "S9"])) == {"S3"}
+    assert len(index) == 4
+
+
+def test_convert_file_flags_duplicate_samples(tmp_path, mini_obo):
+    ontology = load_hpo_ontology(mini_obo)
+    index_path = str(tmp_path / "samples.sqlite")
+    for name, samples in (("week1.csv", ["S1", "S2"]), ("week2.csv", ["S2", "S3", "S3", ""])):
+        with open(tmp_path / name, "w", encoding="utf-8") as f:
+            f.write("Export\n")
+            pd.DataFrame({"BioSample Name": samples,
+                          "Phenotypes Id": ["HP:0001250"] * len(samples)}).to_csv(f, index=False)
+
+    assert main([str(tmp_path / "week1.csv"), "--hpo-file", mini_obo,
+                 "--sample-index", index_path]) == 0
+    assert not (tmp_path / "week1_VALIDATION_REPORT.csv").exists()
+
+    result = convert_file(str(tmp_path / "week2.csv"), ontology,
+                          sample_index=SampleIndex(index_path))
+    assert result["violations"] == 3
+    report = pd.read_csv(result["validation_report"], dtype=str, keep_default_na=False)
+    assert report[["row", "sample", "rule", "severity"]].values.tolist() == [
+        ["3", "S3", "duplicate_sample", "error"],
+        ["4", "S3", "duplicate_sample", "error"],
+        ["2", "S2", "already_converted", "warning"],
+    ]
+    assert "week1.csv" in report["message"][2]
+    assert len(SampleIndex(index_path)) == 3
+
+    # converting week2.csv again, unchanged, does not report its own samples
+    result = convert_file(str(tmp_path / "week2.csv"), ontology,
+                          sample_index=SampleIndex(index_path))
+    report = pd.read_csv(result["validation_report"], dtype=str, keep_default_na=False)
+    assert report[report["rule"] == "already_converted"]["sample"].tolist() == ["S2"]
@@ -0,0 +1,82 @@
+import pandas as pd
+import pytest
+
+from tools import table_readers
+from tools.emedgene_csv_converter_core import (convert_file, convert_file_streaming,
+                                               iter_table_chunks)
+from tools.hpo_index import load_hpo_ontology
+from tools.table_readers import read_table
+
+
+def _frame(n=12):
+    return pd.DataFrame({
+        "BioSample Name": [f"00{i}" for i in range(n)],
+        "Phenotypes Id": ["HP:0002279, HP:7654321" if i % 4 == 0 else "HP:0000478"
+                          for i in range(n)],
+        "Date Of Birth": [f"{i % 28 + 1}/05/1990" for i in range(n)],
+    })
+
+
+def _export(path, df, sep=","):
+    # same layout as the Excel template: a title line, column names on row 2
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("LIMS export\n")
+        df.to_csv(f, sep=sep, index=False, lineterminator="\n")
+
+
+def test_delimited_exports_keep_text(tmp_path):
+    _export(tmp_path / "a.csv", _frame())
+    _export(tmp_path / "a.tsv", _frame(), sep="\t")
+
+    csv = read_table(tmp_path / "a.csv", header_row=2)
+    tsv = read_table(tmp_path / "a.tsv", header_row=2)
+
+    assert csv["BioSample Name"].tolist()[:2] == ["000", "001"]
+    pd.testing.assert_frame_equal(csv, tsv)
+
+
+def test_failing_backend_falls_back(tmp_path, monkeypatch):
+    path = tmp_path / "a.xlsx"
+    _frame().to_excel(path, startrow=1, index=False)
+
+    def broken(*args, **kwargs):
+        raise RuntimeError("backend crashed")
+
+    monkeypatch.setitem(table_readers.READERS, "calamine", (broken, None))
+    df = read_table(path, header_row=2)
+
+    assert len(df) == 12 and "Phenotypes Id" in df.columns
+    with pytest.raises(ValueError):
+        read_table(path, backend="nope")
+
+
+def test_calamine_matches_openpyxl(tmp_path):
+    pytest.importorskip("python_calamine")
+    path = tmp_path / "a.xlsx"
+    _frame().to_excel(path, startrow=1, index=False)
+
+    pd.testing.assert_frame_equal(read_table(path, 2, backend="calamine"),
+                                  read_table(path, 2, backend="openpyxl"))
+
+
+def test_parquet_input(tmp_path):
+    pytest.importorskip("pyarrow")
+    path = tmp_path / "a.parquet"
+    _frame().to_parquet(path, index=False)
+
+    df = read_table(path)
+
+    assert df["Date Of Birth"].iloc[0] == "1/05/1990"
+
+
+def test_csv_streaming_matches_in_memory(tmp_path, mini_obo):
+    path = tmp_path / "lims.csv"
+    _export(path, _frame(23))
+    onto = load_hpo_ontology(mini_obo)
+
+    assert [len(c) for c in iter_table_chunks(path, 2, chunk_rows=10)] == [10, 10, 3]
+    streamed = convert_file_streaming(path, onto, output_dir=str(tmp_path / "s"), chunk_rows=7)
+    in_memory = convert_file(path, onto, output_dir=str(tmp_path / "m"))
+
+    with open(streamed["csv"], encoding="utf-8") as a, open(in_memory["csv"], encoding="utf-8") as b:
+        assert a.read() == b.read()
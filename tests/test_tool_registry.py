@@ -0,0 +1,21 @@
+import subprocess
+import sys
+
+from tools.tool_registry import ToolSpec, discover_tools, import_times, load_tool, warm_up_tools
+
+
+def test_registry_import_is_light():
+    code = ("import sys, tools.tool_registry as r; specs = r.discover_tools(); "
+            "print(specs[0].name, 'pandas' in sys.modules, 'tkinter' in sys.modules)")
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert out.stdout.split() == ["csv", "False", "False"]
+
+
+def test_load_tool_imports_on_demand(capsys):
+    spec = ToolSpec("memory", "Frame memory", "tools.frame_memory", "HPOTermLists", warm_up=True)
+    assert "csv" in [s.name for s in discover_tools()]
+
+    warm_up_tools([spec, ToolSpec("broken", "Broken", "tools.no_such_tool", "Page", True)])
+    assert load_tool(spec).__name__ == "HPOTermLists"
+    assert "memory" in import_times
+    assert "Warm-up of broken failed" in capsys.readouterr().out
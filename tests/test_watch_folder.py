@@ -0,0 +1,62 @@
+import pandas as pd
+
+from tools.watch_folder import FolderWatcher, read_ledger
+
+
+def _drop(path):
+    pd.DataFrame({"BioSample Name": ["S1"], "Phenotypes Id": ["HP:0002279"]}).to_excel(
+        path, startrow=1, index=False)
+
+
+def test_watcher_converts_settled_files_once(tmp_path, mini_obo):
+    inbox, out = tmp_path / "in", tmp_path / "out"
+    inbox.mkdir()
+    _drop(inbox / "run1.xlsx")
+    (inbox / "~$run1.xlsx").write_bytes(b"lock")
+
+    watcher = FolderWatcher([inbox], out, mini_obo, workers=1, settle=10)
+    watcher.start()
+    try:
+        watcher.poll(now=0)    # first sighting: may still be written
+        watcher.poll(now=5)    # not settled yet
+        assert not watcher._running and not watcher._queue
+        watcher.poll(now=11)
+        watcher.wait_idle()
+    finally:
+        watcher.close()
+
+    assert (out / "run1_CLEAN.csv").exists()
+    ledger = read_ledger(out / "processed_ledger.jsonl")
+    assert [e["status"] for e in ledger.values()] == ["ok"]
+
+    # a restarted watcher skips it until the file changes
+    restarted = FolderWatcher([inbox], out, mini_obo, workers=1, settle=0)
+    restarted.start()
+    try:
+        restarted.poll(now=0)
+        restarted.poll(now=1)
+        assert not restarted._running and not restarted._queue
+    finally:
+        restarted.close()
+
+
+def test_same_name_in_two_folders_is_not_overwritten(tmp_path, mini_obo):
+    first, second, out = tmp_path / "a", tmp_path / "b", tmp_path / "out"
+    first.mkdir()
+    second.mkdir()
+    _drop(first / "run.xlsx")
+    _drop(second / "run.xlsx")
+
+    watcher = FolderWatcher([first, second], out, mini_obo, workers=1, settle=0)
+    watcher.start()
+    try:
+        watcher.poll(now=0)
+        watcher.poll(now=1)
+        watcher.wait_idle()
+    finally:
+        watcher.close()
+
+    ledger = read_ledger(out / "processed_ledger.jsonl")
+    assert ledger[str(first / "run.xlsx")]["status"] == "ok"
+    skipped = ledger[str(second / "run.xlsx")]
+    assert skipped["status"] == "failed" and "run_CLEAN.csv" in skipped["error"]
@@ -0,0 +1,205 @@
+"""Declarative per-column checks and transforms, run as whole-column operations.
+
+A rule file (JSON, or YAML when PyYAML is installed) maps column names to
+rules:
+
+    {
+      "columns": {
+        "BioSample Name": {"required": true, "pattern": "^[A-Z]{2}\\\\d{6}$", "unique": true},
+        "Sex": {"transforms": ["strip", "upper", {"map": {"MALE": "M", "FEMALE": "F"}}],
+                "allowed": ["M", "F", "U"], "on_invalid": "blank"},
+        "Age": {"min": 0, "max": 120, "severity": "warning"}
+      }
+    }
+
+transforms: strip, upper, lower, collapse_spaces, {"map": {old: new}},
+{"default": value} (fills empty cells). Checks: required, pattern (full
+match), allowed, unique, min / max (numeric), min_length / max_length.
+severity is "error" (default) or "warning"; on_invalid "keep" (default) or
+"blank" to empty the offending cells in the CLEAN CSV. Checks only look at
+non-empty cells, except required.
+
+load_rules() validates and compiles the file once; RuleSet.apply() is what
+run_conversion calls (rules=...).
+"""
+import json
+import os
+import re
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+
+SEVERITIES = ("error", "warning")
+CHECKS = ("required", "pattern", "allowed", "unique", "min", "max", "min_length", "max_length")
+RULE_KEYS = set(CHECKS) | {"transforms", "severity", "on_invalid"}
+
+# one row of the validation report; row is the frame index label
+Violation = namedtuple("Violation", "row sample column rule severity value message")
+
+_STRING_TRANSFORMS = {
+    "strip": lambda s: s.str.strip(),
+    "upper": lambda s: s.str.upper(),
+    "lower": lambda s: s.str.lower(),
+    "collapse_spaces": lambda s: s.str.replace(r"\s+", " ", regex=True),
+}
+
+
+def _as_text(series):
+    # object column of str with NaN for missing cells, whatever the input dtype
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        series = series.astype(object)
+    if pd.api.types.infer_dtype(series, skipna=True) in ("string", "empty"):
+        return series.astype(object)
+    return series.astype(str).astype(object).where(series.notna())
+
+
+def _compile_transform(spec, column):
+    if isinstance(spec, str):
+        if spec not in _STRING_TRANSFORMS:
+            raise ValueError(f"{column}: unknown transform {spec!r}")
+        return _STRING_TRANSFORMS[spec]
+    if isinstance(spec, dict) and len(spec) == 1:
+        (name, arg), = spec.items()
+        if name == "map" and isinstance(arg, dict):
+            mapping = {str(k): str(v) for k, v in arg.items()}
+            return lambda s: s.replace(mapping)
+        if name == "default":
+            return lambda s: s.mask(s.isna() | (s == ""), str(arg))
+    raise ValueError(f"{column}: bad transform {spec!r}")
+
+
+class ColumnRule:
+    """Compiled rules of one column."""
+
+    def __init__(self, column, spec):
+        unknown = set(spec) - RULE_KEYS
+        if unknown:
+            raise ValueError(f"{column}: unknown rule(s) {', '.join(sorted(unknown))}")
+        self.column = column
+        self.severity = spec.get("severity", "error")
+        if self.severity not in SEVERITIES:
+            raise ValueError(f"{column}: severity must be one of {', '.join(SEVERITIES)}")
+        self.blank_invalid = spec.get("on_invalid", "keep") == "blank"
+        if spec.get("on_invalid", "keep") not in ("keep", "blank"):
+            raise ValueError(f"{column}: on_invalid must be 'keep' or 'blank'")
+
+        self.transforms = [_compile_transform(t, column) for t in spec.get("transforms", [])]
+        self.required = bool(spec.get("required", False))
+        self.unique = bool(spec.get("unique", False))
+        try:
+            self.pattern = re.compile(spec["pattern"]) if "pattern" in spec else None
+        except re.error as e:
+            raise ValueError(f"{column}: bad pattern: {e}")
+        self.allowed = ([str(v) for v in spec["allowed"]]
+                        if spec.get("allowed") is not None else None)
+        self.min, self.max = spec.get("min"), spec.get("max")
+        self.min_length, self.max_length = spec.get("min_length"), spec.get("max_length")
+
+    def _checks(self, text, present):
+        """(rule, failing mask, message) for every configured check."""
+        if self.required:
+            yield "required", ~present, "missing value"
+        if self.pattern is not None:
+            matches = text.str.fullmatch(self.pattern).eq(True).to_numpy()
+            yield "pattern", present & ~matches, f"does not match {self.pattern.pattern}"
+        if self.allowed is not None:
+            yield "allowed", present & ~text.isin(self.allowed).to_numpy(), \
+                "not one of " + ", ".join(self.allowed)
+        if self.unique:
+            yield "unique", present & text.duplicated(keep=False).to_numpy(), "duplicate value"
+        if self.min is not None or self.max is not None:
+            numbers = pd.to_numeric(text.where(present), errors="coerce").to_numpy(dtype=float)
+            yield "number", present & np.isnan(numbers), "not a number"
+            if self.min is not None:
+                yield "min", numbers < self.min, f"below {self.min}"
+            if self.max is not None:
+                yield "max", numbers > self.max, f"above {self.max}"
+        if self.min_length is not None or self.max_length is not None:
+            lengths = text.str.len().to_numpy(dtype=float)
+            if self.min_length is not None:
+                yield "min_length", present & (lengths < self.min_length), \
+                    f"shorter than {self.min_length}"
+            if self.max_length is not None:
+                yield "max_length", present & (lengths > self.max_length), \
+                    f"longer than {self.max_length}"
+
+    def apply(self, df, sample_ids=None):
+        """Transform and check df[column] in place; returns the violations."""
+        series = df[self.column]
+        text = _as_text(series)
+        if self.transforms:
+            for transform in self.transforms:
+                text = transform(text)
+            df[self.column] = text
+        present = (text.notna() & (text != "")).to_numpy()
+
+        violations = []
+        invalid = np.zeros(len(text), dtype=bool)
+        for rule, mask, message in self._checks(text, present):
+            rows = np.flatnonzero(mask)
+            if not len(rows):
+                continue
+            invalid[rows] = True
+            labels = df.index[rows].tolist()
+            values = text.iloc[rows].tolist()
+            samples = (sample_ids.iloc[rows].tolist() if sample_ids is not None
+                       else ["unknown"] * len(rows))
+            violations += [Violation(label, sample, self.column, rule, self.severity,
+                                     "" if value is None or value != value else value, message)
+                           for label, sample, value in zip(labels, samples, values)]
+
+        if self.blank_invalid and invalid.any():
+            df[self.column] = text.mask(invalid & present, "")
+        return violations
+
+
+class RuleSet:
+    """All column rules of a rule file; see the module docstring."""
+
+    def __init__(self, schema, source=None):
+        if not isinstance(schema, dict) or not isinstance(schema.get("columns", {}), dict):
+            raise ValueError('rule file must be an object with a "columns" object')
+        self.schema = schema
+        self.source = source
+        self.rules = [ColumnRule(str(column), spec or {})
+                      for column, spec in schema.get("columns", {}).items()]
+
+    def __reduce__(self):
+        # compiled transforms are lambdas: worker processes recompile from the schema
+        return RuleSet, (self.schema, self.source)
+
+    def __len__(self):
+        return len(self.rules)
+
+    def apply(self, df, sample_ids=None):
+        """Run every rule on df (changed in place); returns the violations in rule order.
+
+        A required column missing from df is one violation with row None.
+        """
+        violations = []
+        for rule in self.rules:
+            if rule.column in df.columns:
+                violations += rule.apply(df, sample_ids)
+            elif rule.required:
+                violations.append(Violation(None, "", rule.column, "required", rule.severity,
+                                            "", "column missing"))
+        return violations
+
+
+def load_rules(path):
+    """Read and compile a JSON/YAML rule file; ValueError for a bad schema."""
+    with open(path, "r", encoding="utf-8") as f:
+        if os.path.splitext(path)[1].lower() in (".yaml", ".yml"):
+            try:
+                import yaml
+            except ImportError:
+                raise ImportError("YAML rule files need PyYAML; use JSON or install pyyaml")
+            try:
+                schema = yaml.safe_load(f)
+            except yaml.YAMLError as e:
+                raise ValueError(f"invalid YAML: {e}")
+        else:
+            schema = json.load(f)
+    return RuleSet(schema, source=path)
@@ -0,0 +1,261 @@
+"""Local HTTP/JSON conversion service with the ontology kept in memory.
+
+    python -m tools.conversion_service --port 8765
+
+Endpoints (JSON in, JSON out unless noted):
+
+    GET  /health          {"status": "ok", "terms": n}
+    POST /validate-hpo    {"values": ["HP:0001250, HP:0002279", ...]}
+                          -> {"results": [{"codes": [...], "invalid": [...]}, ...]}
+    POST /normalize       {"rows": [{column: value}, ...], "hpo_column": ...,
+                           "date_columns": [...], "sample_id_column": ...}
+                          -> {"rows": [...], "invalid": [...], "date_warnings": [...]}
+    POST /convert?filename=run.xlsx&header_row=2[&sheet=...][&format=json]
+                          raw workbook/CSV bytes -> the [DATA] CSV (text/csv),
+                          or {"csv": ..., "rows": n, "invalid": [...]} with format=json
+
+Requests are served on threads; every request shares the ontology loaded at
+start (revalidated with one stat call, so an updated hp.obo is picked up).
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+from tools.emedgene_csv_converter_core import (DEFAULT_HPO_PATH, clean_csv_text,
+                                               header_row_default, hpo_column_default,
+                                               normalize_hpo_column, preselected_date_columns,
+                                               read_excel_table, resource_path, run_conversion,
+                                               sample_id_column_default, _report_row)
+from tools.hpo_index import load_hpo_ontology
+from tools.table_readers import INPUT_EXTENSIONS
+
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MAX_BODY_BYTES = 200 * 1024 * 1024
+
+
+class RequestError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _json_value(value):
+    # numpy / pandas scalars and missing values -> plain JSON
+    if value is None or (np.isscalar(value) or value is pd.NA) and pd.isna(value):
+        return None
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    return value
+
+
+def _invalid_json(invalid_records, excel_rows=False):
+    return [{"row": _report_row(label) if excel_rows else _json_value(label),
+             "sample": _json_value(sample), "codes": codes}
+            for label, sample, codes in invalid_records]
+
+
+# ---------------- handlers (plain functions, reused by the benchmark) ----------------
+def validate_hpo(ontology, payload):
+    values = payload.get("values")
+    if not isinstance(values, list):
+        raise RequestError(400, '"values" must be a list of strings')
+
+    series = pd.Series(values, dtype=object)
+    normalized, invalid_records = normalize_hpo_column(series, ontology)
+    invalid = {label: codes for label, _, codes in invalid_records}
+    return {"results": [{"codes": text.split("; ") if text else [],
+                         "invalid": invalid.get(i, [])}
+                        for i, text in enumerate(normalized.tolist())]}
+
+
+def normalize_rows(ontology, payload):
+    rows = payload.get("rows")
+    if not isinstance(rows, list) or not all(isinstance(r, dict) for r in rows):
+        raise RequestError(400, '"rows" must be a list of objects')
+
+    df = pd.DataFrame.from_records(rows)
+    date_cols = payload.get("date_columns")
+    if date_cols is None:
+        date_cols = [c for c in df.columns if c in preselected_date_columns]
+    date_profiles = {}
+    processed, invalid_records = run_conversion(
+        df=df,
+        hpo_colname=payload.get("hpo_column", hpo_column_default),
+        date_cols=date_cols,
+        valid_hpo_codes=ontology,
+        sample_id_col=payload.get("sample_id_column", sample_id_column_default),
+        date_report=date_profiles
+    )
+    return {
+        "rows": [{k: _json_value(v) for k, v in row.items()}
+                 for row in processed.to_dict(orient="records")],
+        "invalid": _invalid_json(invalid_records),
+        "date_warnings": sorted(c for c, p in date_profiles.items() if p.needs_attention),
+    }
+
+
+def convert_upload(ontology, body, query):
+    filename = query.get("filename", "upload.xlsx")
+    suffix = os.path.splitext(filename)[1].lower()
+    if suffix not in INPUT_EXTENSIONS:
+        raise RequestError(415, f"unsupported file type: {suffix or filename}")
+    try:
+        header_row = int(query.get("header_row", header_row_default))
+    except ValueError:
+        raise RequestError(400, "header_row must be an integer")
+
+    fd, tmp_path = tempfile.mkstemp(suffix=suffix)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(body)
+        try:
+            df = read_excel_table(tmp_path, header_row, sheet=query.get("sheet"))
+        except Exception as e:
+            raise RequestError(400, f"could not read {filename}: {e}")
+    finally:
+        os.remove(tmp_path)
+
+    date_cols = query.get("date_columns")
+    date_cols = ([c.strip() for c in date_cols.split(",") if c.strip()] if date_cols is not None
+                 else [c for c in df.columns if c in preselected_date_columns])
+    processed, invalid_records = run_conversion(
+        df=df,
+        hpo_colname=query.get("hpo_column", hpo_column_default),
+        date_cols=date_cols,
+        valid_hpo_codes=ontology,
+        sample_id_col=query.get("sample_id_column", sample_id_column_default)
+    )
+    return clean_csv_text(processed), processed, invalid_records
+
+
+# ---------------- HTTP ----------------
+class ConversionRequestHandler(BaseHTTPRequestHandler):
+    server_version = "G-CLIP/1"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    def _send(self, status, body, content_type="application/json"):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_json(self, status, payload):
+        self._send(status, json.dumps(payload))
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            raise RequestError(413, "request body too large")
+        return self.rfile.read(length)
+
+    def _json_body(self):
+        try:
+            payload = json.loads(self._body() or b"{}")
+        except ValueError:
+            raise RequestError(400, "body is not valid JSON")
+        if not isinstance(payload, dict):
+            raise RequestError(400, "body must be a JSON object")
+        return payload
+
+    def do_GET(self):
+        if urlparse(self.path).path == "/health":
+            ontology = self.server.ontology()
+            self._send_json(200, {"status": "ok", "terms": len(ontology)})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        try:
+            ontology = self.server.ontology()
+            if url.path == "/validate-hpo":
+                self._send_json(200, validate_hpo(ontology, self._json_body()))
+            elif url.path == "/normalize":
+                self._send_json(200, normalize_rows(ontology, self._json_body()))
+            elif url.path == "/convert":
+                text, processed, invalid_records = convert_upload(ontology, self._body(), query)
+                if query.get("format") == "json":
+                    self._send_json(200, {"csv": text, "rows": len(processed),
+                                          "invalid": _invalid_json(invalid_records, True)})
+                else:
+                    self._send(200, text, "text/csv")
+            else:
+                self._body()  # drain, so the connection can be reused
+                self._send_json(404, {"error": "not found"})
+        except RequestError as e:
+            if e.status == 413:
+                self.close_connection = True  # the body was not read
+            self._send_json(e.status, {"error": str(e)})
+        except Exception as e:
+            self._send_json(500, {"error": f"{type(e).__name__}: {e}"})
+
+
+class ConversionServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, hpo_path, quiet=False):
+        self.hpo_path = hpo_path
+        self.quiet = quiet
+        self.ontology()  # load (or build the index) before accepting requests
+        super().__init__(address, ConversionRequestHandler)
+
+    def ontology(self):
+        return load_hpo_ontology(self.hpo_path)
+
+
+def start_server(hpo_path, host=DEFAULT_HOST, port=DEFAULT_PORT, quiet=True):
+    """Serve on a background thread; returns the server (port 0 = any free port)."""
+    server = ConversionServer((host, port), hpo_path, quiet=quiet)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m tools.conversion_service",
+        description="Local HTTP/JSON service for HPO validation and CSV conversion.")
+    parser.add_argument("--host", default=DEFAULT_HOST,
+                        help="Interface to bind (default: %(default)s, local only)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--hpo-file", default=None,
+                        help="hp.obo to validate against (default: assets/hp.obo)")
+    parser.add_argument("--quiet", action="store_true", help="Do not log requests")
+    args = parser.parse_args(argv)
+
+    hpo_path = args.hpo_file or resource_path(DEFAULT_HPO_PATH)
+    if not os.path.exists(hpo_path):
+        print(f"Error: HPO ontology not found: {hpo_path}", file=sys.stderr)
+        return 2
+
+    server = ConversionServer((args.host, args.port), hpo_path, quiet=args.quiet)
+    print(f"Serving on http://{args.host}:{server.server_address[1]}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
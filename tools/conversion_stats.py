@@ -0,0 +1,115 @@
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+from dataclasses import asdict, dataclass, field
+
+
+def peak_memory_mb():
+    """Peak resident memory of this process in MB, or None if unavailable."""
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD),
+                        ("PageFaultCount", wintypes.DWORD),
+                        ("PeakWorkingSetSize", ctypes.c_size_t),
+                        ("WorkingSetSize", ctypes.c_size_t),
+                        ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                        ("PagefileUsage", ctypes.c_size_t),
+                        ("PeakPagefileUsage", ctypes.c_size_t)]
+
+        try:
+            counters = PROCESS_MEMORY_COUNTERS()
+            counters.cb = ctypes.sizeof(counters)
+            handle = ctypes.windll.kernel32.GetCurrentProcess()
+            if ctypes.windll.psapi.GetProcessMemoryInfo(
+                    handle, ctypes.byref(counters), counters.cb):
+                return counters.PeakWorkingSetSize / 1e6
+        except Exception:
+            pass
+        return None
+
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / 1e6 if sys.platform == "darwin" else peak / 1e3
+
+
+@dataclass
+class ConversionStats:
+    """Per-stage timings and counters of one conversion.
+
+    Pass an instance as ``stats=`` to run_conversion / convert_file to fill
+    it; with ``stats=None`` (the default) nothing is measured.
+    """
+    input: str = None
+    rows: int = 0
+    stages: dict = field(default_factory=dict)
+    date_columns: dict = field(default_factory=dict)
+    invalid_rows: int = 0
+    invalid_codes: int = 0
+    rule_violations: int = 0
+    duplicate_samples: int = 0  # rows whose sample ID repeats or was converted before
+    peak_memory_mb: float = None
+    frame_memory: dict = field(default_factory=dict)  # {"before_mb", "after_mb"} of compact_frame
+
+    @contextmanager
+    def stage(self, name):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - t0
+
+    @property
+    def total_seconds(self):
+        return sum(self.stages.values())
+
+    def finish(self):
+        self.peak_memory_mb = peak_memory_mb()
+
+    def to_dict(self):
+        data = asdict(self)
+        data["stages"] = {k: round(v, 4) for k, v in self.stages.items()}
+        data["total_seconds"] = round(self.total_seconds, 4)
+        return data
+
+    def write_json(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2, default=str)
+
+    def summary(self):
+        """Multi-line text for the GUI details dialog and the CLI."""
+        lines = [f"Rows: {self.rows}"]
+        for name, seconds in self.stages.items():
+            lines.append(f"{name:<8} {seconds:8.3f} s")
+        lines.append(f"{'total':<8} {self.total_seconds:8.3f} s")
+        for col, info in self.date_columns.items():
+            lines.append(f"Date column {col}: {info['unique_values']} unique values, "
+                         f"{info['failed_rows']} not converted")
+        lines.append(f"Invalid HPO codes: {self.invalid_codes} in {self.invalid_rows} rows")
+        if self.rule_violations:
+            lines.append(f"Rule violations: {self.rule_violations}")
+        if self.duplicate_samples:
+            lines.append(f"Duplicate sample IDs: {self.duplicate_samples} rows")
+        if self.frame_memory:
+            lines.append(f"Loaded frame: {self.frame_memory['before_mb']:.1f} MB -> "
+                         f"{self.frame_memory['after_mb']:.1f} MB compact")
+        if self.peak_memory_mb is not None:
+            lines.append(f"Peak memory: {self.peak_memory_mb:.1f} MB")
+        return "\n".join(lines)
+
+
+def stage_timer(stats, name):
+    """stats.stage(name), or a no-op context when stats are disabled."""
+    return stats.stage(name) if stats is not None else nullcontext()
@@ -1,25 +1,71 @@
 import tkinter as tk
-from tkinter import filedialog, messagebox
-import pandas as pd
+from tkinter import filedialog, messagebox, ttk
 import os
+import queue
+import threading
 
 # Import processing logic from new core module
-from tools.emedgene_csv_converter_core import run_conversion, load_hpo_list, resource_path, preselected_date_columns, sample_id_column_default
+from tools.emedgene_csv_converter_core import run_conversion, load_hpo_ontology, resource_path, preselected_date_columns, sample_id_column_default, read_excel_table, convert_file, ConversionCancelled, CONVERSION_STAGES, peek_excel, guess_date_columns, convert_sheets, list_sheets
+from tools.column_rules import load_rules
+from tools.conversion_stats import ConversionStats
+from tools.frame_memory import compact_frame, format_memory_report
+from tools.incremental import convert_file_incremental
+from tools.preview_grid import PreviewData, PreviewPane
+from tools.sample_index import SampleIndex
+
+# Loaded excel (set on the UI thread once a background load finishes).
+# Loading only peeks at the header; df_loaded is read in full on Convert.
+loaded_excel_path = None
+loaded_header_row = None
+loaded_sheets = []
+df_loaded = None
+loaded_memory_report = None  # compact_frame report of df_loaded
+
+POLL_MS = 100
+STAGE_LABELS = {
+    "read": "Reading workbook...",
+    "dates": "Normalizing dates...",
+    "hpo": "Validating HPO codes...",
+    "write": "Writing CSV...",
+    "sheets": "Converting sheets...",
+}
+
+
+def warm_up():
+    """Load the HPO index ahead of the first conversion (tool_registry, background)."""
+    hpo_path = resource_path(os.path.join("assets", "hp.obo"))
+    if os.path.exists(hpo_path):
+        load_hpo_ontology(hpo_path)
 
 
 class CSVConverterPage(tk.Frame):
     def __init__(self, parent):
         super().__init__(parent)
 
+        # worker thread -> UI thread messages, drained by _poll_worker
+        self._queue = queue.Queue()
+        self._cancel_event = threading.Event()
+        self._worker = None
+
         tk.Label(self, text="Excel to Emedgene CSV Converter",
                  font=("Arial", 15, "bold")).pack(pady=10)
-        tk.Label(self, text="1) Load Excel, 2) Select date columns, 3) Convert",
+
+        # Convert tab: load, options, convert; Preview tab: input vs. converted grid
+        self.notebook = ttk.Notebook(self)
+        self.notebook.pack(fill="both", expand=True, padx=5)
+        convert_tab = tk.Frame(self.notebook)
+        preview_tab = tk.Frame(self.notebook)
+        self.notebook.add(convert_tab, text="Convert")
+        self.notebook.add(preview_tab, text="Preview")
+
+        tk.Label(convert_tab, text="1) Load Excel, 2) Select date columns, 3) Convert",
                  font=("Arial", 11)).pack(pady=5)
 
-        tk.Button(self, text="Load Excel and Show Column Names",
-                  width=35, command=self.load_excel).pack(pady=5)
+        self.load_button = tk.Button(convert_tab, text="Load Excel and Show Column Names",
+                                     width=35, command=self.load_excel)
+        self.load_button.pack(pady=5)
 
-        options_frame = tk.LabelFrame(self, text="Options", padx=10, pady=10)
+        options_frame = tk.LabelFrame(convert_tab, text="Options", padx=10, pady=10)
         options_frame.pack(fill="x", padx=10, pady=10)
 
         tk.Label(options_frame, text="Header row:").grid(
@@ -43,19 +89,149 @@ class CSVConverterPage(tk.Frame):
         tk.Label(options_frame, text="Select date columns:").grid(
             row=3, column=0, sticky="nw")
         self.date_listbox = tk.Listbox(
-            options_frame, selectmode=tk.MULTIPLE, width=40, height=10)
+            options_frame, selectmode=tk.MULTIPLE, width=40, height=8, exportselection=False)
         self.date_listbox.grid(row=3, column=1, sticky="w")
 
-        tk.Button(self, text="Convert to CLEAN CSV", width=35,
-                  command=self.process_excel).pack(pady=10)
+        tk.Label(options_frame, text="Sheets:").grid(
+            row=4, column=0, sticky="nw")
+        self.sheet_listbox = tk.Listbox(
+            options_frame, selectmode=tk.MULTIPLE, width=40, height=4, exportselection=False)
+        self.sheet_listbox.grid(row=4, column=1, sticky="w")
+        self.merge_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(options_frame, text="Merge selected sheets into one CSV",
+                       variable=self.merge_var).grid(row=5, column=1, sticky="w")
+
+        self.stats_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(options_frame, text="Collect timing stats (_STATS.json)",
+                       variable=self.stats_var).grid(row=6, column=1, sticky="w")
+
+        self.incremental_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(options_frame, text="Incremental: only convert new/changed samples",
+                       variable=self.incremental_var).grid(row=7, column=1, sticky="w")
+        self.delta_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(options_frame, text="Also write _DELTA_CLEAN.csv for upload",
+                       variable=self.delta_var).grid(row=8, column=1, sticky="w")
+
+        tk.Label(options_frame, text="Validation rules:").grid(
+            row=9, column=0, sticky="w")
+        rules_frame = tk.Frame(options_frame)
+        rules_frame.grid(row=9, column=1, sticky="w")
+        tk.Button(rules_frame, text="Choose...", command=self.choose_rules).pack(side="left")
+        self.rules_label = tk.Label(rules_frame, text="none", font=("Arial", 9))
+        self.rules_label.pack(side="left", padx=5)
+        self.rules = None
+
+        self.sample_index_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(options_frame, text="Flag sample IDs converted before (sample index)",
+                       variable=self.sample_index_var).grid(row=10, column=1, sticky="w")
+
+        self.convert_button = tk.Button(convert_tab, text="Convert to CLEAN CSV", width=35,
+                                        command=self.process_excel)
+        self.convert_button.pack(pady=5)
+
+        self.preview_button = tk.Button(preview_tab, text="Preview conversion", width=35,
+                                        command=self.preview_conversion)
+        self.preview_button.pack(pady=5)
+        self.preview_pane = PreviewPane(preview_tab)
+        self.preview_pane.pack(fill="both", expand=True, padx=5, pady=(0, 5))
+
+        # Progress + cancel
+        progress_frame = tk.Frame(self)
+        progress_frame.pack(fill="x", padx=10)
+        self.progress = ttk.Progressbar(progress_frame, mode="determinate", maximum=100)
+        self.progress.pack(side="left", fill="x", expand=True)
+        self.cancel_button = tk.Button(progress_frame, text="Cancel", state="disabled",
+                                       command=self.cancel)
+        self.cancel_button.pack(side="left", padx=(5, 0))
+        self.status_label = tk.Label(self, text="", font=("Arial", 9))
+        self.status_label.pack()
+        self.details_button = tk.Button(self, text="Details...", state="disabled",
+                                        command=self.show_details)
+        self.details_button.pack(pady=(0, 5))
+        self._last_details = None
+
+    # -------- background worker --------
+    def _run_in_background(self, task, on_success):
+        """Run task(progress, cancel_event) on a worker thread.
+
+        The worker only posts messages to self._queue; every widget update
+        happens on the Tk thread in _poll_worker.
+        """
+        self._cancel_event.clear()
+        self._set_busy(True)
+
+        def progress(stage, fraction=0.0):
+            self._queue.put(("progress", stage, fraction))
+
+        def work():
+            try:
+                result = task(progress, self._cancel_event)
+                self._queue.put(("done", on_success, result))
+            except ConversionCancelled:
+                self._queue.put(("cancelled",))
+            except Exception as e:
+                self._queue.put(("error", e))
+
+        self._worker = threading.Thread(target=work, daemon=True)
+        self._worker.start()
+        self.after(POLL_MS, self._poll_worker)
+
+    def _poll_worker(self):
+        try:
+            while True:
+                message = self._queue.get_nowait()
+                kind = message[0]
+                if kind == "progress":
+                    self._show_progress(message[1], message[2])
+                    continue
+
+                self._set_busy(False)
+                if kind == "done":
+                    message[1](message[2])
+                elif kind == "cancelled":
+                    self.status_label.config(text="Cancelled.")
+                else:
+                    self.status_label.config(text="")
+                    messagebox.showerror("Error", f"{message[1]}")
+                return
+        except queue.Empty:
+            pass
+        self.after(POLL_MS, self._poll_worker)
+
+    def _show_progress(self, stage, fraction):
+        if stage not in CONVERSION_STAGES and stage != "sheets":
+            return
+        if stage == "sheets":
+            self.progress["value"] = 100 * fraction
+            self.status_label.config(text=STAGE_LABELS[stage])
+            return
+        step = 100 / len(CONVERSION_STAGES)
+        self.progress["value"] = step * (CONVERSION_STAGES.index(stage) + fraction)
+        self.status_label.config(text=STAGE_LABELS.get(stage, stage))
+
+    def _set_busy(self, busy):
+        state = "disabled" if busy else "normal"
+        self.load_button.config(state=state)
+        self.convert_button.config(state=state)
+        self.preview_button.config(state=state)
+        self.cancel_button.config(state="normal" if busy else "disabled")
+        if busy:
+            self.progress["value"] = 0
+        else:
+            self._worker = None
+
+    def cancel(self):
+        if self._worker is not None:
+            self._cancel_event.set()
+            self.status_label.config(text="Cancelling...")
 
     # -------- load_excel --------
     def load_excel(self):
-        global loaded_excel_path, df_loaded
-
         excel_path = filedialog.askopenfilename(
             title="Select patient Excel file",
-            filetypes=[("Excel files", "*.xlsx *.xls")]
+            filetypes=[("Patient tables", "*.xlsx *.xlsm *.xls *.csv *.tsv *.parquet"),
+                       ("Excel files", "*.xlsx *.xlsm *.xls"),
+                       ("LIMS exports", "*.csv *.tsv *.parquet")]
         )
         if not excel_path:
             return
@@ -66,41 +242,100 @@ class CSVConverterPage(tk.Frame):
                 "Error", "Header row must be a positive integer.")
             return
 
-        header_row = int(header_row_txt) - 1
-
+        header_row = int(header_row_txt)
+
+        def task(progress, cancel_event):
+            progress("read")
+            try:
+                # every sheet's header + sample rows, for the column list
+                sheets = list_sheets(excel_path)
+                samples = [peek_excel(excel_path, header_row, sheet=sheet)
+                           for sheet in (sheets or [None])]
+                return excel_path, header_row, sheets, samples
+            except Exception as e:
+                raise RuntimeError(f"Could not read Excel:\n{e}")
+
+        self._run_in_background(task, self._on_excel_peeked)
+
+    def _on_excel_peeked(self, result):
+        global loaded_excel_path, loaded_header_row, loaded_sheets, df_loaded, loaded_memory_report
+
+        loaded_excel_path, loaded_header_row, loaded_sheets, samples = result
+        df_loaded, loaded_memory_report = None, None  # full read happens lazily on Convert
+
+        self.sheet_listbox.delete(0, tk.END)
+        for sheet in loaded_sheets:
+            self.sheet_listbox.insert(tk.END, sheet)
+        if loaded_sheets:
+            self.sheet_listbox.selection_set(0)
+
+        # Columns of all sheets; date columns apply to each sheet that has them
+        columns, guessed = [], set()
+        for sample in samples:
+            columns += [c for c in sample.columns if c not in columns]
+            guessed.update(guess_date_columns(sample))
+
+        self.date_listbox.delete(0, tk.END)
+        for col in columns:
+            self.date_listbox.insert(tk.END, col)
+
+        # Preselect default columns, plus columns whose sample rows look like dates
+        for i, col in enumerate(columns):
+            if col.strip() in preselected_date_columns or col in guessed:
+                self.date_listbox.selection_set(i)
+
+        self.progress["value"] = 0
+        self.status_label.config(text=os.path.basename(loaded_excel_path))
+        messagebox.showinfo(
+            "Excel Loaded", "Columns loaded. Select date columns and then convert.")
+
+    def choose_rules(self):
+        """Pick a JSON/YAML column rule file; cancelling the dialog clears it."""
+        path = filedialog.askopenfilename(
+            title="Select column rule file",
+            filetypes=[("Rule files", "*.json *.yaml *.yml")])
+        if not path:
+            self.rules = None
+            self.rules_label.config(text="none")
+            return
         try:
-            df = pd.read_excel(excel_path, header=header_row)
-            df.columns = df.columns.astype(str).str.strip()
-
-            loaded_excel_path = excel_path
-            df_loaded = df
-
-            self.date_listbox.delete(0, tk.END)
-            for col in df.columns:
-                self.date_listbox.insert(tk.END, col)
-
-            # Preselect default columns
-            for i, col in enumerate(df.columns):
-                if col.strip() in preselected_date_columns:
-                    self.date_listbox.selection_set(i)
-
-            messagebox.showinfo(
-                "Excel Loaded", "Columns loaded. Select date columns and then convert.")
+            self.rules = load_rules(path)
         except Exception as e:
-            messagebox.showerror("Error", f"Could not read Excel:\n{e}")
-
-    # -------- process_excel --------
-    def process_excel(self):
-        global loaded_excel_path, df_loaded
-
-        if not loaded_excel_path or df_loaded is None:
-            messagebox.showerror("Error", "Load an Excel file first.")
+            self.rules = None
+            self.rules_label.config(text="none")
+            messagebox.showerror("Error", f"Could not load rules:\n{e}")
             return
+        self.rules_label.config(text=f"{os.path.basename(path)} ({len(self.rules)} columns)")
+
+    # -------- full read (shared by convert and preview) --------
+    @staticmethod
+    def _read_full(input_path, header_row, sheet, stats=None):
+        """The whole sheet, downcast by compact_frame; returns (frame, memory report)."""
+        if stats is not None:
+            with stats.stage("read"):
+                frame, report = compact_frame(read_excel_table(input_path, header_row, sheet=sheet))
+            stats.frame_memory = {k: report[k] for k in ("before_mb", "after_mb")}
+        else:
+            frame, report = compact_frame(read_excel_table(input_path, header_row, sheet=sheet))
+        return frame, report
+
+    def _keep_loaded(self, input_path, frame, report):
+        global df_loaded, loaded_memory_report
+        if input_path == loaded_excel_path and frame is not None:
+            # keep the full frame (first sheet) for further conversions of the same file
+            df_loaded, loaded_memory_report = frame, report
+
+    # -------- options shared by convert and preview --------
+    def _conversion_options(self):
+        """(hpo_path, hpo_colname, sample_id_col, date_cols, sheets), or None after an error."""
+        if not loaded_excel_path:
+            messagebox.showerror("Error", "Load an Excel file first.")
+            return None
 
         hpo_colname = self.hpo_entry.get().strip()
         if not hpo_colname:
             messagebox.showerror("Error", "HPO column name cannot be empty.")
-            return
+            return None
 
         sample_id_col = self.sampleid_entry.get().strip() or sample_id_column_default
 
@@ -108,54 +343,243 @@ class CSVConverterPage(tk.Frame):
         hpo_path = resource_path(os.path.join("assets", "hp.obo"))
         if not os.path.exists(hpo_path):
             messagebox.showerror("Error", "hp.obo missing in assets folder.")
-            return
-
-        valid_hpo_codes = load_hpo_list(hpo_path)
+            return None
 
         # Selected date columns
         selected_indices = self.date_listbox.curselection()
         selected_date_cols = [self.date_listbox.get(
             i) for i in selected_indices]
 
-        # ✅ Use new core logic
-        processed_df, invalid_records = run_conversion(
-            df=df_loaded,
-            hpo_colname=hpo_colname,
-            date_cols=selected_date_cols,
-            valid_hpo_codes=valid_hpo_codes,
-            sample_id_col=sample_id_col
-        )
+        selected_sheets = [self.sheet_listbox.get(i) for i in self.sheet_listbox.curselection()]
+        if loaded_sheets and not selected_sheets:
+            messagebox.showerror("Error", "Select at least one sheet.")
+            return None
 
-        # ✅ Insert the fixed first row: ["DATA", "", "", ...]
-        padding_row = ["[DATA]"] + [""] * (len(processed_df.columns) - 1)
-
-        # Output folder
-        input_folder = os.path.dirname(loaded_excel_path)
-        # result_folder = os.path.join(input_folder, "result")
-        result_folder = input_folder  # Save in same folder as input
-        os.makedirs(result_folder, exist_ok=True)
-
-        base_name = os.path.splitext(os.path.basename(loaded_excel_path))[0]
-        out_csv = os.path.join(result_folder, base_name + "_CLEAN.csv")
-
-        with open(out_csv, "w", encoding="utf-8") as f:
-            f.write(",".join(padding_row) + "\n")
-            processed_df.to_csv(
-                f, index=False, encoding="utf-8", lineterminator="\n", date_format='%Y%m%d')
-
-        # Report HPO errors if found
-        if invalid_records:
-            report_path = os.path.join(
-                result_folder, base_name + "_HPO_ERROR_REPORT.txt")
-            with open(report_path, "w", encoding="utf-8") as rep:
-                rep.write("Invalid or missing HPO codes:\n\n")
-                for row, sample, bad_codes in invalid_records:
-                    rep.write(
-                        f"Row {row+2} | Sample: {sample} | Invalid: {', '.join(bad_codes)}\n")
+        return hpo_path, hpo_colname, sample_id_col, selected_date_cols, selected_sheets
 
+    # -------- process_excel --------
+    def process_excel(self):
+        options = self._conversion_options()
+        if options is None:
+            return
+        hpo_path, hpo_colname, sample_id_col, selected_date_cols, selected_sheets = options
+
+        input_path, header_row, df = loaded_excel_path, loaded_header_row, df_loaded
+        memory_report = loaded_memory_report
+        rules = self.rules
+        sample_index = SampleIndex() if self.sample_index_var.get() else None
+        if (rules is not None or sample_index is not None) and (
+                self.incremental_var.get() or (len(selected_sheets) > 1 and self.merge_var.get())):
+            messagebox.showerror("Error", "Validation rules and the sample index cannot be "
+                                          "combined with incremental mode or merged sheets.")
+            return
+        checks = {}
+        if rules is not None:
+            checks["rules"] = rules
+        if sample_index is not None:
+            checks["sample_index"] = sample_index
+        if len(selected_sheets) > 1:
+            merge = self.merge_var.get()
+            with_stats = self.stats_var.get()
+            if merge and with_stats:
+                messagebox.showerror("Error", "Timing stats are written per sheet and cannot be "
+                                              "combined with merged sheets.")
+                return
+
+            def sheets_task(progress, cancel_event):
+                results = convert_sheets(
+                    input_path,
+                    load_hpo_ontology(hpo_path),
+                    sheets=selected_sheets,
+                    merge=merge,
+                    progress=progress,
+                    cancel_event=cancel_event,
+                    header_row=header_row,
+                    hpo_colname=hpo_colname,
+                    sample_id_col=sample_id_col,
+                    date_cols=selected_date_cols,
+                    with_stats=with_stats,
+                    **checks
+                )
+                return results if not merge else {"merged": results}
+
+            self._run_in_background(sheets_task, self._on_sheets_converted)
+            return
+
+        # a single sheet other than the first gets <name>_<sheet>_CLEAN.csv
+        sheet = None
+        if selected_sheets and selected_sheets[0] != loaded_sheets[0]:
+            sheet, df = selected_sheets[0], None
+        stats = ConversionStats(input=input_path) if self.stats_var.get() else None
+        incremental, delta = self.incremental_var.get(), self.delta_var.get()
+
+        def task(progress, cancel_event):
+            progress("read")
+            frame, report = df, memory_report
+            if frame is None:
+                frame, report = self._read_full(input_path, header_row, sheet, stats)
+                if cancel_event.is_set():
+                    raise ConversionCancelled()
+            elif stats is not None and report is not None:
+                stats.frame_memory = {k: report[k] for k in ("before_mb", "after_mb")}
+
+            # ontology remaps alt_ids and obsolete terms instead of dropping them
+            valid_hpo_codes = load_hpo_ontology(hpo_path)
+
+            if incremental:
+                result = convert_file_incremental(
+                    input_path,
+                    valid_hpo_codes,
+                    hpo_colname=hpo_colname,
+                    sample_id_col=sample_id_col,
+                    date_cols=selected_date_cols,
+                    delta=delta,
+                    df=frame,
+                    sheet=sheet,
+                    progress=progress,
+                    cancel_event=cancel_event
+                )
+                return input_path, frame if sheet is None else None, result, None, report
+
+            # ✅ Use new core logic; output goes next to the input
+            result = convert_file(
+                input_path,
+                valid_hpo_codes,
+                hpo_colname=hpo_colname,
+                sample_id_col=sample_id_col,
+                date_cols=selected_date_cols,
+                df=frame,
+                progress=progress,
+                cancel_event=cancel_event,
+                stats=stats,
+                sheet=sheet,
+                **checks
+            )
+            return input_path, frame if sheet is None else None, result, stats, report
+
+        self._run_in_background(task, self._on_converted)
+
+    def _on_converted(self, outcome):
+        input_path, frame, result, stats, report = outcome
+        self._keep_loaded(input_path, frame, report)
+        self._set_details(stats, report)
+
+        out_csv = result["csv"]
+        self.progress["value"] = 100
+        self.status_label.config(text="Done.")
+        if "reused_rows" in result:
+            out_csv += (f"\n({result['converted_rows']} rows converted, "
+                        f"{result['reused_rows']} reused from the previous run)")
+            if result["delta"]:
+                out_csv += f"\nNew/changed samples: {result['delta']}"
+
+        warnings = []
+        if result.get("validation_report"):
+            warnings.append(f"{result['violations']} validation issue(s) found. Report:\n"
+                            f"{result['validation_report']}")
+        if result["hpo_report"]:
+            warnings.append(f"Invalid HPO codes found. Report:\n{result['hpo_report']}")
+        if result["date_report"]:
+            warnings.append(
+                f"Ambiguous or inconsistent dates found. Report:\n{result['date_report']}")
+
+        if warnings:
             messagebox.showwarning(
                 "Completed with warnings",
-                f"CSV created: {out_csv}\n\nInvalid HPO codes found. Report:\n{report_path}"
+                f"CSV created: {out_csv}\n\n" + "\n\n".join(warnings)
             )
         else:
             messagebox.showinfo("Success", f"CSV created:\n{out_csv}")
+
+    def _on_sheets_converted(self, results):
+        self.progress["value"] = 100
+        self.status_label.config(text="Done.")
+
+        lines, failed, reports = [], 0, 0
+        for sheet, result in results.items():
+            if isinstance(result, Exception):
+                failed += 1
+                lines.append(f"{sheet}: FAILED ({result})")
+                continue
+            lines.append(f"{sheet}: {result['csv']} ({result['rows']} rows)")
+            reports += (bool(result["hpo_report"]) + bool(result["date_report"])
+                        + bool(result.get("validation_report")))
+        if reports:
+            lines.append(f"\n{reports} HPO/date/validation report(s) written next to the "
+                         f"CSV files.")
+
+        if failed:
+            messagebox.showerror("Completed with errors", "\n".join(lines))
+        elif reports:
+            messagebox.showwarning("Completed with warnings", "\n".join(lines))
+        else:
+            messagebox.showinfo("Success", "\n".join(lines))
+
+    # -------- preview --------
+    def preview_conversion(self):
+        """Convert in memory (nothing is written) and show both sides in the grid."""
+        options = self._conversion_options()
+        if options is None:
+            return
+        hpo_path, hpo_colname, sample_id_col, selected_date_cols, selected_sheets = options
+
+        input_path, header_row, df = loaded_excel_path, loaded_header_row, df_loaded
+        memory_report = loaded_memory_report
+        rules = self.rules
+        # the first selected sheet is previewed
+        sheet = None
+        if selected_sheets and selected_sheets[0] != loaded_sheets[0]:
+            sheet, df = selected_sheets[0], None
+
+        def task(progress, cancel_event):
+            progress("read")
+            frame, report = df, memory_report
+            if frame is None:
+                frame, report = self._read_full(input_path, header_row, sheet)
+                if cancel_event.is_set():
+                    raise ConversionCancelled()
+            ontology = load_hpo_ontology(hpo_path)
+            violations = [] if rules is not None else None
+            processed, invalid_records = run_conversion(
+                frame,
+                hpo_colname,
+                selected_date_cols,
+                ontology,
+                sample_id_col,
+                progress=progress,
+                cancel_event=cancel_event,
+                rules=rules,
+                violations=violations
+            )
+            data = PreviewData(frame, processed, invalid_records, selected_date_cols, hpo_colname,
+                               ontology=ontology, violations=violations)
+            data.column_widths()  # formats the first page here rather than on the Tk thread
+            return input_path, frame if sheet is None else None, data, report
+
+        self._run_in_background(task, self._on_preview_ready)
+
+    def _on_preview_ready(self, outcome):
+        input_path, frame, data, report = outcome
+        self._keep_loaded(input_path, frame, report)
+        self._set_details(None, report)
+        self.progress["value"] = 100
+        self.status_label.config(text="Preview ready (nothing written).")
+        self.preview_pane.set_data(data)
+
+    def _set_details(self, stats, report):
+        parts = [stats.summary()] if stats is not None else []
+        if report is not None:
+            parts.append(format_memory_report(report))
+        self._last_details = "\n\n".join(parts) or None
+        self.details_button.config(state="normal" if parts else "disabled")
+
+    def show_details(self):
+        if self._last_details is None:
+            return
+        dialog = tk.Toplevel(self)
+        dialog.title("Conversion details")
+        text = tk.Text(dialog, width=70, height=16, font=("Courier", 10))
+        text.insert("1.0", self._last_details)
+        text.config(state="disabled")
+        text.pack(fill="both", expand=True, padx=10, pady=10)
+        tk.Button(dialog, text="Close", command=dialog.destroy).pack(pady=(0, 10))
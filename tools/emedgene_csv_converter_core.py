@@ -1,9 +1,25 @@
+import argparse
+import glob
+import io
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field, replace
 from datetime import datetime
+from functools import partial
+import numpy as np
 import pandas as pd
 import re
 import os
 import sys
 
+from tools.column_rules import Violation, load_rules
+from tools.conversion_stats import ConversionStats, stage_timer
+from tools.hpo_index import HPOOntology, load_hpo_codes, load_hpo_ontology
+from tools.sample_index import DEFAULT_INDEX_PATH, SampleIndex, content_key
+from tools.table_readers import (DELIMITERS, INPUT_EXTENSIONS, READERS, list_sheets, read_delimited,
+                                 read_table)
+
 
 def resource_path(relative_path):
     try:
@@ -13,23 +29,42 @@ def resource_path(relative_path):
     return os.path.join(base_path, relative_path)
 
 
+DEFAULT_HPO_PATH = os.path.join("assets", "hp.obo")
+hpo_column_default = "Phenotypes Id"
+header_row_default = 2
+
 preselected_date_columns = ["Date Of Birth",
                             "Due Date", "DataRichiesta", "DataRicezioneCampione"]
 sample_id_column_default = "BioSample Name"
 
+# Stages reported to progress callbacks, in order
+CONVERSION_STAGES = ("read", "dates", "hpo", "write")
+
 # Globals like before (loaded excel)
 loaded_excel_path = None
 df_loaded = None
 
 
+class ConversionCancelled(Exception):
+    """Raised when a conversion is stopped through its cancel event."""
+
+
+def _report_progress(progress, stage, fraction=0.0):
+    if progress is not None:
+        progress(stage, fraction)
+
+
+def _check_cancelled(cancel_event):
+    if cancel_event is not None and cancel_event.is_set():
+        raise ConversionCancelled()
+
+
 def load_hpo_list(hpo_file):
     valid_hpo = set()
 
     if hpo_file.endswith(".obo"):
-        with open(hpo_file, "r", encoding="utf-8") as f:
-            for line in f:
-                if line.startswith("id: HP:"):
-                    valid_hpo.add(line.split("id: ")[1].strip())
+        # compiled index, cached in memory and next to hp.obo
+        valid_hpo.update(load_hpo_codes(hpo_file))
     else:
         df = pd.read_csv(hpo_file, sep=None, engine="python", header=None)
         for col in df.columns:
@@ -41,10 +76,161 @@ def load_hpo_list(hpo_file):
     return valid_hpo
 
 
+def hpo_resolver(valid_hpo_codes):
+    """Return code -> canonical code (or None if invalid).
+
+    valid_hpo_codes is either a plain set of ids or an HPOOntology, in which
+    case alt_ids and obsolete terms are remapped instead of rejected.
+    """
+    if isinstance(valid_hpo_codes, HPOOntology):
+        return valid_hpo_codes.canonicalize
+    return lambda code: code if code in valid_hpo_codes else None
+
+
+HPO_CODE_PATTERN = r"HP:\d+"
+
+
 def normalize_hpo_field(entry: str) -> list:
     if not isinstance(entry, str):
         entry = "" if pd.isna(entry) else str(entry)
-    return re.findall(r"HP:\d+", entry)
+    return re.findall(HPO_CODE_PATTERN, entry)
+
+
+def _group_by_position(exploded: pd.Series):
+    """Split an exploded, position-sorted series into per-row lists.
+
+    Equivalent to groupby(level=0).agg(list) but with numpy run boundaries,
+    which is an order of magnitude faster on millions of codes.
+    """
+    pos = exploded.index.to_numpy()
+    if len(pos) == 0:
+        return pos, []
+    starts = np.flatnonzero(np.r_[True, pos[1:] != pos[:-1]])
+    ends = np.r_[starts[1:], len(pos)]
+    values = exploded.tolist()
+    return pos[starts], [values[a:b] for a, b in zip(starts.tolist(), ends.tolist())]
+
+
+def _merge_remapped(raw_codes, canonical_codes):
+    """canonical_codes without the repeats that remapping introduced."""
+    seen = {}  # canonical code -> an occurrence of it was remapped
+    result = []
+    for raw, code in zip(raw_codes, canonical_codes):
+        was_remapped = raw != code
+        if code in seen and (was_remapped or seen[code]):
+            seen[code] = True
+            continue
+        seen[code] = seen.get(code, False) or was_remapped
+        result.append(code)
+    return result
+
+
+def normalize_hpo_column(series: pd.Series, valid_hpo_codes, sample_ids: pd.Series = None):
+    """Batched normalize_hpo_field + validation for a whole column.
+
+    findall -> explode -> resolve the distinct codes once -> join per row.
+    A code that only repeats in a row because of remapping (an alt_id next to
+    its primary term, an obsolete term next to its replacement) is kept once,
+    where it first appears; codes typed twice are left as they are. Returns
+    the "; "-joined valid codes and the invalid records as
+    (index label, sample, [invalid codes]) in row order.
+    """
+    n = len(series)
+    # categorical columns (see tools.frame_memory) cannot be filled with ""
+    values = series.astype(object) if isinstance(series.dtype, pd.CategoricalDtype) else series
+    raw = values.fillna("").astype(str)
+
+    # positional index, so duplicate or non-range labels cannot mix rows up
+    found = pd.Series(raw.str.findall(HPO_CODE_PATTERN).to_numpy(), index=pd.RangeIndex(n))
+    codes = found.explode().dropna()
+
+    resolve = hpo_resolver(valid_hpo_codes)
+    mapping = {c: resolve(c) for c in codes.unique()}
+    resolved = codes.map(mapping)
+    valid = resolved.notna()
+
+    normalized = np.full(n, "", dtype=object)
+    rows, groups = _group_by_position(resolved[valid])
+    normalized[rows] = ["; ".join(g) for g in groups]
+
+    remapped = valid & (resolved != codes)
+    if remapped.any():
+        # only rows holding a remapped code can have merged duplicates
+        touched = np.unique(codes.index[remapped.to_numpy()])
+        keep = valid & codes.index.isin(touched)
+        rows, resolved_groups = _group_by_position(resolved[keep])
+        _, raw_groups = _group_by_position(codes[keep])
+        normalized[rows] = ["; ".join(_merge_remapped(raw, canon))
+                            for raw, canon in zip(raw_groups, resolved_groups)]
+
+    invalid_records = []
+    if not valid.all():
+        rows, groups = _group_by_position(codes[~valid])
+        labels = series.index[rows].tolist()
+        if sample_ids is not None:
+            samples = sample_ids.iloc[rows].tolist()
+        else:
+            samples = ["unknown"] * len(rows)
+        invalid_records = list(zip(labels, samples, groups))
+
+    return pd.Series(normalized, index=series.index, name=series.name), invalid_records
+
+
+DATE_FALLBACK_FORMATS = [
+    "%Y-%m-%d",
+    "%m-%d-%Y",
+    "%d-%m-%Y",
+    "%m/%d/%Y",
+    "%d/%m/%Y"
+]
+
+# Formats tried as whole-column passes by normalize_date_series. The order
+# reproduces what try_parse_date returns for strings of these shapes
+# (pd.to_datetime with dayfirst=False reads month first and only swaps when the
+# month is out of range); anything else goes through try_parse_date itself.
+VECTORIZED_DATE_FORMATS = [
+    "%Y-%m-%d",
+    "%Y-%m-%d %H:%M:%S",
+    "%m/%d/%Y",
+    "%m-%d-%Y",
+    "%d/%m/%Y",
+    "%d-%m-%Y"
+]
+
+# Same cascade for columns sniffed as day-first (e.g. Italian-sourced sheets)
+VECTORIZED_DATE_FORMATS_DAYFIRST = [
+    "%Y-%m-%d",
+    "%Y-%m-%d %H:%M:%S",
+    "%d/%m/%Y",
+    "%d-%m-%Y",
+    "%m/%d/%Y",
+    "%m-%d-%Y"
+]
+
+DATE_SNIFF_SAMPLE = 2000
+
+_ISO_DATE_RE = re.compile(r"^\d{4}-\d{1,2}-\d{1,2}$")
+_ISO_DATETIME_RE = re.compile(r"^\d{4}-\d{1,2}-\d{1,2} \d{1,2}:\d{2}:\d{2}$")
+_PAIR_DATE_RE = re.compile(r"^(\d{1,2})([/-])(\d{1,2})\2\d{4}$")
+
+
+@dataclass
+class DateColumnProfile:
+    """Result of sniffing one date column (see infer_date_format)."""
+    column: str
+    date_format: str = None
+    dayfirst: bool = False
+    ambiguous: bool = False
+    conflicting: bool = False
+    sampled: int = 0
+    unique_values: int = 0
+    nonconforming_rows: list = field(default_factory=list)
+    failed_rows: list = field(default_factory=list)
+
+    @property
+    def needs_attention(self):
+        return bool(self.ambiguous or self.conflicting
+                    or self.nonconforming_rows or self.failed_rows)
 
 
 def try_parse_date(value):
@@ -57,15 +243,7 @@ def try_parse_date(value):
         return dt.strftime("%Y-%m-%d")
 
     # Manual fallback formats
-    formats = [
-        "%Y-%m-%d",
-        "%m-%d-%Y",
-        "%d-%m-%Y",
-        "%m/%d/%Y",
-        "%d/%m/%Y"
-    ]
-
-    for f in formats:
+    for f in DATE_FALLBACK_FORMATS:
         try:
             return datetime.strptime(str(value), f).strftime("%Y-%m-%d")
         except Exception:
@@ -74,37 +252,250 @@ def try_parse_date(value):
     return "WRONG_DATE_CONVERSION"
 
 
-def force_dates_iso(df: pd.DataFrame, cols: list):
+def infer_date_format(values: list, column=None, sample_size=DATE_SNIFF_SAMPLE) -> DateColumnProfile:
+    """Infer the dominant text format of a date column from its distinct values.
+
+    Day-first is chosen when more values have a first field > 12 than a second
+    field > 12. A column whose d/m values are all <= 12 is flagged ambiguous
+    (month-first is kept, as try_parse_date does) and a column with evidence
+    for both orders is flagged conflicting.
+    """
+    texts = [v.strip() for v in values if isinstance(v, str) and v.strip()]
+    if len(texts) > sample_size:
+        step = len(texts) / sample_size
+        texts = [texts[int(i * step)] for i in range(sample_size)]
+
+    shapes = Counter()
+    first_gt12 = second_gt12 = pairs = 0
+    for text in texts:
+        if _ISO_DATE_RE.match(text):
+            shapes["iso"] += 1
+            continue
+        if _ISO_DATETIME_RE.match(text):
+            shapes["iso_time"] += 1
+            continue
+        m = _PAIR_DATE_RE.match(text)
+        if m:
+            first, sep, second = int(m.group(1)), m.group(2), int(m.group(3))
+            shapes[sep] += 1
+            pairs += 1
+            if first > 12 and second <= 12:
+                first_gt12 += 1
+            elif second > 12 and first <= 12:
+                second_gt12 += 1
+
+    profile = DateColumnProfile(column=column, sampled=len(texts))
+    profile.dayfirst = first_gt12 > second_gt12
+    profile.conflicting = first_gt12 > 0 and second_gt12 > 0
+    profile.ambiguous = pairs > 0 and first_gt12 == 0 and second_gt12 == 0
+
+    if shapes:
+        shape = shapes.most_common(1)[0][0]
+        if shape == "iso":
+            profile.date_format = "%Y-%m-%d"
+        elif shape == "iso_time":
+            profile.date_format = "%Y-%m-%d %H:%M:%S"
+        elif profile.dayfirst:
+            profile.date_format = f"%d{shape}%m{shape}%Y"
+        else:
+            profile.date_format = f"%m{shape}%d{shape}%Y"
+
+    return profile
+
+
+def _parse_unique_dates(values: list, formats=VECTORIZED_DATE_FORMATS):
+    """Normalize distinct raw values, one vectorized pass per format.
+
+    Returns the normalized strings and, for each value, the format that parsed
+    it ("datetime" for real date cells, None for the per-value fallback).
+    """
+    out = [None] * len(values)
+    matched = [None] * len(values)
+    str_pos, dt_pos = [], []
+    for i, v in enumerate(values):
+        if isinstance(v, str):
+            if v == "":
+                out[i] = ""
+            else:
+                str_pos.append(i)
+        elif isinstance(v, (datetime, pd.Timestamp, np.datetime64)):
+            dt_pos.append(i)
+
+    # datetime cells (what read_excel returns for real Excel dates)
+    if dt_pos:
+        try:
+            parsed = pd.to_datetime(pd.Series([values[i] for i in dt_pos], dtype=object),
+                                    errors="coerce")
+            formatted = parsed.dt.strftime("%Y-%m-%d")
+            for i, ok, text in zip(dt_pos, parsed.notna(), formatted):
+                if ok:
+                    out[i] = text
+                    matched[i] = "datetime"
+        except (TypeError, ValueError):
+            pass  # e.g. mixed time zones: leave them to try_parse_date
+
+    # text cells: format cascade on whatever is still unparsed
+    if str_pos:
+        pending = pd.Series([values[i] for i in str_pos], index=str_pos, dtype=object)
+        for fmt in formats:
+            if pending.empty:
+                break
+            parsed = pd.to_datetime(pending, format=fmt, errors="coerce")
+            ok = parsed.notna()
+            if ok.any():
+                for i, text in parsed[ok].dt.strftime("%Y-%m-%d").items():
+                    out[i] = text
+                    matched[i] = fmt
+                pending = pending[~ok]
+
+    # anything left keeps the exact per-value semantics
+    for i, v in enumerate(values):
+        if out[i] is None:
+            out[i] = try_parse_date(v)
+
+    return out, matched
+
+
+def normalize_date_series(series: pd.Series) -> pd.Series:
+    """Vectorized equivalent of series.apply(try_parse_date).
+
+    Only distinct raw values are parsed; the results are mapped back through
+    the factorized codes.
+    """
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    parsed, _ = _parse_unique_dates(list(uniques))
+    # code -1 (missing values) picks the trailing ""
+    lookup = np.array(parsed + [""], dtype=object)
+    return pd.Series(lookup[codes], index=series.index, name=series.name, dtype=object)
+
+
+def normalize_date_column(series: pd.Series, profile: DateColumnProfile = None):
+    """Sniff (unless a profile is given) and normalize one date column.
+
+    The inferred format is tried first on all values, then the cascade in the
+    column's day/month order. Returns (normalized series, profile) with the
+    rows that did not fit the format or could not be parsed.
+    """
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    uniques = list(uniques)
+    if profile is None:
+        profile = infer_date_format(uniques, column=series.name)
+
+    formats = VECTORIZED_DATE_FORMATS_DAYFIRST if profile.dayfirst else VECTORIZED_DATE_FORMATS
+    if profile.date_format:
+        formats = [profile.date_format] + [f for f in formats if f != profile.date_format]
+
+    profile.unique_values = len(uniques)
+    parsed, matched = _parse_unique_dates(uniques, formats)
+    lookup = np.array(parsed + [""], dtype=object)
+    result = pd.Series(lookup[codes], index=series.index, name=series.name, dtype=object)
+
+    off_format = np.array([m not in (profile.date_format, "datetime") and p != ""
+                           for m, p in zip(matched, parsed)] + [False])
+    failed = np.array([p == "WRONG_DATE_CONVERSION" for p in parsed] + [False])
+    profile.nonconforming_rows = series.index[off_format[codes] & ~failed[codes]].tolist()
+    profile.failed_rows = series.index[failed[codes]].tolist()
+
+    return result, profile
+
+
+def force_dates_iso(df: pd.DataFrame, cols: list, infer_formats=True, known_formats=None):
+    """Normalize date columns in place; returns {column: DateColumnProfile}.
+
+    known_formats ({column: DateColumnProfile}) skips sniffing for those
+    columns and reuses their format, e.g. for the later chunks of a stream.
+    """
+    profiles = {}
+    known_formats = known_formats or {}
     for col in cols:
         if col not in df.columns:
             continue
 
-        df[col] = df[col].apply(try_parse_date)
+        if col in known_formats:
+            fixed = replace(known_formats[col], nonconforming_rows=[], failed_rows=[])
+            df[col], profiles[col] = normalize_date_column(df[col], fixed)
+        elif infer_formats:
+            df[col], profiles[col] = normalize_date_column(df[col])
+        else:
+            df[col] = normalize_date_series(df[col])
 
+    return profiles
 
-def run_conversion(df, hpo_colname, date_cols, valid_hpo_codes, sample_id_col):
-    df = df.copy()
 
-    # normalize dates
-    force_dates_iso(df, date_cols)
+def _report_row(label):
+    # Excel row for a 0-based frame index (header on the row above)
+    return label + 2 if isinstance(label, (int, np.integer)) else label
 
-    # normalize HPO
-    if hpo_colname in df.columns:
-        df[hpo_colname] = df[hpo_colname].fillna("").astype(str)
 
-        normalized = []
-        invalid_records = []
+def write_date_report(profiles: dict, report_path):
+    with _atomic_write(report_path) as rep:
+        rep.write("Date column formats:\n\n")
+        for col, p in profiles.items():
+            order = "day-first" if p.dayfirst else "month-first"
+            rep.write(f"{col}: {p.date_format or 'no text dates'} ({order})\n")
+            if p.conflicting:
+                rep.write("  WARNING: both day-first and month-first values found\n")
+            elif p.ambiguous:
+                rep.write("  WARNING: ambiguous, every day/month is <= 12; "
+                          "month-first assumed\n")
+            if p.nonconforming_rows:
+                rows = ", ".join(str(_report_row(r)) for r in p.nonconforming_rows)
+                rep.write(f"  Rows not matching {p.date_format}: {rows}\n")
+            if p.failed_rows:
+                rows = ", ".join(str(_report_row(r)) for r in p.failed_rows)
+                rep.write(f"  Rows not converted (WRONG_DATE_CONVERSION): {rows}\n")
+            rep.write("\n")
 
-        for idx, raw in df[hpo_colname].items():
-            codes = normalize_hpo_field(raw)
-            invalid = [c for c in codes if c not in valid_hpo_codes]
-            if invalid:
-                sample = df[sample_id_col].iloc[idx] if sample_id_col in df.columns else "unknown"
-                invalid_records.append((idx, sample, invalid))
-            normalized.append(
-                "; ".join([c for c in codes if c not in invalid]))
 
-        df[hpo_colname] = normalized
+def copy_on_write_active():
+    """True when pandas copy-on-write is on (always from pandas 3)."""
+    if int(pd.__version__.split(".")[0]) >= 3:
+        return True
+    try:
+        return pd.get_option("mode.copy_on_write") is True
+    except KeyError:
+        return False
+
+
+def run_conversion(df, hpo_colname, date_cols, valid_hpo_codes, sample_id_col,
+                   date_report=None, date_formats=None, progress=None, cancel_event=None,
+                   stats=None, share_columns=True, rules=None, violations=None):
+    """Normalize date and HPO columns of a copy of df.
+
+    Returns (df, invalid_records). stats (a ConversionStats) collects stage
+    timings and counts; None skips all measuring. With share_columns and
+    pandas copy-on-write, the result shares every column it does not rewrite
+    with df instead of copying the whole frame. rules (a column_rules.RuleSet)
+    runs after the built-in normalization; violations, a list, receives every
+    issue found (HPO, dates and rules) as column_rules.Violation records.
+    """
+    source = df
+    df = df.copy(deep=not (share_columns and copy_on_write_active()))
+
+    # normalize dates (per-column format sniffing; profiles go to date_report)
+    profiles = {}
+    with stage_timer(stats, "dates"):
+        for i, col in enumerate(date_cols):
+            _check_cancelled(cancel_event)
+            _report_progress(progress, "dates", i / len(date_cols))
+            profiles.update(force_dates_iso(df, [col], known_formats=date_formats))
+    if date_report is not None:
+        date_report.update(profiles)
+
+    # normalize HPO
+    _check_cancelled(cancel_event)
+    _report_progress(progress, "hpo")
+    invalid_records = []
+    with stage_timer(stats, "hpo"):
+        if hpo_colname in df.columns:
+            sample_ids = df[sample_id_col] if sample_id_col in df.columns else None
+            df[hpo_colname], invalid_records = normalize_hpo_column(
+                df[hpo_colname], valid_hpo_codes, sample_ids)
+
+    _check_cancelled(cancel_event)
+    _apply_rules(source, df, hpo_colname, sample_id_col, profiles, invalid_records, rules,
+                 violations, stats)
+    _count_conversion(stats, len(df), profiles, invalid_records)
 
     # # ✅ FORCE ALL COLUMNS TO STRING, no numeric types allowed
     # df = df.astype(str).replace("nan", "").applymap(lambda x: x.strip())
@@ -114,3 +505,1168 @@ def run_conversion(df, hpo_colname, date_cols, valid_hpo_codes, sample_id_col):
     #     df[col] = df[col].apply(lambda x: x if x else "")
 
     return df, invalid_records
+
+
+def _apply_rules(source, df, hpo_colname, sample_id_col, profiles, invalid_records, rules,
+                 violations, stats=None):
+    """Run rules on df and fill violations with the HPO, date and rule issues."""
+    # failed date cells by position, before rules may rewrite them (labels can repeat)
+    failed_dates = {col: np.flatnonzero(df[col].to_numpy(dtype=object) == "WRONG_DATE_CONVERSION")
+                    for col, profile in profiles.items() if profile.failed_rows}
+    sample_ids = df[sample_id_col] if sample_id_col in df.columns else None
+    found = []
+    if rules is not None:
+        with stage_timer(stats, "rules"):
+            found = rules.apply(df, sample_ids)
+        if stats is not None:
+            stats.rule_violations += len(found)
+    if violations is None:
+        return
+
+    violations += [Violation(label, sample, hpo_colname, "hpo_code", "error", ", ".join(codes),
+                             "invalid or obsolete HPO code")
+                   for label, sample, codes in invalid_records]
+    for col, positions in failed_dates.items():
+        for label, pos in zip(profiles[col].failed_rows, positions):
+            violations.append(Violation(
+                label, sample_ids.iloc[pos] if sample_ids is not None else "unknown",
+                col, "date", "error", _cell_value(source[col].iloc[pos]),
+                "could not be converted to a date"))
+    violations += found
+
+
+def _cell_value(value):
+    if value is None or (np.isscalar(value) and pd.isna(value)):
+        return ""
+    return str(value)
+
+
+def check_sample_ids(df, sample_id_col, sample_index, source, violations, stats=None,
+                     run_key=None):
+    """Flag sample IDs repeated in df or converted before; records them in sample_index.
+
+    Repeats inside df are "duplicate_sample" errors; IDs the index already
+    holds from an earlier submission are "already_converted" warnings, unless
+    it came from the same run_key (the same file converted again). The whole
+    batch is checked and recorded in one transaction (SampleIndex.register).
+    """
+    if sample_id_col not in df.columns:
+        return
+    with stage_timer(stats, "samples"):
+        ids = df[sample_id_col].map(_cell_value).str.strip()
+        present = ids != ""
+        earlier = sample_index.register(ids[present].unique().tolist(), source,
+                                        run_key=run_key)
+
+        repeated = present & ids.duplicated(keep=False)
+        known = present & ids.isin(list(earlier))
+        found = [Violation(label, sample, sample_id_col, "duplicate_sample", "error", sample,
+                           "sample ID repeated in this file")
+                 for label, sample in ids[repeated].items()]
+        found += [Violation(label, sample, sample_id_col, "already_converted", "warning", sample,
+                            "already converted from {} on {}".format(*earlier[sample]))
+                  for label, sample in ids[known].items()]
+    if stats is not None:
+        stats.duplicate_samples += int((repeated | known).sum())
+    violations += found
+
+
+def _count_conversion(stats, rows, profiles, invalid_records):
+    if stats is None:
+        return
+    stats.rows += rows
+    for col, p in profiles.items():
+        info = stats.date_columns.setdefault(col, {"unique_values": 0, "failed_rows": 0})
+        info["unique_values"] = max(info["unique_values"], p.unique_values)
+        info["failed_rows"] += len(p.failed_rows)
+    stats.invalid_rows += len(invalid_records)
+    stats.invalid_codes += sum(len(codes) for _, _, codes in invalid_records)
+
+
+# ---------------- PARALLEL NORMALIZATION (row partitions) ----------------
+# Each date column and the HPO column are cut into row partitions; every
+# (column, partition) pair is one task on a process pool whose workers hold
+# the ontology (_init_worker). Only the column slices travel to the workers.
+# Date formats are sniffed once on the whole column first, so every
+# partition parses with the same profile as a single-process run.
+PARTITION_MIN_ROWS = 20000
+
+
+def _normalize_partition(kind, series, profile=None, sample_ids=None):
+    if kind == "date":
+        normalized, extra = normalize_date_column(series, profile)
+    else:
+        normalized, extra = normalize_hpo_column(series, _worker_hpo, sample_ids)
+    # codes + distinct values pickle far smaller than one string per row
+    codes, uniques = pd.factorize(normalized.to_numpy())
+    return codes.astype(np.int32), np.asarray(uniques, dtype=object), extra
+
+
+def _merge_partitions(parts, index, name, dtype=None):
+    # dtype as the single-process functions build it (object for dates, inferred for HPO)
+    values = np.concatenate([uniques[codes] for codes, uniques, _ in parts])
+    return pd.Series(values, index=index, name=name, dtype=dtype)
+
+
+def _row_bounds(n, parts):
+    edges = np.linspace(0, n, parts + 1).astype(int).tolist()
+    return [(a, b) for a, b in zip(edges[:-1], edges[1:]) if b > a]
+
+
+def run_conversion_parallel(df, hpo_colname, date_cols, valid_hpo_codes, sample_id_col,
+                            workers=None, executor=None, date_report=None, progress=None,
+                            cancel_event=None, stats=None, min_rows=PARTITION_MIN_ROWS,
+                            rules=None, violations=None):
+    """run_conversion with the rows split over worker processes.
+
+    Same result as run_conversion: rows come back in their original order
+    and invalid_records are identical. executor is a ProcessPoolExecutor
+    started with initializer=_init_worker (reused across files); without
+    one, a pool of `workers` processes is created for this call. Frames
+    under min_rows (or a single worker) run in this process. rules run here,
+    on the merged frame. Date and HPO partitions overlap on the pool, so stats
+    time them together as "normalize" (format sniffing is "date_formats").
+    """
+    if workers is None:
+        workers = executor._max_workers if executor is not None else os.cpu_count() or 1
+    if workers < 2 or len(df) < max(min_rows, 2):
+        return run_conversion(df, hpo_colname, date_cols, valid_hpo_codes, sample_id_col,
+                              date_report=date_report, progress=progress,
+                              cancel_event=cancel_event, stats=stats, rules=rules,
+                              violations=violations)
+
+    result = df.copy(deep=not copy_on_write_active())
+    bounds = _row_bounds(len(df), workers)
+
+    # sniff every date column on all of its rows, as normalize_date_column does
+    profiles = {}
+    _report_progress(progress, "dates")
+    with stage_timer(stats, "date_formats"):
+        for col in dict.fromkeys(date_cols):
+            if col in df.columns:
+                uniques = pd.factorize(df[col], use_na_sentinel=True)[1]
+                profiles[col] = infer_date_format(list(uniques), column=col)
+                profiles[col].unique_values = len(uniques)
+
+    tasks = [("date", col, part) for col in profiles for part in range(len(bounds))]
+    sample_ids = None
+    if hpo_colname in df.columns:
+        tasks += [("hpo", hpo_colname, part) for part in range(len(bounds))]
+        sample_ids = df[sample_id_col] if sample_id_col in df.columns else None
+
+    own_pool = executor is None
+    if own_pool:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                       initargs=(valid_hpo_codes,))
+    done = {}
+    try:
+        with stage_timer(stats, "normalize"):
+            futures = {}
+            for kind, col, part in tasks:
+                a, b = bounds[part]
+                if kind == "date":
+                    fixed = replace(profiles[col], nonconforming_rows=[], failed_rows=[])
+                    future = executor.submit(_normalize_partition, kind, df[col].iloc[a:b], fixed)
+                else:
+                    ids = sample_ids.iloc[a:b] if sample_ids is not None else None
+                    future = executor.submit(_normalize_partition, kind, df[col].iloc[a:b],
+                                             sample_ids=ids)
+                futures[future] = (kind, col, part)
+
+            for future in as_completed(futures):
+                if cancel_event is not None and cancel_event.is_set():
+                    for pending in futures:
+                        pending.cancel()
+                    raise ConversionCancelled()
+                done[futures[future]] = future.result()
+                _report_progress(progress, "hpo", len(done) / len(tasks))
+    finally:
+        if own_pool:
+            executor.shutdown(cancel_futures=True)
+
+    # merge back in order: partitions top to bottom
+    invalid_records = []
+    for col, profile in profiles.items():
+        parts = [done[("date", col, part)] for part in range(len(bounds))]
+        result[col] = _merge_partitions(parts, df.index, col, dtype=object)
+        profile.nonconforming_rows = [r for _, _, p in parts for r in p.nonconforming_rows]
+        profile.failed_rows = [r for _, _, p in parts for r in p.failed_rows]
+    if hpo_colname in df.columns:
+        parts = [done[("hpo", hpo_colname, part)] for part in range(len(bounds))]
+        result[hpo_colname] = _merge_partitions(parts, df.index, hpo_colname)
+        invalid_records = [record for _, _, records in parts for record in records]
+
+    if date_report is not None:
+        date_report.update(profiles)
+    _apply_rules(df, result, hpo_colname, sample_id_col, profiles, invalid_records, rules,
+                 violations, stats)
+    _count_conversion(stats, len(result), profiles, invalid_records)
+    return result, invalid_records
+
+
+# ---------------- FILE-LEVEL HELPERS (shared by GUI and CLI) ----------------
+def read_excel_table(excel_path, header_row=header_row_default, reader=None, sheet=None):
+    """Read a workbook (or CSV/TSV/Parquet export); header_row is 1-based.
+
+    The backend is picked from the extension (see tools.table_readers);
+    reader forces one by name. sheet defaults to the first worksheet.
+    """
+    return read_table(excel_path, header_row, backend=reader, sheet=sheet)
+
+
+_UNSAFE_FILENAME_CHARS = re.compile(r'[<>:"/\\|?*\x00-\x1f]')
+
+# file name endings of everything output_paths names, by key
+OUTPUT_SUFFIXES = {
+    "csv": "_CLEAN.csv",
+    "hpo_report": "_HPO_ERROR_REPORT.txt",
+    "date_report": "_DATE_REPORT.txt",
+    "stats": "_STATS.json",
+    "validation_report": "_VALIDATION_REPORT.csv",
+}
+
+
+def output_paths(input_path, output_dir=None, sheet=None):
+    """_CLEAN.csv and report paths, next to the input unless output_dir is set.
+
+    With sheet the names become <workbook>_<sheet>_CLEAN.csv etc.
+    """
+    result_folder = output_dir or os.path.dirname(os.path.abspath(input_path))
+    base_name = os.path.splitext(os.path.basename(input_path))[0]
+    if sheet is not None:
+        base_name += "_" + _UNSAFE_FILENAME_CHARS.sub("_", str(sheet)).strip()
+    return {key: os.path.join(result_folder, base_name + suffix)
+            for key, suffix in OUTPUT_SUFFIXES.items()}
+
+
+def is_output_file(path):
+    """True for files this converter writes (CLEAN CSVs, reports, _DELTA_CLEAN.csv)."""
+    return os.path.basename(str(path)).endswith(
+        tuple(OUTPUT_SUFFIXES.values()) + ("_DELTA_CLEAN.csv",))
+
+
+@contextmanager
+def _atomic_write(path):
+    # write next to the target and swap in, so an interrupted run never
+    # leaves a truncated CSV or report behind
+    tmp_path = path + ".part"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            yield f
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _write_clean_rows(processed_df, f):
+    # ✅ Insert the fixed first row: ["DATA", "", "", ...]
+    padding_row = ["[DATA]"] + [""] * (len(processed_df.columns) - 1)
+    f.write(",".join(padding_row) + "\n")
+    processed_df.to_csv(
+        f, index=False, encoding="utf-8", lineterminator="\n", date_format='%Y%m%d')
+
+
+def write_clean_csv(processed_df, out_csv):
+    with _atomic_write(out_csv) as f:
+        _write_clean_rows(processed_df, f)
+
+
+def clean_csv_text(processed_df):
+    """The _CLEAN.csv content as a string (for the conversion service)."""
+    buffer = io.StringIO()
+    _write_clean_rows(processed_df, buffer)
+    return buffer.getvalue()
+
+
+def write_hpo_error_report(invalid_records, report_path):
+    with _atomic_write(report_path) as rep:
+        rep.write("Invalid or missing HPO codes:\n\n")
+        for row, sample, bad_codes in invalid_records:
+            rep.write(
+                f"Row {_report_row(row)} | Sample: {sample} | Invalid: {', '.join(bad_codes)}\n")
+
+
+def write_validation_report(violations, report_path):
+    """One CSV row per issue: Excel row, sample, column, rule, severity, value, message."""
+    table = pd.DataFrame(violations, columns=Violation._fields, dtype=object)
+    table["row"] = [_report_row(r) if r is not None else "" for r in table["row"]]
+    table["sample"] = table["sample"].map(_cell_value)
+    with _atomic_write(report_path) as f:
+        table.to_csv(f, index=False, lineterminator="\n")
+
+
+def write_outputs(processed_df, invalid_records, date_profiles, input_path, output_dir=None,
+                  sheet=None, violations=None):
+    """Write _CLEAN.csv plus the HPO/date reports that apply.
+
+    With violations (a conversion run with rules or a sample index) the structured
+    _VALIDATION_REPORT.csv replaces _HPO_ERROR_REPORT.txt. Returns the paths
+    that were written (report entries are None when the report was not needed).
+    """
+    paths = output_paths(input_path, output_dir, sheet)
+    paths["stats"] = None
+    os.makedirs(os.path.dirname(paths["csv"]), exist_ok=True)
+
+    write_clean_csv(processed_df, paths["csv"])
+
+    if violations:
+        write_validation_report(violations, paths["validation_report"])
+    else:
+        paths["validation_report"] = None
+
+    if invalid_records and violations is None:
+        write_hpo_error_report(invalid_records, paths["hpo_report"])
+    else:
+        paths["hpo_report"] = None
+
+    if any(p.needs_attention for p in date_profiles.values()):
+        write_date_report(date_profiles, paths["date_report"])
+    else:
+        paths["date_report"] = None
+
+    return paths
+
+
+def convert_file(input_path, valid_hpo_codes, header_row=header_row_default,
+                 hpo_colname=hpo_column_default, sample_id_col=sample_id_column_default,
+                 date_cols=None, output_dir=None, df=None, progress=None, cancel_event=None,
+                 stats=None, reader=None, sheet=None, row_pool=None, rules=None,
+                 sample_index=None):
+    """Read, convert and write one workbook. Returns a summary dict.
+
+    df skips the read when the workbook is already loaded (GUI). progress is
+    called as progress(stage, fraction) with stages from CONVERSION_STAGES;
+    setting cancel_event raises ConversionCancelled before the next stage.
+    With stats (a ConversionStats) the timings are also written to _STATS.json
+    and the summary gets a "stats" entry. sheet converts that worksheet
+    instead of the first one, into <workbook>_<sheet>_CLEAN.csv. row_pool (see
+    run_conversion_parallel) spreads the rows of this file over its workers.
+    rules (a column_rules.RuleSet) adds its checks and the structured
+    _VALIDATION_REPORT.csv; the summary then counts them in "violations".
+    sample_index (a sample_index.SampleIndex) records the sample IDs and adds
+    the ones seen twice or in an earlier file to that report.
+    """
+    if stats is not None:
+        stats.input = input_path
+    if df is None:
+        _report_progress(progress, "read")
+        with stage_timer(stats, "read"):
+            df = read_excel_table(input_path, header_row, reader, sheet)
+    if date_cols is None:
+        date_cols = [c for c in df.columns if c in preselected_date_columns]
+
+    date_profiles = {}
+    violations = [] if rules is not None or sample_index is not None else None
+    convert = run_conversion
+    if row_pool is not None:
+        convert = partial(run_conversion_parallel, executor=row_pool)
+    processed_df, invalid_records = convert(
+        df=df,
+        hpo_colname=hpo_colname,
+        date_cols=date_cols,
+        valid_hpo_codes=valid_hpo_codes,
+        sample_id_col=sample_id_col,
+        date_report=date_profiles,
+        progress=progress,
+        cancel_event=cancel_event,
+        stats=stats,
+        rules=rules,
+        violations=violations
+    )
+
+    _check_cancelled(cancel_event)
+    if sample_index is not None:
+        source = os.path.abspath(input_path) + (f" [{sheet}]" if sheet is not None else "")
+        check_sample_ids(processed_df, sample_id_col, sample_index, source, violations, stats,
+                         run_key=content_key(input_path, sheet))
+    _report_progress(progress, "write")
+    with stage_timer(stats, "write"):
+        paths = write_outputs(processed_df, invalid_records, date_profiles,
+                              input_path, output_dir, sheet, violations)
+    _write_stats(stats, input_path, output_dir, paths, sheet)
+
+    result = {
+        "input": input_path,
+        "sheet": sheet,
+        "rows": len(processed_df),
+        "invalid_rows": len(invalid_records),
+        "date_warnings": sorted(c for c, p in date_profiles.items() if p.needs_attention),
+        **paths,
+    }
+    if violations is not None:
+        result["violations"] = len(violations)
+    return result
+
+
+def _write_stats(stats, input_path, output_dir, paths, sheet=None):
+    if stats is None:
+        return
+    stats.finish()
+    paths["stats"] = output_paths(input_path, output_dir, sheet)["stats"]
+    stats.write_json(paths["stats"])
+
+
+# ---------------- STREAMING (bounded memory) ----------------
+STREAM_CHUNK_ROWS = 5000
+
+
+def _excel_cell(value):
+    # same integer handling as pandas' openpyxl reader
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def _header_names(raw_header):
+    """Column names as pd.read_excel builds them (Unnamed: i, dup.1, stripped)."""
+    names, seen = [], Counter()
+    for i, value in enumerate(raw_header):
+        name = f"Unnamed: {i}" if value is None else str(_excel_cell(value))
+        if seen[name]:
+            deduped = f"{name}.{seen[name]}"
+            seen[name] += 1
+            name = deduped
+        seen[name] += 1
+        names.append(name.strip())
+    return names
+
+
+def _excel_rows(ws, header_row):
+    """(column names, row values) of a worksheet as read_excel sees them.
+
+    Blank rows are yielded only when data follows (trailing ones are dropped).
+    """
+    rows = ws.iter_rows(min_row=header_row, values_only=True)
+    raw_header = list(next(rows, ()))
+    while raw_header and raw_header[-1] is None:
+        raw_header.pop()
+    columns = _header_names(raw_header)
+    width = len(columns)
+
+    def values():
+        blanks = []
+        for row in rows:
+            cells = [_excel_cell(v) for v in row[:width]]
+            cells += [None] * (width - len(cells))
+            if all(v is None for v in cells):
+                blanks.append(cells)
+                continue
+            yield from blanks
+            blanks = []
+            yield cells
+
+    return columns, values()
+
+
+def _cell_kind(value):
+    if value is None:
+        return "empty"
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, int):
+        return "int"
+    if isinstance(value, float):
+        return "float"
+    if isinstance(value, datetime):
+        return "datetime"
+    return "object"
+
+
+def excel_column_dtypes(excel_path, header_row=header_row_default, sheet=None):
+    """{column: "int64" | "float64" | "datetime64" | None} over the whole sheet.
+
+    The dtype read_excel would infer for each column (None: object), found
+    with one read-only pass that keeps only a kind per column in memory.
+    Booleans count as numbers unless the whole column is TRUE/FALSE cells
+    (read_excel writes TRUE next to a blank as 1.0).
+    """
+    from openpyxl import load_workbook
+
+    wb = load_workbook(excel_path, read_only=True, data_only=True)
+    try:
+        ws = wb[sheet] if sheet is not None else wb.worksheets[0]
+        columns, rows = _excel_rows(ws, header_row)
+        kinds = [set() for _ in columns]
+        for cells in rows:
+            for seen, value in zip(kinds, cells):
+                if "object" not in seen:
+                    seen.add(_cell_kind(value))
+    finally:
+        wb.close()
+
+    dtypes = {}
+    for col, seen in zip(columns, kinds):
+        values = seen - {"empty"}
+        if values == {"bool"} and "empty" not in seen:
+            dtypes[col] = None
+        elif values and values <= {"bool", "int", "float"}:
+            dtypes[col] = "int64" if seen <= {"bool", "int"} else "float64"
+        elif values == {"datetime"}:
+            dtypes[col] = "datetime64"
+        else:
+            dtypes[col] = None
+    return dtypes
+
+
+def _typed_chunk(buffer, columns, offset, dtypes):
+    chunk = pd.DataFrame(buffer, columns=columns, dtype=object,
+                         index=pd.RangeIndex(offset, offset + len(buffer)))
+    for col, dtype in (dtypes or {}).items():
+        if dtype == "datetime64":
+            chunk[col] = pd.to_datetime(chunk[col])
+        elif dtype is not None:
+            chunk[col] = chunk[col].astype(dtype)
+    return chunk
+
+
+def iter_excel_chunks(excel_path, header_row=header_row_default, chunk_rows=STREAM_CHUNK_ROWS,
+                      first_chunk_rows=None, sheet=None, dtypes=None):
+    """Yield a sheet (default: the first) as DataFrames of at most chunk_rows rows.
+
+    Uses openpyxl read-only mode, so only one chunk is held in memory. Chunk
+    indexes continue across chunks (0..n like read_excel). Cells are object
+    dtype unless dtypes (see excel_column_dtypes) gives the sheet-wide dtype
+    of a column, so every chunk matches what read_excel returns for it.
+    first_chunk_rows lets the first chunk be larger (e.g. for format sniffing).
+    """
+    from openpyxl import load_workbook
+
+    wb = load_workbook(excel_path, read_only=True, data_only=True)
+    try:
+        ws = wb[sheet] if sheet is not None else wb.worksheets[0]
+        columns, rows = _excel_rows(ws, header_row)
+
+        buffer, offset = [], 0
+        limit = first_chunk_rows or chunk_rows
+        for cells in rows:
+            buffer.append(cells)
+            if len(buffer) >= limit:
+                yield _typed_chunk(buffer, columns, offset, dtypes)
+                offset += len(buffer)
+                buffer, limit = [], chunk_rows
+
+        if buffer or offset == 0:
+            yield _typed_chunk(buffer, columns, offset, dtypes)
+    finally:
+        wb.close()
+
+
+def iter_delimited_chunks(path, header_row=header_row_default, chunk_rows=STREAM_CHUNK_ROWS,
+                          first_chunk_rows=None):
+    """iter_excel_chunks for CSV/TSV exports (same options as read_delimited)."""
+    reader = read_delimited(path, header_row, iterator=True)
+    with reader:
+        size = first_chunk_rows or chunk_rows
+        first = True
+        while True:
+            try:
+                chunk = reader.get_chunk(size)
+            except StopIteration:
+                if first:
+                    yield read_delimited(path, header_row, nrows=0)
+                return
+            chunk.columns = chunk.columns.astype(str).str.strip()
+            yield chunk
+            first, size = False, chunk_rows
+
+
+def iter_table_chunks(path, header_row=header_row_default, chunk_rows=STREAM_CHUNK_ROWS,
+                      first_chunk_rows=None, sheet=None):
+    """Chunked reading for any input type (see iter_excel_chunks)."""
+    ext = os.path.splitext(str(path))[1].lower()
+    if ext in (".xlsx", ".xlsm"):
+        # one extra pass, so numbers and dates get read_excel's dtypes in every chunk
+        dtypes = excel_column_dtypes(path, header_row, sheet)
+        return iter_excel_chunks(path, header_row, chunk_rows, first_chunk_rows, sheet, dtypes)
+    if ext in DELIMITERS and sheet is None:
+        return iter_delimited_chunks(path, header_row, chunk_rows, first_chunk_rows)
+    return _iter_slices(read_table(path, header_row, sheet=sheet), chunk_rows, first_chunk_rows)
+
+
+def _iter_slices(df, chunk_rows, first_chunk_rows=None):
+    # no incremental reader for this format (.xls, Parquet): slice a full read
+    start, size = 0, first_chunk_rows or chunk_rows
+    while True:
+        yield df.iloc[start:start + size]
+        start += size
+        size = chunk_rows
+        if start >= len(df):
+            return
+
+
+def convert_file_streaming(input_path, valid_hpo_codes, header_row=header_row_default,
+                           hpo_colname=hpo_column_default,
+                           sample_id_col=sample_id_column_default,
+                           date_cols=None, output_dir=None, chunk_rows=STREAM_CHUNK_ROWS,
+                           sniff_rows=DATE_SNIFF_SAMPLE, stats=None, sheet=None):
+    """convert_file for workbooks too large to hold in memory.
+
+    Date formats are sniffed on the first chunk (at least sniff_rows rows) and
+    reused for the rest, so every chunk is parsed the same way; later rows that
+    do not fit show up in the date report. The CSV and HPO report are appended
+    chunk by chunk to temporary files that replace the outputs only once the
+    whole sheet is converted; the date report is written at the end.
+    """
+    paths = output_paths(input_path, output_dir, sheet)
+    paths["stats"] = paths["validation_report"] = None
+    os.makedirs(os.path.dirname(paths["csv"]), exist_ok=True)
+    if stats is not None:
+        stats.input = input_path
+
+    rows = invalid_rows = 0
+    date_profiles = {}
+    report = None
+
+    with ExitStack() as outputs:
+        out = outputs.enter_context(_atomic_write(paths["csv"]))
+        chunks = iter_table_chunks(input_path, header_row, chunk_rows,
+                                   first_chunk_rows=max(chunk_rows, sniff_rows), sheet=sheet)
+        while True:
+            with stage_timer(stats, "read"):
+                chunk = next(chunks, None)
+            if chunk is None:
+                break
+            if rows == 0:
+                if date_cols is None:
+                    date_cols = [c for c in chunk.columns if c in preselected_date_columns]
+                padding_row = ["[DATA]"] + [""] * (len(chunk.columns) - 1)
+                out.write(",".join(padding_row) + "\n")
+
+            chunk_profiles = {}
+            processed, invalid_records = run_conversion(
+                df=chunk,
+                hpo_colname=hpo_colname,
+                date_cols=date_cols,
+                valid_hpo_codes=valid_hpo_codes,
+                sample_id_col=sample_id_col,
+                date_report=chunk_profiles,
+                date_formats=date_profiles or None,
+                stats=stats
+            )
+            for col, p in chunk_profiles.items():
+                if col in date_profiles:
+                    date_profiles[col].nonconforming_rows.extend(p.nonconforming_rows)
+                    date_profiles[col].failed_rows.extend(p.failed_rows)
+                else:
+                    date_profiles[col] = p
+
+            with stage_timer(stats, "write"):
+                processed.to_csv(out, index=False, header=(rows == 0), encoding="utf-8",
+                                 lineterminator="\n", date_format='%Y%m%d')
+
+                if invalid_records:
+                    if report is None:
+                        report = outputs.enter_context(_atomic_write(paths["hpo_report"]))
+                        report.write("Invalid or missing HPO codes:\n\n")
+                    for row, sample, bad_codes in invalid_records:
+                        report.write(
+                            f"Row {_report_row(row)} | Sample: {sample} | Invalid: {', '.join(bad_codes)}\n")
+
+            rows += len(processed)
+            invalid_rows += len(invalid_records)
+
+    if report is None:
+        paths["hpo_report"] = None
+    if any(p.needs_attention for p in date_profiles.values()):
+        write_date_report(date_profiles, paths["date_report"])
+    else:
+        paths["date_report"] = None
+    _write_stats(stats, input_path, output_dir, paths, sheet)
+
+    return {
+        "input": input_path,
+        "sheet": sheet,
+        "rows": rows,
+        "invalid_rows": invalid_rows,
+        "date_warnings": sorted(c for c, p in date_profiles.items() if p.needs_attention),
+        **paths,
+    }
+
+
+# ---------------- QUICK PREVIEW (header + sample rows) ----------------
+PEEK_ROWS = 50
+DATE_GUESS_THRESHOLD = 0.8
+
+
+def peek_excel(excel_path, header_row=header_row_default, sample_rows=PEEK_ROWS, sheet=None):
+    """Column names plus the first sample_rows rows, without loading the sheet.
+
+    .xlsx/.xlsm files are read with openpyxl read-only mode and stop after the
+    sample; other formats go through read_table(nrows=...).
+    """
+    if os.path.splitext(str(excel_path))[1].lower() in (".xlsx", ".xlsm"):
+        chunks = iter_excel_chunks(excel_path, header_row, chunk_rows=sample_rows, sheet=sheet)
+        try:
+            return next(chunks)
+        finally:
+            chunks.close()
+
+    return read_table(excel_path, header_row, nrows=sample_rows, sheet=sheet)
+
+
+def _looks_like_date(value):
+    if isinstance(value, (datetime, pd.Timestamp)):
+        return True
+    if not isinstance(value, str):
+        return False
+    text = value.strip()
+    return bool(_ISO_DATE_RE.match(text) or _ISO_DATETIME_RE.match(text)
+                or _PAIR_DATE_RE.match(text))
+
+
+def guess_date_columns(sample_df, threshold=DATE_GUESS_THRESHOLD):
+    """Columns whose non-empty sample values are mostly dates."""
+    guessed = []
+    for col in sample_df.columns:
+        values = [v for v in sample_df[col].tolist()
+                  if not (v is None or (isinstance(v, str) and not v.strip()) or pd.isna(v))]
+        if values and sum(map(_looks_like_date, values)) >= threshold * len(values):
+            guessed.append(col)
+    return guessed
+
+
+# ---------------- MULTI-SHEET WORKBOOKS ----------------
+def _convert_sheet(input_path, valid_hpo_codes, sheet, options, merge=False,
+                   output_dir=None, cancel_event=None, with_stats=False):
+    """One sheet of convert_sheets: a convert_file summary, or with merge the
+    converted pieces (sheet, df, invalid_records, date_profiles) unwritten."""
+    _check_cancelled(cancel_event)
+    if not merge:
+        stats = ConversionStats() if with_stats else None
+        result = convert_file(input_path, valid_hpo_codes, output_dir=output_dir, sheet=sheet,
+                              cancel_event=cancel_event, stats=stats, **options)
+        if stats is not None:
+            result["stats_summary"] = stats.to_dict()
+        return result
+
+    df = read_excel_table(input_path, options.get("header_row", header_row_default),
+                          options.get("reader"), sheet)
+    date_cols = options.get("date_cols")
+    if date_cols is None:
+        date_cols = [c for c in df.columns if c in preselected_date_columns]
+    date_profiles = {}
+    processed_df, invalid_records = run_conversion(
+        df=df,
+        hpo_colname=options.get("hpo_colname", hpo_column_default),
+        date_cols=date_cols,
+        valid_hpo_codes=valid_hpo_codes,
+        sample_id_col=options.get("sample_id_col", sample_id_column_default),
+        date_report=date_profiles,
+        cancel_event=cancel_event
+    )
+    return sheet, processed_df, invalid_records, date_profiles
+
+
+def _convert_sheet_in_worker(input_path, sheet, options, merge=False, output_dir=None,
+                             with_stats=False):
+    return _convert_sheet(input_path, _worker_hpo, sheet, options, merge, output_dir,
+                          with_stats=with_stats)
+
+
+def _sheet_row(sheet, label):
+    # "5 (Run 2)": write_hpo_error_report / write_date_report print it as-is
+    return f"{_report_row(label)} ({sheet})"
+
+
+def write_merged_outputs(parts, input_path, output_dir=None):
+    """Write sheets converted with merge=True as one _CLEAN.csv and one set of reports.
+
+    Columns are the union over sheets (missing cells stay empty) and report
+    rows name the sheet they come from.
+    """
+    merged = pd.concat([df for _, df, _, _ in parts], ignore_index=True)
+    invalid_records = [(_sheet_row(sheet, row), sample, codes)
+                       for sheet, _, records, _ in parts for row, sample, codes in records]
+    date_profiles = {}
+    for sheet, _, _, profiles in parts:
+        for col, p in profiles.items():
+            date_profiles[f"{col} ({sheet})"] = replace(
+                p,
+                nonconforming_rows=[_sheet_row(sheet, r) for r in p.nonconforming_rows],
+                failed_rows=[_sheet_row(sheet, r) for r in p.failed_rows])
+
+    paths = write_outputs(merged, invalid_records, date_profiles, input_path, output_dir)
+    return {
+        "input": input_path,
+        "sheet": None,
+        "sheets": [sheet for sheet, _, _, _ in parts],
+        "rows": len(merged),
+        "invalid_rows": len(invalid_records),
+        "date_warnings": sorted(c for c, p in date_profiles.items() if p.needs_attention),
+        **paths,
+    }
+
+
+def convert_sheets(input_path, valid_hpo_codes, sheets=None, sheet_options=None, merge=False,
+                   workers=None, processes=False, output_dir=None, progress=None,
+                   cancel_event=None, with_stats=False, **options):
+    """Convert several sheets of one workbook concurrently.
+
+    sheets defaults to every sheet. options (header_row, hpo_colname,
+    sample_id_col, date_cols, reader) apply to all sheets and sheet_options
+    ({sheet: {...}}) overrides them per sheet; date columns a sheet does not
+    have are skipped. Returns {sheet: summary or the exception it raised},
+    each sheet written as <workbook>_<sheet>_CLEAN.csv; with merge, a single
+    summary for one merged output. with_stats times each sheet into its own
+    _STATS.json (not with merge).
+
+    Sheets run on threads by default. processes=True uses worker processes
+    like the CLI, which also overlaps the pure-Python parts (the GUI must not
+    spawn processes from the frozen build).
+    """
+    if merge and with_stats:
+        raise ValueError("timing stats are written per sheet; they cannot be merged")
+    sheets = list(sheets) if sheets else list_sheets(input_path)
+    if not sheets:
+        raise ValueError(f"{os.path.basename(str(input_path))} has no sheets")
+    sheet_options = sheet_options or {}
+    jobs = {sheet: {**options, **sheet_options.get(sheet, {})} for sheet in sheets}
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(sheets)))
+    if processes:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                   initargs=(valid_hpo_codes,))
+    else:
+        pool = ThreadPoolExecutor(max_workers=workers)
+
+    results = {}
+    with pool:
+        if processes:
+            futures = {pool.submit(_convert_sheet_in_worker, input_path, sheet, job, merge,
+                                   output_dir, with_stats): sheet for sheet, job in jobs.items()}
+        else:
+            futures = {pool.submit(_convert_sheet, input_path, valid_hpo_codes, sheet, job, merge,
+                                   output_dir, cancel_event, with_stats): sheet
+                       for sheet, job in jobs.items()}
+        try:
+            for done, future in enumerate(as_completed(futures), 1):
+                _check_cancelled(cancel_event)
+                sheet = futures[future]
+                try:
+                    results[sheet] = future.result()
+                except ConversionCancelled:
+                    raise
+                except Exception as e:
+                    if merge:
+                        raise RuntimeError(f"Sheet {sheet}: {e}") from e
+                    results[sheet] = e
+                _report_progress(progress, "sheets", done / len(futures))
+        except ConversionCancelled:
+            for future in futures:
+                future.cancel()
+            raise
+
+    if merge:
+        _report_progress(progress, "write")
+        return write_merged_outputs([results[sheet] for sheet in sheets], input_path, output_dir)
+    return {sheet: results[sheet] for sheet in sheets}
+
+
+# ---------------- COMMAND LINE (python -m tools.emedgene_csv_converter_core) ----------------
+_worker_hpo = None
+
+
+def _init_worker(hpo):
+    # once per worker process; the compiled index makes this a few ms.
+    # hpo is an hp.obo path or an already loaded ontology / code set.
+    global _worker_hpo
+    _worker_hpo = load_hpo_ontology(hpo) if isinstance(hpo, str) else hpo
+
+
+def _convert_in_worker(input_path, options, stream=False, with_stats=False, incremental=None):
+    if incremental:
+        from tools.incremental import convert_file_incremental
+        return convert_file_incremental(input_path, _worker_hpo, delta=(incremental == "delta"),
+                                        **options)
+    stats = ConversionStats() if with_stats else None
+    if stream:
+        result = convert_file_streaming(input_path, _worker_hpo, stats=stats, **options)
+    else:
+        result = convert_file(input_path, _worker_hpo, stats=stats, **options)
+    if stats is not None:
+        result["stats_summary"] = stats.to_dict()
+    return result
+
+
+def collect_inputs(patterns):
+    """Expand directories and glob patterns into a file list.
+
+    Directories contribute every supported input (INPUT_EXTENSIONS) except
+    our own outputs (is_output_file).
+    """
+    files = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = [p for p in glob.glob(os.path.join(pattern, "*"))
+                       if os.path.splitext(p)[1].lower() in INPUT_EXTENSIONS
+                       and not is_output_file(p)]
+        else:
+            matches = glob.glob(pattern) or [pattern]
+        for path in sorted(matches):
+            name = os.path.basename(path)
+            # skip Office lock files
+            if name.startswith("~$") or path in files:
+                continue
+            files.append(path)
+    return files
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m tools.emedgene_csv_converter_core",
+        description="Convert patient Excel files to Emedgene CLEAN CSV files.")
+    parser.add_argument("inputs", nargs="+",
+                        help="Excel/CSV/TSV/Parquet files, glob patterns or folders")
+    parser.add_argument("--header-row", type=int, default=header_row_default,
+                        help="1-based row holding the column names (default: %(default)s)")
+    parser.add_argument("--hpo-column", default=hpo_column_default,
+                        help="HPO column name (default: %(default)s)")
+    parser.add_argument("--sample-id-column", default=sample_id_column_default,
+                        help="Sample ID column name (default: %(default)s)")
+    parser.add_argument("--date-columns", default=None,
+                        help="Comma-separated date columns "
+                             "(default: the GUI preselection found in each file)")
+    parser.add_argument("--hpo-file", default=None,
+                        help="hp.obo to validate against (default: assets/hp.obo)")
+    parser.add_argument("--output-dir", default=None,
+                        help="Write outputs here instead of next to each input")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes (default: CPU count)")
+    parser.add_argument("--row-workers", type=int, default=None,
+                        help="Convert files one at a time, each split by rows over this "
+                             "many processes (for a few very large files)")
+    parser.add_argument("--stream", action="store_true",
+                        help="Read and convert in chunks with bounded memory "
+                             "(for very large workbooks)")
+    parser.add_argument("--chunk-rows", type=int, default=STREAM_CHUNK_ROWS,
+                        help="Rows per chunk with --stream (default: %(default)s)")
+    parser.add_argument("--reader", default=None, choices=sorted(READERS),
+                        help="Force an input backend (default: by extension, "
+                             "calamine when installed)")
+    parser.add_argument("--sheets", default=None,
+                        help="Comma-separated sheet names, or 'all' "
+                             "(default: the first sheet only)")
+    parser.add_argument("--merge-sheets", action="store_true",
+                        help="With --sheets, write one merged CSV per workbook "
+                             "instead of one per sheet")
+    parser.add_argument("--incremental", choices=["full", "delta"], default=None,
+                        help="Only convert samples that are new or changed since the last "
+                             "run; 'delta' also writes <name>_DELTA_CLEAN.csv with just those")
+    parser.add_argument("--rules", default=None,
+                        help="JSON/YAML column rule file (see tools/column_rules.py); "
+                             "issues go to <name>_VALIDATION_REPORT.csv")
+    parser.add_argument("--sample-index", nargs="?", const=DEFAULT_INDEX_PATH, default=None,
+                        metavar="PATH",
+                        help="Record sample IDs in this SQLite index and report the ones "
+                             "already converted or repeated (default path: %(const)s)")
+    parser.add_argument("--stats", action="store_true",
+                        help="Time each stage and write <name>_STATS.json next to the CSV")
+    return parser
+
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+
+    if args.header_row < 1:
+        print("Error: header row must be a positive integer.", file=sys.stderr)
+        return 2
+
+    hpo_path = args.hpo_file or resource_path(DEFAULT_HPO_PATH)
+    if not os.path.exists(hpo_path):
+        print(f"Error: HPO ontology not found: {hpo_path}", file=sys.stderr)
+        return 2
+
+    if args.stream and (args.sheets is not None or args.incremental):
+        print("Error: --stream cannot be combined with --sheets or --incremental.",
+              file=sys.stderr)
+        return 2
+    if args.sheets is not None and args.incremental:
+        print("Error: --incremental works on one sheet per file.", file=sys.stderr)
+        return 2
+    if args.stats and args.merge_sheets:
+        print("Error: --stats cannot be combined with --merge-sheets.", file=sys.stderr)
+        return 2
+    if args.row_workers is not None and (args.stream or args.sheets is not None
+                                         or args.incremental):
+        print("Error: --row-workers cannot be combined with --stream, --sheets or "
+              "--incremental.", file=sys.stderr)
+        return 2
+
+    rules = None
+    if args.rules is not None:
+        if args.stream or args.incremental or args.merge_sheets:
+            print("Error: --rules cannot be combined with --stream, --incremental or "
+                  "--merge-sheets.", file=sys.stderr)
+            return 2
+        try:
+            rules = load_rules(args.rules)
+        except (OSError, ValueError, ImportError) as e:
+            print(f"Error: cannot load rules {args.rules}: {e}", file=sys.stderr)
+            return 2
+
+    if args.sample_index is not None and (args.stream or args.incremental or args.merge_sheets):
+        print("Error: --sample-index cannot be combined with --stream, --incremental or "
+              "--merge-sheets.", file=sys.stderr)
+        return 2
+
+    files = collect_inputs(args.inputs)
+    if not files:
+        print("Error: no input files found.", file=sys.stderr)
+        return 2
+
+    # build/refresh the compiled index once, before the workers load it
+    load_hpo_ontology(hpo_path)
+
+    options = {
+        "header_row": args.header_row,
+        "hpo_colname": args.hpo_column,
+        "sample_id_col": args.sample_id_column,
+        "date_cols": ([c.strip() for c in args.date_columns.split(",") if c.strip()]
+                      if args.date_columns is not None else None),
+        "output_dir": args.output_dir,
+    }
+    if args.stream:
+        options["chunk_rows"] = args.chunk_rows
+    else:
+        options["reader"] = args.reader
+    if rules is not None:
+        options["rules"] = rules
+    if args.sample_index is not None:
+        options["sample_index"] = SampleIndex(args.sample_index)
+
+    if args.sheets is not None:
+        return _convert_sheets_cli(files, hpo_path, options, args)
+    if args.row_workers is not None:
+        return _convert_rows_cli(files, hpo_path, options, args)
+
+    results = {}
+    workers = max(1, min(args.workers or os.cpu_count() or 1, len(files)))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(hpo_path,)) as pool:
+        futures = {pool.submit(_convert_in_worker, path, options, args.stream, args.stats,
+                               args.incremental): path
+                   for path in files}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                results[path] = future.result()
+            except Exception as e:
+                results[path] = e
+
+    failed = sum(_print_result(path, results[path]) for path in files)
+    print(f"\n{len(files) - failed}/{len(files)} files converted.")
+    return 1 if failed else 0
+
+
+def _convert_rows_cli(files, hpo_path, options, args):
+    """One file at a time; its rows are normalized on a shared pool."""
+    ontology = load_hpo_ontology(hpo_path)
+    failed = 0
+    with ProcessPoolExecutor(max_workers=max(1, args.row_workers), initializer=_init_worker,
+                             initargs=(ontology,)) as pool:
+        for path in files:
+            stats = ConversionStats() if args.stats else None
+            try:
+                result = convert_file(path, ontology, stats=stats, row_pool=pool, **options)
+                if stats is not None:
+                    result["stats_summary"] = stats.to_dict()
+            except Exception as e:
+                result = e
+            failed += _print_result(path, result)
+    print(f"\n{len(files) - failed}/{len(files)} files converted.")
+    return 1 if failed else 0
+
+
+def _print_result(label, result):
+    """One status line per converted file/sheet; returns True if it failed."""
+    if isinstance(result, Exception):
+        print(f"FAILED  {label}: {result}")
+        return True
+    notes = []
+    if result["invalid_rows"]:
+        notes.append(f"{result['invalid_rows']} rows with invalid HPO codes")
+    if result["date_warnings"]:
+        notes.append("date warnings: " + ", ".join(result["date_warnings"]))
+    if result.get("violations"):
+        notes.append(f"{result['violations']} issues in {result['validation_report']}")
+    status = "WARN" if notes else "OK"
+    if "reused_rows" in result:
+        notes.append(f"{result['converted_rows']} converted, {result['reused_rows']} reused"
+                     + (f", delta {result['delta']}" if result.get("delta") else ""))
+    print(f"{status:<7} {label} -> {result['csv']} ({result['rows']} rows)"
+          + (f" [{'; '.join(notes)}]" if notes else ""))
+    if result.get("stats_summary"):
+        timings = ", ".join(f"{stage} {seconds:.2f}s"
+                            for stage, seconds in result["stats_summary"]["stages"].items())
+        print(f"        {timings}")
+    return False
+
+
+def _convert_sheets_cli(files, hpo_path, options, args):
+    # every (workbook, sheet) pair is its own job, so sheets of one workbook
+    # and different workbooks all share the process pool
+    options = dict(options)
+    output_dir = options.pop("output_dir")
+    wanted = None if args.sheets.strip().lower() == "all" else \
+        [s.strip() for s in args.sheets.split(",") if s.strip()]
+
+    jobs, results = {}, {}
+    for path in files:
+        try:
+            sheets = list_sheets(path) or [None]
+        except Exception as e:
+            results[path] = e
+            continue
+        if wanted is not None and sheets != [None]:
+            sheets = [s for s in sheets if s in wanted]
+            if not sheets:
+                results[path] = ValueError(f"none of the sheets {', '.join(wanted)} found")
+                continue
+        jobs[path] = sheets
+
+    n_jobs = sum(len(sheets) for sheets in jobs.values())
+    workers = max(1, min(args.workers or os.cpu_count() or 1, n_jobs or 1))
+    sheet_results = {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(hpo_path,)) as pool:
+        futures = {pool.submit(_convert_sheet_in_worker, path, sheet, options,
+                               args.merge_sheets and sheet is not None, output_dir,
+                               args.stats): (path, sheet)
+                   for path, sheets in jobs.items() for sheet in sheets}
+        for future in as_completed(futures):
+            try:
+                sheet_results[futures[future]] = future.result()
+            except Exception as e:
+                sheet_results[futures[future]] = e
+
+    failed = total = 0
+    for path in files:
+        if path in results:
+            total += 1
+            failed += _print_result(path, results[path])
+            continue
+        outcomes = [(sheet, sheet_results[(path, sheet)]) for sheet in jobs[path]]
+        if args.merge_sheets and jobs[path] != [None]:
+            errors = [f"{sheet}: {r}" for sheet, r in outcomes if isinstance(r, Exception)]
+            try:
+                merged = (RuntimeError("; ".join(errors)) if errors else
+                          write_merged_outputs([r for _, r in outcomes], path, output_dir))
+            except Exception as e:
+                merged = e
+            total += 1
+            failed += _print_result(f"{path} [{len(outcomes)} sheets merged]", merged)
+            continue
+        for sheet, result in outcomes:
+            total += 1
+            failed += _print_result(path if sheet is None else f"{path} [{sheet}]", result)
+
+    print(f"\n{total - failed}/{total} sheets converted.")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    # Re-import under the package name so worker processes pickle
+    # tools.emedgene_csv_converter_core functions, not __main__ ones.
+    from tools.emedgene_csv_converter_core import main as _main
+    sys.exit(_main())
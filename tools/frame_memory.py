@@ -0,0 +1,128 @@
+"""Smaller in-memory frames for loaded sheets and normalized HPO lists.
+
+compact_frame downcasts text columns: few distinct values -> category,
+otherwise Arrow-backed strings. Values are unchanged, so the CLEAN CSV and
+the reports written from a compacted frame are byte-identical.
+"""
+import importlib.util
+
+import numpy as np
+import pandas as pd
+
+
+CATEGORY_MAX_RATIO = 0.5  # distinct values / rows, at most
+MB = 1e6
+
+
+def _arrow_string_dtype():
+    """string[pyarrow] with NaN as missing value (pandas 3 "str"), or None."""
+    if importlib.util.find_spec("pyarrow") is None:
+        return None
+    try:
+        return pd.StringDtype("pyarrow", na_value=np.nan)
+    except TypeError:  # pandas < 2.1 has no na_value
+        return pd.StringDtype("pyarrow")
+
+
+def frame_memory(df):
+    """{column: bytes} with object/str contents counted in full."""
+    usage = df.memory_usage(deep=True, index=False)
+    return {col: int(usage[col]) for col in df.columns}
+
+
+def compact_frame(df, category_max_ratio=CATEGORY_MAX_RATIO):
+    """Downcast the text columns of df; returns (compact df, memory report).
+
+    Only columns whose values are all strings are touched (Excel columns
+    mixing dates, numbers and text keep their cells as they are). The
+    report is {"before_mb", "after_mb", "columns": {col: [dtype, before, after]}}.
+    """
+    before = frame_memory(df)
+    arrow_str = _arrow_string_dtype()
+    converted = {}
+    n = len(df)
+    for col in df.columns:
+        series = df[col]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            continue
+        if not (series.dtype == object or pd.api.types.is_string_dtype(series.dtype)):
+            continue
+        if pd.api.types.infer_dtype(series, skipna=True) != "string":
+            continue
+        if n and series.nunique(dropna=True) <= category_max_ratio * n:
+            converted[col] = series.astype("category")
+        elif arrow_str is not None and series.dtype != arrow_str:
+            converted[col] = series.astype(arrow_str)
+
+    if converted:
+        df = df.copy(deep=False)  # untouched columns stay shared with the input
+        for col, series in converted.items():
+            df[col] = series
+    after = frame_memory(df)
+
+    report = {
+        "before_mb": round(sum(before.values()) / MB, 3),
+        "after_mb": round(sum(after.values()) / MB, 3),
+        "columns": {str(col): [str(df[col].dtype), before[col], after[col]]
+                    for col in df.columns},
+    }
+    return df, report
+
+
+def format_memory_report(report):
+    """Multi-line text: totals, then every column largest first."""
+    lines = [f"Loaded frame: {report['before_mb']:.1f} MB -> {report['after_mb']:.1f} MB"]
+    columns = sorted(report["columns"].items(), key=lambda item: -item[1][1])
+    for col, (dtype, before, after) in columns:
+        lines.append(f"  {col[:28]:<28} {dtype:<10} {before / MB:8.2f} -> {after / MB:8.2f} MB")
+    return "\n".join(lines)
+
+
+class HPOTermLists:
+    """Normalized HPO lists as int32 positions in ontology.terms (CSR layout).
+
+    Row i holds ids[offsets[i]:offsets[i + 1]]; 4 bytes per code instead of a
+    "; "-joined Python string per row. to_series() gives back the exact text.
+    """
+
+    def __init__(self, terms, offsets, ids, index=None, name=None):
+        self.terms = terms
+        self.offsets = offsets
+        self.ids = ids
+        self.index = index
+        self.name = name
+
+    @classmethod
+    def from_series(cls, series, ontology):
+        """Encode a normalized ("; "-joined) column; ValueError for unknown codes."""
+        lookup = getattr(ontology, "index", None)
+        if lookup is None:
+            raise ValueError("HPO term ids need an HPOOntology, not a plain code set")
+        lists = [text.split("; ") if isinstance(text, str) and text else []
+                 for text in series.tolist()]
+        offsets = np.zeros(len(lists) + 1, dtype=np.int64)
+        np.cumsum([len(codes) for codes in lists], out=offsets[1:])
+        try:
+            ids = np.fromiter((lookup[c] for codes in lists for c in codes),
+                              dtype=np.int32, count=int(offsets[-1]))
+        except KeyError as e:
+            raise ValueError(f"{e.args[0]} is not a term of the ontology")
+        return cls(np.asarray(ontology.terms, dtype=object), offsets, ids,
+                   series.index, series.name)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    @property
+    def nbytes(self):
+        return self.offsets.nbytes + self.ids.nbytes
+
+    def codes(self, pos):
+        return self.terms[self.ids[self.offsets[pos]:self.offsets[pos + 1]]].tolist()
+
+    def text(self, pos):
+        return "; ".join(self.codes(pos))
+
+    def to_series(self):
+        values = [self.text(i) for i in range(len(self))]
+        return pd.Series(values, index=self.index, name=self.name, dtype=object)
@@ -0,0 +1,368 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+import numpy as np
+
+
+# Compiled index of hp.obo, stored in a per-user cache folder as
+# "hp_<sha256 prefix>.index.npz". It is keyed on the content of the ontology,
+# not its path: the --onefile build unpacks assets/hp.obo into a new temporary
+# folder on every launch, and a replaced hp.obo is re-parsed automatically.
+INDEX_FORMAT_VERSION = 3
+INDEX_SUFFIX = ".index.npz"
+CACHE_DIR_ENV = "GCLIP_CACHE_DIR"  # overrides the cache folder (tests, shared setups)
+INDEX_KEEP = 3  # compiled indexes kept per folder (older hp.obo versions are removed)
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def _signature(path):
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns
+
+
+def _sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def cache_dir():
+    return os.environ.get(CACHE_DIR_ENV) or os.path.join(os.path.expanduser("~"), ".g-clip")
+
+
+def index_paths(obo_path, sha256=None):
+    """Where the index of obo_path may live: the user cache, then the temp folder
+    (used when the home folder is not writable)."""
+    name = f"hp_{(sha256 or _sha256(obo_path))[:16]}{INDEX_SUFFIX}"
+    return [os.path.join(cache_dir(), name),
+            os.path.join(tempfile.gettempdir(), "g-clip", name)]
+
+
+def index_path_for(obo_path):
+    return index_paths(obo_path)[0]
+
+
+def parse_obo_terms(obo_path):
+    """Read the [Term] stanzas of hp.obo.
+
+    Returns {id: {"alt_ids": [...], "parents": [...], "obsolete": bool,
+    "replaced_by": str | None}} for every HP: term.
+    """
+    terms = {}
+    current = None
+
+    with open(obo_path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith("["):
+                current = {} if line == "[Term]" else None
+                continue
+            if current is None or ": " not in line:
+                continue
+
+            tag, value = line.split(": ", 1)
+            if tag == "id":
+                if value.startswith("HP:"):
+                    current.update(alt_ids=[], parents=[], obsolete=False,
+                                   replaced_by=None)
+                    terms[value] = current
+                else:
+                    current = None
+            elif "alt_ids" not in current:
+                continue
+            elif tag == "alt_id":
+                current["alt_ids"].append(value.split()[0])
+            elif tag == "is_a":
+                current["parents"].append(value.split()[0])
+            elif tag == "is_obsolete":
+                current["obsolete"] = value.startswith("true")
+            elif tag == "replaced_by":
+                current["replaced_by"] = value.split()[0]
+
+    return terms
+
+
+def _ancestor_closure(parent_idx):
+    """Transitive is_a closure as CSR arrays (offsets, ancestor indices)."""
+    n = len(parent_idx)
+    closure = [None] * n
+    visiting = set()
+
+    for start in range(n):
+        if closure[start] is not None:
+            continue
+        # iterative post-order walk, so deep chains do not hit recursion limits
+        stack = [(start, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if closure[node] is not None:
+                continue
+            if not expanded:
+                if node in visiting:
+                    continue
+                visiting.add(node)
+                stack.append((node, True))
+                stack.extend((p, False) for p in parent_idx[node]
+                             if closure[p] is None)
+                continue
+            ancestors = set()
+            for p in parent_idx[node]:
+                ancestors.add(p)
+                # a cycle leaves the parent unresolved; keep the direct link
+                if closure[p] is not None:
+                    ancestors.update(closure[p])
+            closure[node] = ancestors
+
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(a) for a in closure])
+    indices = np.fromiter((a for anc in closure for a in sorted(anc)),
+                          dtype=np.int32, count=int(offsets[-1]))
+    return offsets, indices
+
+
+class HPOOntology:
+    """HPO terms with alt_id/obsolete remapping and a precomputed is_a closure.
+
+    Terms are addressed by their position in the sorted ``terms`` tuple. The
+    ancestor closure is stored as CSR arrays; ``is_a`` materializes a term's
+    ancestor set on first use so later checks are O(1).
+    """
+
+    def __init__(self, terms, obsolete, alt_keys, alt_values,
+                 replaced_keys, replaced_values, anc_offsets, anc_indices):
+        self.terms = tuple(terms)
+        self.index = {t: i for i, t in enumerate(self.terms)}
+        self.codes = frozenset(self.terms)
+        self.obsolete = frozenset(
+            self.terms[i] for i in np.flatnonzero(obsolete))
+        self.alt_ids = dict(zip(alt_keys, alt_values))
+        self.replaced_by = dict(zip(replaced_keys, replaced_values))
+        self.anc_offsets = anc_offsets
+        self.anc_indices = anc_indices
+        self._ancestor_sets = {}
+
+    @classmethod
+    def from_obo(cls, obo_path):
+        parsed = parse_obo_terms(obo_path)
+        terms = sorted(parsed)
+        index = {t: i for i, t in enumerate(terms)}
+
+        parent_idx = [[index[p] for p in parsed[t]["parents"] if p in index]
+                      for t in terms]
+        anc_offsets, anc_indices = _ancestor_closure(parent_idx)
+
+        alt_keys, alt_values = [], []
+        for t in terms:
+            for alt in parsed[t]["alt_ids"]:
+                if alt not in index:
+                    alt_keys.append(alt)
+                    alt_values.append(t)
+
+        replaced = [(t, parsed[t]["replaced_by"]) for t in terms
+                    if parsed[t]["obsolete"] and parsed[t]["replaced_by"]]
+
+        return cls(
+            terms=terms,
+            obsolete=np.array([parsed[t]["obsolete"] for t in terms], dtype=bool),
+            alt_keys=alt_keys,
+            alt_values=alt_values,
+            replaced_keys=[k for k, _ in replaced],
+            replaced_values=[v for _, v in replaced],
+            anc_offsets=anc_offsets,
+            anc_indices=anc_indices,
+        )
+
+    def to_arrays(self):
+        return {
+            "terms": np.array(self.terms, dtype=str),
+            "obsolete": np.array([t in self.obsolete for t in self.terms], dtype=bool),
+            "alt_keys": np.array(list(self.alt_ids), dtype=str),
+            "alt_values": np.array(list(self.alt_ids.values()), dtype=str),
+            "replaced_keys": np.array(list(self.replaced_by), dtype=str),
+            "replaced_values": np.array(list(self.replaced_by.values()), dtype=str),
+            "anc_offsets": self.anc_offsets,
+            "anc_indices": self.anc_indices,
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        return cls(
+            terms=arrays["terms"].tolist(),
+            obsolete=arrays["obsolete"],
+            alt_keys=arrays["alt_keys"].tolist(),
+            alt_values=arrays["alt_values"].tolist(),
+            replaced_keys=arrays["replaced_keys"].tolist(),
+            replaced_values=arrays["replaced_values"].tolist(),
+            anc_offsets=arrays["anc_offsets"],
+            anc_indices=arrays["anc_indices"],
+        )
+
+    def __len__(self):
+        return len(self.terms)
+
+    def __contains__(self, code):
+        return code in self.index
+
+    def canonicalize(self, code):
+        """Map a code to its current primary id, or None if it is unknown.
+
+        alt_ids resolve to their primary term and obsolete terms follow
+        replaced_by; obsolete terms without a replacement are kept as-is.
+        """
+        seen = set()
+        while code not in seen:
+            seen.add(code)
+            code = self.alt_ids.get(code, code)
+            if code not in self.index:
+                return None
+            replacement = self.replaced_by.get(code)
+            if replacement is None:
+                return code
+            code = replacement
+        return None
+
+    def _ancestors_of(self, i):
+        anc = self._ancestor_sets.get(i)
+        if anc is None:
+            anc = frozenset(self.anc_indices[
+                self.anc_offsets[i]:self.anc_offsets[i + 1]].tolist())
+            self._ancestor_sets[i] = anc
+        return anc
+
+    def ancestors(self, code):
+        i = self.index[self.canonicalize(code) or code]
+        return frozenset(self.terms[a] for a in self._ancestors_of(i))
+
+    def is_a(self, code, ancestor):
+        """True if code equals ancestor or is one of its descendants."""
+        child = self.index.get(self.canonicalize(code))
+        parent = self.index.get(self.canonicalize(ancestor))
+        if child is None or parent is None:
+            return False
+        return child == parent or parent in self._ancestors_of(child)
+
+
+def _write_index(index_path, ontology, meta):
+    # a temp file of our own: other processes may be writing the same index
+    folder = os.path.dirname(index_path)
+    os.makedirs(folder, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=folder, prefix=".hp_", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, meta=np.array([json.dumps(meta)]), **ontology.to_arrays())
+        os.replace(tmp_path, index_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _read_index(index_path):
+    with np.load(index_path, allow_pickle=False) as z:
+        meta = json.loads(str(z["meta"][0]))
+        if meta.get("version") != INDEX_FORMAT_VERSION:
+            return meta, None
+        arrays = {name: z[name] for name in z.files if name != "meta"}
+    return meta, HPOOntology.from_arrays(arrays)
+
+
+def _prune_indexes(folder, keep=INDEX_KEEP):
+    indexes = [os.path.join(folder, name) for name in os.listdir(folder)
+               if name.startswith("hp_") and name.endswith(INDEX_SUFFIX)]
+    indexes.sort(key=os.path.getmtime, reverse=True)
+    for path in indexes[keep:]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def build_hpo_index(obo_path, sha256=None, ontology=None):
+    """Parse hp.obo and (re)write its compiled index. Returns the ontology.
+
+    ontology, an already parsed copy of obo_path, is written as is.
+    """
+    sha256 = sha256 or _sha256(obo_path)
+    if ontology is None:
+        ontology = HPOOntology.from_obo(obo_path)
+    meta = {"version": INDEX_FORMAT_VERSION, "sha256": sha256}
+
+    for index_path in index_paths(obo_path, sha256):
+        try:
+            _write_index(index_path, ontology, meta)
+        except OSError:
+            continue
+        _prune_indexes(os.path.dirname(index_path))
+        break
+
+    return ontology
+
+
+def _load_or_build(obo_path):
+    # hashing hp.obo takes a few ms; parsing it takes seconds
+    sha256 = _sha256(obo_path)
+
+    for index_path in index_paths(obo_path, sha256):
+        if not os.path.exists(index_path):
+            continue
+        try:
+            meta, ontology = _read_index(index_path)
+        except Exception:
+            continue
+        if ontology is not None and meta.get("sha256") == sha256:
+            return ontology
+
+    return build_hpo_index(obo_path, sha256)
+
+
+def load_hpo_ontology(obo_path):
+    """Return the HPOOntology of an .obo file.
+
+    Results are kept in memory for the session and revalidated with a single
+    os.stat call, so repeated conversions do not touch the ontology again.
+    """
+    key = os.path.abspath(obo_path)
+    signature = _signature(key)
+
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+        ontology = _load_or_build(key)
+        _cache[key] = (signature, ontology)
+        return ontology
+
+
+def load_hpo_codes(obo_path):
+    """Return the primary HPO ids of an .obo file as a frozenset."""
+    return load_hpo_ontology(obo_path).codes
+
+
+def invalidate_hpo_cache(obo_path=None):
+    with _cache_lock:
+        if obo_path is None:
+            _cache.clear()
+        else:
+            _cache.pop(os.path.abspath(obo_path), None)
+
+
+def rebuild_hpo_index(obo_path, ontology=None, sha256=None):
+    """Force a rebuild after hp.obo was replaced (e.g. by the HPO updater).
+
+    The HPO updater passes the ontology it already parsed (and the sha256 of
+    the new file), so hp.obo is neither parsed nor hashed again.
+    """
+    key = os.path.abspath(obo_path)
+    with _cache_lock:
+        _cache.pop(key, None)
+        ontology = build_hpo_index(key, sha256, ontology)
+        _cache[key] = (_signature(key), ontology)
+    return ontology
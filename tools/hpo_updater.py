@@ -0,0 +1,93 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+from tools.hpo_index import HPOOntology, rebuild_hpo_index
+
+
+HPO_URL = "https://raw.githubusercontent.com/obophenotype/human-phenotype-ontology/master/hp.obo"
+
+# ETag / Last-Modified of the installed hp.obo, stored as "<file>.meta.json"
+META_SUFFIX = ".meta.json"
+DOWNLOAD_TIMEOUT = 60
+CHUNK_SIZE = 1 << 16
+
+
+def meta_path_for(obo_path):
+    return obo_path + META_SUFFIX
+
+
+def _read_meta(obo_path):
+    try:
+        with open(meta_path_for(obo_path), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_meta(obo_path, meta):
+    with open(meta_path_for(obo_path), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+
+
+def update_hpo_file(obo_path, url=HPO_URL, timeout=DOWNLOAD_TIMEOUT):
+    """Download hp.obo if it changed upstream and swap it in atomically.
+
+    Sends If-None-Match / If-Modified-Since from the previous download, streams
+    the body to a temp file in the same folder, checks that it parses as an
+    ontology with terms, then replaces obo_path and writes the compiled index
+    of the ontology it parsed.
+    Safe to call from a worker thread (no Tk). Returns a summary dict with
+    status "updated" or "not-modified".
+    """
+    meta = _read_meta(obo_path) if os.path.exists(obo_path) else {}
+
+    request = urllib.request.Request(url)
+    if meta.get("url") == url:
+        if meta.get("etag"):
+            request.add_header("If-None-Match", meta["etag"])
+        if meta.get("last_modified"):
+            request.add_header("If-Modified-Since", meta["last_modified"])
+
+    try:
+        response = urllib.request.urlopen(request, timeout=timeout)
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            return {"status": "not-modified", "path": obo_path}
+        raise
+
+    folder = os.path.dirname(os.path.abspath(obo_path))
+    os.makedirs(folder, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=folder, prefix=".hp-", suffix=".obo.download")
+    digest = hashlib.sha256()
+    try:
+        with response, os.fdopen(fd, "wb") as tmp:
+            for block in iter(lambda: response.read(CHUNK_SIZE), b""):
+                tmp.write(block)
+                digest.update(block)
+            headers = response.headers
+
+        # never install something that does not parse
+        ontology = HPOOntology.from_obo(tmp_path)
+        if len(ontology) == 0:
+            raise ValueError("downloaded file contains no HPO terms")
+
+        os.replace(tmp_path, obo_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    _write_meta(obo_path, {
+        "url": url,
+        "etag": headers.get("ETag"),
+        "last_modified": headers.get("Last-Modified"),
+        "downloaded_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    })
+    # the index is written from the ontology parsed above, not parsed again
+    rebuild_hpo_index(obo_path, ontology, digest.hexdigest())
+
+    return {"status": "updated", "path": obo_path, "terms": len(ontology)}
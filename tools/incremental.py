@@ -0,0 +1,194 @@
+"""Incremental re-conversion: only rows that changed since the last run.
+
+The state of the last incremental run sits next to its output as
+"<name>_FINGERPRINTS.json": per-sample row fingerprints and invalid codes,
+the settings and ontology they were produced with, and the date formats.
+"""
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+from tools.emedgene_csv_converter_core import (DateColumnProfile, _atomic_write,
+                                               _check_cancelled, _report_progress,
+                                               header_row_default, hpo_column_default,
+                                               output_paths, preselected_date_columns,
+                                               read_excel_table, run_conversion,
+                                               sample_id_column_default, write_clean_csv,
+                                               write_outputs)
+from tools.hpo_index import HPOOntology
+
+
+INCREMENTAL_STATE_VERSION = 2
+
+
+def _output_sibling(csv_path, suffix):
+    return csv_path[:-len("_CLEAN.csv")] + suffix
+
+
+def ontology_fingerprint(valid_hpo_codes):
+    """Short hash of what HPO validation depends on (codes and remappings)."""
+    h = hashlib.sha1()
+    if isinstance(valid_hpo_codes, HPOOntology):
+        h.update("\n".join(valid_hpo_codes.terms).encode("utf-8"))
+        for mapping in (valid_hpo_codes.alt_ids, valid_hpo_codes.replaced_by):
+            h.update(json.dumps(sorted(mapping.items())).encode("utf-8"))
+    else:
+        h.update("\n".join(sorted(valid_hpo_codes)).encode("utf-8"))
+    return h.hexdigest()
+
+
+def row_fingerprints(df):
+    """One uint64 per row over the raw cell values.
+
+    Cells are hashed as text, integral floats like ints and missing cells
+    as "", so a column that switches between int and float dtype across
+    exports (e.g. after one new blank cell) keeps its fingerprints.
+    """
+    canonical = {}
+    for col in df.columns:
+        values = df[col]
+        if values.dtype.kind == "f":
+            values = pd.Series([int(v) if v == v and float(v).is_integer() else v
+                                for v in values], index=values.index, dtype=object)
+        canonical[col] = values.astype(object).where(values.notna(), "").map(str)
+    frame = pd.DataFrame(canonical, index=df.index)
+    return pd.util.hash_pandas_object(frame, index=False).to_numpy()
+
+
+def _read_state(state_path):
+    try:
+        with open(state_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def convert_file_incremental(input_path, valid_hpo_codes, header_row=header_row_default,
+                             hpo_colname=hpo_column_default,
+                             sample_id_col=sample_id_column_default,
+                             date_cols=None, output_dir=None, delta=False, df=None,
+                             reader=None, sheet=None, progress=None, cancel_event=None):
+    """convert_file that only normalizes rows that changed since the last run.
+
+    Rows are keyed by sample ID and fingerprinted on their raw values. Rows
+    whose sample and fingerprint match the previous run are copied from the
+    previous _CLEAN.csv; new or changed rows are converted with the date
+    formats sniffed on the first run. Anything that invalidates the cache
+    (other settings, columns or ontology, an edited _CLEAN.csv) falls back
+    to a full conversion. The full _CLEAN.csv is always rewritten; delta=True
+    also writes <name>_DELTA_CLEAN.csv with only the new or changed samples.
+    Samples without an ID or with duplicate IDs are always converted.
+    """
+    if df is None:
+        _report_progress(progress, "read")
+        df = read_excel_table(input_path, header_row, reader, sheet)
+    if date_cols is None:
+        date_cols = [c for c in df.columns if c in preselected_date_columns]
+
+    paths = output_paths(input_path, output_dir, sheet)
+    state_path = _output_sibling(paths["csv"], "_FINGERPRINTS.json")
+    settings = {
+        "version": INCREMENTAL_STATE_VERSION,
+        "columns": list(df.columns),
+        "hpo_colname": hpo_colname,
+        "sample_id_col": sample_id_col,
+        "date_cols": list(date_cols),
+        "ontology": ontology_fingerprint(valid_hpo_codes),
+    }
+
+    fingerprints = row_fingerprints(df)
+    if sample_id_col in df.columns:
+        keys = df[sample_id_col].astype(object).where(df[sample_id_col].notna(), "").astype(str)
+    else:
+        keys = pd.Series("", index=df.index)
+    cacheable = (keys != "") & ~keys.duplicated(keep=False)
+
+    # rows of the previous output that can be reused as-is
+    reuse = pd.Series(False, index=df.index)
+    state = _read_state(state_path)
+    previous_rows = {}
+    date_formats = None
+    if (state and state.get("settings") == settings and os.path.exists(paths["csv"])
+            and state.get("csv_signature") == list(_csv_signature(paths["csv"]))):
+        previous_rows = state["rows"]
+        old = pd.Series([previous_rows.get(k, (None,))[0] for k in keys], index=df.index,
+                        dtype=object)
+        reuse = cacheable & (old == pd.Series(fingerprints.tolist(), index=df.index))
+        date_formats = {col: DateColumnProfile(column=col, **fmt)
+                        for col, fmt in state.get("date_formats", {}).items()} or None
+
+    _check_cancelled(cancel_event)
+    changed = df[~reuse.to_numpy()]
+    date_profiles = {}
+    processed, invalid_records = run_conversion(
+        df=changed,
+        hpo_colname=hpo_colname,
+        date_cols=date_cols,
+        valid_hpo_codes=valid_hpo_codes,
+        sample_id_col=sample_id_col,
+        date_report=date_profiles,
+        date_formats=date_formats,
+        progress=progress,
+        cancel_event=cancel_event
+    )
+
+    # previous rows: converted columns come back as text, exactly as they were
+    # written; the other columns are taken from df, so they print as they
+    # would in a full run even if their dtype changed
+    pieces = [processed] if len(processed) else []
+    if reuse.any():
+        cached = pd.read_csv(paths["csv"], skiprows=1, dtype=str, keep_default_na=False)
+        cached.index = cached[sample_id_col].astype(str)
+        reused = df[reuse.to_numpy()].copy()
+        converted = [c for c in dict.fromkeys([*date_cols, hpo_colname]) if c in df.columns]
+        for col in converted:
+            reused[col] = cached.loc[keys[reuse].to_numpy(), col].to_numpy()
+        pieces.append(reused)
+        for label, key in zip(reused.index, keys[reuse]):
+            bad_codes = previous_rows[key][1]
+            if bad_codes:
+                invalid_records.append((label, key, bad_codes))
+    full = pd.concat(pieces).loc[df.index] if reuse.any() else processed
+    position = {label: i for i, label in enumerate(df.index)}
+    invalid_records.sort(key=lambda rec: position[rec[0]])
+
+    _check_cancelled(cancel_event)
+    _report_progress(progress, "write")
+    paths = write_outputs(full, invalid_records, date_profiles, input_path, output_dir, sheet)
+    paths["delta"] = None
+    if delta:
+        paths["delta"] = _output_sibling(paths["csv"], "_DELTA_CLEAN.csv")
+        write_clean_csv(processed, paths["delta"])
+
+    invalid_by_label = {label: codes for label, _, codes in invalid_records}
+    stored_formats = dict(state.get("date_formats", {})) if date_formats else {}
+    for col, p in date_profiles.items():
+        stored_formats.setdefault(col, {"date_format": p.date_format, "dayfirst": p.dayfirst,
+                                        "ambiguous": p.ambiguous})
+    with _atomic_write(state_path) as f:
+        json.dump({
+            "settings": settings,
+            "csv_signature": list(_csv_signature(paths["csv"])),
+            "date_formats": stored_formats,
+            "rows": {key: [int(fp), invalid_by_label.get(label, [])]
+                     for label, key, fp, ok in zip(df.index, keys, fingerprints, cacheable)
+                     if ok},
+        }, f)
+
+    return {
+        "input": input_path,
+        "sheet": sheet,
+        "rows": len(full),
+        "converted_rows": len(processed),
+        "reused_rows": int(reuse.sum()),
+        "invalid_rows": len(invalid_records),
+        "date_warnings": sorted(c for c, p in date_profiles.items() if p.needs_attention),
+        **paths,
+    }
+
+
+def _csv_signature(path):
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns
@@ -0,0 +1,324 @@
+"""Virtualized side-by-side preview of a sheet and its converted output.
+
+Only the rows that are on screen are drawn: the grid keeps one canvas item
+per visible cell and rewrites their text when it scrolls, so a 100k-row
+sheet costs the same to show as a 100-row one. Rows are formatted a page
+at a time from the loaded frames and the last few pages are cached.
+"""
+import tkinter as tk
+from collections import OrderedDict
+from tkinter import ttk
+
+import numpy as np
+import pandas as pd
+
+from tools.frame_memory import HPOTermLists, compact_frame
+
+
+PAGE_ROWS = 500
+CACHED_PAGES = 8
+WRONG_DATE = "WRONG_DATE_CONVERSION"
+
+ROW_HEIGHT = 20
+CHAR_WIDTH = 7
+MIN_COL_WIDTH = 60
+MAX_COL_WIDTH = 220
+MARK_COLORS = {"date": "#f8c9c9", "hpo": "#fbe7a1", "rule": "#cfe0fb"}
+
+
+def _cell_text(value):
+    if value is None or (np.isscalar(value) or value is pd.NA) and pd.isna(value):
+        return ""
+    if isinstance(value, pd.Timestamp):
+        return value.strftime("%Y-%m-%d") if value == value.normalize() else str(value)
+    return str(value)
+
+
+# ---------------- data (no Tk, used by the tests) ----------------
+class PreviewData:
+    """Input and converted frames, served row by row from cached pages.
+
+    marks maps (row position, column) to "date" for WRONG_DATE_CONVERSION
+    cells, "hpo" for HPO cells that lost codes (dropped holds the codes) and
+    "rule" for cells with column-rule violations (messages in rule_messages).
+    With an ontology, the converted HPO column is kept as term ids
+    (HPOTermLists) and the rewritten date columns as categoricals.
+    """
+
+    def __init__(self, source, converted=None, invalid_records=(), date_cols=(),
+                 hpo_colname=None, ontology=None, violations=None):
+        self.source = source
+        self.converted = converted
+        self.columns = [str(c) for c in source.columns]
+        self.marks = {}
+        self.dropped = {}
+        self.rule_messages = {}
+        self.hpo_lists = None
+        self._hpo_position = None
+        self._pages = OrderedDict()
+
+        if converted is not None:
+            for col in date_cols:
+                if col in converted.columns:
+                    j = list(converted.columns).index(col)
+                    wrong = converted[col].astype(object).to_numpy() == WRONG_DATE
+                    for pos in np.flatnonzero(wrong).tolist():
+                        self.marks[(pos, j)] = "date"
+        if invalid_records and hpo_colname in source.columns:
+            j = list(source.columns).index(hpo_colname)
+            positions = source.index.get_indexer([label for label, _, _ in invalid_records])
+            for pos, (_, _, codes) in zip(positions.tolist(), invalid_records):
+                if pos >= 0:
+                    self.marks[(pos, j)] = "hpo"
+                    self.dropped[pos] = codes
+        self._mark_rules(violations or [])
+
+        if converted is not None and ontology is not None:
+            self._compact(hpo_colname, ontology)
+
+    def _mark_rules(self, violations):
+        rules = [v for v in violations
+                 if v.rule not in ("hpo_code", "date") and v.row is not None]
+        if not rules:
+            return
+        columns = {c: j for j, c in enumerate(self.source.columns)}
+        positions = self.source.index.get_indexer([v.row for v in rules])
+        for pos, v in zip(positions.tolist(), rules):
+            if pos >= 0 and v.column in columns:
+                key = (pos, columns[v.column])
+                self.marks.setdefault(key, "rule")
+                self.rule_messages.setdefault(key, []).append(f"{v.rule}: {v.message}")
+
+    def _compact(self, hpo_colname, ontology):
+        converted = self.converted
+        if hpo_colname in converted.columns:
+            try:
+                self.hpo_lists = HPOTermLists.from_series(converted[hpo_colname], ontology)
+                self._hpo_position = list(converted.columns).index(hpo_colname)
+                converted = converted.drop(columns=[hpo_colname])
+            except ValueError:
+                pass  # plain code set: keep the strings
+        self.converted, _ = compact_frame(converted)
+
+    def __len__(self):
+        return len(self.source)
+
+    def column_widths(self, sample_rows=200):
+        """Pixel widths from the header and the first rows, clamped."""
+        first = self._page(0)[0][:sample_rows]
+        widths = []
+        for j, name in enumerate(self.columns):
+            longest = max([len(name)] + [len(row[j]) for row in first])
+            widths.append(min(MAX_COL_WIDTH, max(MIN_COL_WIDTH, (longest + 2) * CHAR_WIDTH)))
+        return widths
+
+    def row(self, pos):
+        """(input cells, converted cells or None) as text for one row position."""
+        page, offset = divmod(pos, PAGE_ROWS)
+        inputs, outputs = self._page(page)
+        return inputs[offset], outputs[offset] if outputs is not None else None
+
+    def _page(self, page):
+        cached = self._pages.get(page)
+        if cached is not None:
+            self._pages.move_to_end(page)
+            return cached
+
+        start = page * PAGE_ROWS
+        outputs = None
+        if self.converted is not None:
+            outputs = self._format(self.converted, start)
+            if self.hpo_lists is not None:
+                for offset, cells in enumerate(outputs):
+                    cells.insert(self._hpo_position, self.hpo_lists.text(start + offset))
+        cached = (self._format(self.source, start), outputs)
+        self._pages[page] = cached
+        if len(self._pages) > CACHED_PAGES:
+            self._pages.popitem(last=False)
+        return cached
+
+    @staticmethod
+    def _format(df, start):
+        chunk = df.iloc[start:start + PAGE_ROWS]
+        return [[_cell_text(v) for v in values]
+                for values in chunk.itertuples(index=False, name=None)]
+
+    def describe(self, pos, col):
+        """Status-line text for a marked cell, or None."""
+        kind = self.marks.get((pos, col))
+        if kind == "date":
+            return f"Row {pos + 2}: date could not be converted"
+        if kind == "hpo":
+            return f"Row {pos + 2}: dropped {', '.join(self.dropped[pos])}"
+        if kind == "rule":
+            return f"Row {pos + 2}: {'; '.join(self.rule_messages[(pos, col)])}"
+        return None
+
+
+# ---------------- widgets ----------------
+class VirtualGrid(tk.Frame):
+    """A header plus a fixed pool of cells, refilled from a row source."""
+
+    def __init__(self, parent, title, on_cell=None):
+        super().__init__(parent)
+        tk.Label(self, text=title, font=("Arial", 9, "bold"), anchor="w").pack(fill="x")
+        self.header = tk.Canvas(self, height=ROW_HEIGHT, highlightthickness=0, bg="#e4e4e4")
+        self.header.pack(fill="x")
+        self.body = tk.Canvas(self, highlightthickness=0, bg="white")
+        self.body.pack(fill="both", expand=True)
+        self.on_cell = on_cell
+
+        self.columns, self.widths, self.lefts = [], [], []
+        self.cells = []  # per visible row: [(rect, text), ...]
+        self.first = 0
+        self.body.bind("<Button-1>", self._clicked)
+
+    @property
+    def visible_rows(self):
+        return max(1, self.body.winfo_height() // ROW_HEIGHT)
+
+    def set_columns(self, columns, widths):
+        self.columns, self.widths = columns, widths
+        self.lefts = np.concatenate([[0], np.cumsum(widths)]).tolist()
+        total = self.lefts[-1]
+        for canvas in (self.header, self.body):
+            canvas.delete("all")
+            canvas.configure(scrollregion=(0, 0, total, 0))
+        for j, name in enumerate(columns):
+            self.header.create_text(self.lefts[j] + 4, ROW_HEIGHT // 2, anchor="w",
+                                    text=self._fit(name, j), font=("Arial", 9, "bold"))
+        self.cells = []
+
+    def _fit(self, text, j):
+        limit = max(1, self.widths[j] // CHAR_WIDTH - 1)
+        return text if len(text) <= limit else text[:limit - 1] + "…"
+
+    def _ensure_pool(self, n_rows):
+        # one rect + text item per visible cell, created once per size change
+        while len(self.cells) < n_rows:
+            y = len(self.cells) * ROW_HEIGHT
+            row = []
+            for j, left in enumerate(self.lefts[:-1]):
+                rect = self.body.create_rectangle(left, y, left + self.widths[j], y + ROW_HEIGHT,
+                                                  outline="#eeeeee", fill="")
+                text = self.body.create_text(left + 4, y + ROW_HEIGHT // 2, anchor="w",
+                                             font=("Arial", 9))
+                row.append((rect, text))
+            self.cells.append(row)
+
+    def draw(self, first, rows, marks):
+        """Show rows[i] (list of cell texts or None) at slot i; marks: {(pos, col): kind}."""
+        self.first = first
+        self._ensure_pool(len(rows))
+        for i, slot in enumerate(self.cells):
+            values = rows[i] if i < len(rows) else None
+            for j, (rect, text) in enumerate(slot):
+                if values is None:
+                    self.body.itemconfigure(text, text="")
+                    self.body.itemconfigure(rect, fill="")
+                    continue
+                self.body.itemconfigure(text, text=self._fit(values[j], j))
+                self.body.itemconfigure(rect, fill=MARK_COLORS.get(marks.get((first + i, j)), ""))
+
+    def xview(self, *args):
+        self.header.xview(*args)
+        self.body.xview(*args)
+
+    def _clicked(self, event):
+        if self.on_cell is None or not self.lefts:
+            return
+        x = self.body.canvasx(event.x)
+        j = int(np.searchsorted(self.lefts, x, side="right")) - 1
+        if 0 <= j < len(self.columns):
+            self.on_cell(self.first + event.y // ROW_HEIGHT, j)
+
+
+class PreviewPane(tk.Frame):
+    """Input and converted grids sharing one vertical and one horizontal scroll."""
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.data = None
+        self.first = 0
+        self._redraw_pending = False
+
+        grids = tk.Frame(self)
+        grids.pack(fill="both", expand=True)
+        self.input_grid = VirtualGrid(grids, "Input", on_cell=self._cell_clicked)
+        self.output_grid = VirtualGrid(grids, "Converted", on_cell=self._cell_clicked)
+        self.input_grid.pack(side="left", fill="both", expand=True)
+        self.output_grid.pack(side="left", fill="both", expand=True, padx=(4, 0))
+        self.vbar = ttk.Scrollbar(grids, orient="vertical", command=self.yview)
+        self.vbar.pack(side="left", fill="y")
+        self.hbar = ttk.Scrollbar(self, orient="horizontal", command=self.xview)
+        self.hbar.pack(fill="x")
+        self.input_grid.body.configure(xscrollcommand=self.hbar.set)
+
+        tk.Label(self, text="Red: WRONG_DATE_CONVERSION   Yellow: invalid HPO codes dropped   "
+                            "Blue: rule violations",
+                 font=("Arial", 8)).pack(anchor="w")
+        self.status = tk.Label(self, text="Load a file and press Preview.", font=("Arial", 9),
+                               anchor="w")
+        self.status.pack(fill="x")
+
+        for grid in (self.input_grid, self.output_grid):
+            grid.body.bind("<Configure>", lambda e: self._schedule_redraw())
+            grid.body.bind("<MouseWheel>", self._wheel)
+            grid.body.bind("<Button-4>", lambda e: self.yview("scroll", -3, "units"))
+            grid.body.bind("<Button-5>", lambda e: self.yview("scroll", 3, "units"))
+
+    def set_data(self, data):
+        self.data, self.first = data, 0
+        widths = data.column_widths()
+        for grid in (self.input_grid, self.output_grid):
+            grid.set_columns(data.columns, widths)
+        self.xview("moveto", 0)
+        self._schedule_redraw()
+
+    # -------- scrolling --------
+    def yview(self, *args):
+        if self.data is None:
+            return
+        visible = self.input_grid.visible_rows
+        if args[0] == "moveto":
+            first = int(float(args[1]) * len(self.data))
+        else:
+            step = visible if args[2] == "pages" else 1
+            first = self.first + int(args[1]) * step
+        self.first = max(0, min(first, len(self.data) - visible))
+        self._schedule_redraw()
+
+    def xview(self, *args):
+        self.input_grid.xview(*args)
+        self.output_grid.xview(*args)
+
+    def _wheel(self, event):
+        self.yview("scroll", -3 if event.delta > 0 else 3, "units")
+
+    def _schedule_redraw(self):
+        # a fast scrollbar drag sends many events; draw once per idle period
+        if not self._redraw_pending:
+            self._redraw_pending = True
+            self.after_idle(self._redraw)
+
+    def _redraw(self):
+        self._redraw_pending = False
+        if self.data is None:
+            return
+        n = len(self.data)
+        visible = self.input_grid.visible_rows
+        rows = [self.data.row(pos) for pos in range(self.first, min(n, self.first + visible))]
+        self.input_grid.draw(self.first, [r[0] for r in rows], self.data.marks)
+        self.output_grid.draw(self.first, [r[1] for r in rows], self.data.marks)
+        if n:
+            self.vbar.set(self.first / n, min(1.0, (self.first + visible) / n))
+            self.status.config(text=f"Rows {self.first + 1:,}–{self.first + len(rows):,} "
+                                    f"of {n:,}   ({len(self.data.marks):,} highlighted cells)")
+        else:
+            self.vbar.set(0, 1)
+            self.status.config(text="No rows.")
+
+    def _cell_clicked(self, pos, col):
+        if self.data is not None and pos < len(self.data):
+            self.status.config(text=self.data.describe(pos, col) or
+                               f"Row {pos + 2}, {self.data.columns[col]}")
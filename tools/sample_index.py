@@ -0,0 +1,117 @@
+"""Persistent index of converted sample IDs, for duplicate detection across batches.
+
+One SQLite table, keyed on the sample ID (primary key, so lookups stay
+index-only with hundreds of thousands of samples), remembering the first
+file that submitted each sample, when, and a key of that file's content:
+
+    samples(sample_id TEXT PRIMARY KEY, source TEXT, converted_at TEXT, run_key TEXT)
+
+Converting the very same file again (same run_key, see content_key) does
+not report its own samples; a file saved over the same name with other
+content does, since that is a resubmission.
+
+A batch is checked and recorded with set-based statements: the batch IDs go
+into a temporary table, one join finds the earlier submissions and one
+INSERT ... SELECT adds the new ones, all in a single write transaction, so
+parallel conversions sharing the index see each other's samples.
+"""
+import hashlib
+import os
+import sqlite3
+from datetime import datetime
+
+
+DEFAULT_INDEX_PATH = os.path.join(os.path.expanduser("~"), ".g-clip", "sample_index.sqlite")
+BUSY_TIMEOUT = 30  # seconds to wait for another process holding the write lock
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS samples (
+    sample_id TEXT PRIMARY KEY,
+    source TEXT NOT NULL,
+    converted_at TEXT NOT NULL,
+    run_key TEXT
+) WITHOUT ROWID
+"""
+
+
+def content_key(path, sheet=None):
+    """sha256 of a file's bytes (plus the sheet name): the run_key of a conversion."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest() + (f":{sheet}" if sheet is not None else "")
+
+
+class SampleIndex:
+    """Sample IDs converted so far; only the path is kept (picklable, thread-safe)."""
+
+    def __init__(self, path=None):
+        self.path = os.path.abspath(path or DEFAULT_INDEX_PATH)
+
+    def _connect(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        con = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, isolation_level=None)
+        con.execute(_SCHEMA)
+        columns = [row[1] for row in con.execute("PRAGMA table_info(samples)")]
+        if "run_key" not in columns:  # index written before run keys existed
+            con.execute("ALTER TABLE samples ADD COLUMN run_key TEXT")
+        return con
+
+    def __len__(self):
+        con = self._connect()
+        try:
+            return con.execute("SELECT COUNT(*) FROM samples").fetchone()[0]
+        finally:
+            con.close()
+
+    @staticmethod
+    def _load_batch(con, sample_ids):
+        con.execute("CREATE TEMP TABLE IF NOT EXISTS batch (sample_id TEXT PRIMARY KEY)")
+        con.execute("DELETE FROM batch")
+        con.executemany("INSERT OR IGNORE INTO batch VALUES (?)",
+                        ((str(s),) for s in sample_ids))
+
+    @staticmethod
+    def _earlier(con, run_key=None):
+        query = ("SELECT s.sample_id, s.source, s.converted_at FROM batch b "
+                 "JOIN samples s ON s.sample_id = b.sample_id")
+        if run_key is not None:
+            rows = con.execute(query + " WHERE s.run_key IS NOT ?", (run_key,)).fetchall()
+        else:
+            rows = con.execute(query).fetchall()
+        return {sample: (src, when) for sample, src, when in rows}
+
+    def lookup(self, sample_ids):
+        """{sample ID: (source, converted_at)} for the IDs already in the index."""
+        con = self._connect()
+        try:
+            self._load_batch(con, sample_ids)
+            return self._earlier(con)
+        finally:
+            con.close()
+
+    def register(self, sample_ids, source, converted_at=None, run_key=None):
+        """Record a converted batch; returns the IDs submitted before.
+
+        Returns {sample ID: (source, converted_at)} of the earlier submission.
+        IDs already recorded keep their first submission. Earlier submissions
+        with the same run_key (a re-run of an unchanged file) are not returned.
+        """
+        converted_at = converted_at or datetime.now().isoformat(timespec="seconds")
+        con = self._connect()
+        try:
+            con.execute("BEGIN IMMEDIATE")
+            try:
+                self._load_batch(con, sample_ids)
+                earlier = self._earlier(con, run_key)
+                con.execute("INSERT OR IGNORE INTO samples "
+                            "SELECT sample_id, ?, ?, ? FROM batch",
+                            (source, converted_at, run_key))
+                con.execute("COMMIT")
+            except BaseException:
+                con.execute("ROLLBACK")
+                raise
+            return earlier
+        finally:
+            con.close()
@@ -0,0 +1,121 @@
+import importlib.util
+import os
+
+import pandas as pd
+
+
+# Input backends, tried in order for each extension. A backend whose module is
+# not installed is skipped; one that fails on a file hands over to the next.
+EXCEL_EXTENSIONS = (".xlsx", ".xlsm", ".xls")
+DELIMITERS = {".csv": ",", ".tsv": "\t", ".tab": "\t"}
+PARQUET_EXTENSIONS = (".parquet", ".pq")
+INPUT_EXTENSIONS = EXCEL_EXTENSIONS + tuple(DELIMITERS) + PARQUET_EXTENSIONS
+
+
+def _has_module(name):
+    return importlib.util.find_spec(name) is not None
+
+
+def _strip_columns(df):
+    df.columns = df.columns.astype(str).str.strip()
+    return df
+
+
+def read_with_calamine(path, header_row, nrows=None, sheet_name=0):
+    """python-calamine (Rust) xlsx/xls reader; several times faster than openpyxl."""
+    return pd.read_excel(path, sheet_name=sheet_name, header=header_row - 1, nrows=nrows,
+                         engine="calamine")
+
+
+def read_with_pandas_excel(path, header_row, nrows=None, sheet_name=0):
+    """pd.read_excel with its default engine (openpyxl for .xlsx, xlrd for .xls)."""
+    return pd.read_excel(path, sheet_name=sheet_name, header=header_row - 1, nrows=nrows)
+
+
+def read_delimited(path, header_row, nrows=None, **kwargs):
+    """CSV/TSV exports from the LIMS; the separator comes from the extension.
+
+    Cells are kept as text (no number parsing, so IDs like 00123 survive) and
+    only empty cells become missing values. Extra kwargs go to pd.read_csv.
+    """
+    sep = DELIMITERS.get(os.path.splitext(str(path))[1].lower(), ",")
+    return pd.read_csv(path, sep=sep, header=0, skiprows=header_row - 1, nrows=nrows,
+                       dtype=str, keep_default_na=False, na_values=[""],
+                       encoding="utf-8-sig", **kwargs)
+
+
+def read_parquet(path, header_row=None, nrows=None):
+    """Parquet/Arrow files carry their own column names; header_row is ignored."""
+    df = pd.read_parquet(path)
+    return df.head(nrows) if nrows is not None else df
+
+
+# name -> (reader, module it needs)
+READERS = {
+    "calamine": (read_with_calamine, "python_calamine"),
+    "openpyxl": (read_with_pandas_excel, "openpyxl"),
+    "xlrd": (read_with_pandas_excel, "xlrd"),
+    "csv": (read_delimited, None),
+    "parquet": (read_parquet, "pyarrow"),
+    "fastparquet": (read_parquet, "fastparquet"),
+}
+
+BACKENDS_BY_EXTENSION = {
+    ".xlsx": ["calamine", "openpyxl"],
+    ".xlsm": ["calamine", "openpyxl"],
+    ".xls": ["calamine", "xlrd"],
+    ".csv": ["csv"],
+    ".tsv": ["csv"],
+    ".tab": ["csv"],
+    ".parquet": ["parquet", "fastparquet"],
+    ".pq": ["parquet", "fastparquet"],
+}
+
+
+def available_backends(path):
+    """Installed backends for path's extension, in the order they are tried."""
+    ext = os.path.splitext(str(path))[1].lower()
+    names = BACKENDS_BY_EXTENSION.get(ext, ["openpyxl"])
+    return [n for n in names if READERS[n][1] is None or _has_module(READERS[n][1])]
+
+
+def list_sheets(path):
+    """Sheet names of a workbook in file order; [] for CSV/TSV/Parquet inputs."""
+    if os.path.splitext(str(path))[1].lower() not in EXCEL_EXTENSIONS:
+        return []
+    engine = "calamine" if _has_module("python_calamine") else None
+    with pd.ExcelFile(path, engine=engine) as workbook:
+        return list(workbook.sheet_names)
+
+
+def read_table(path, header_row=2, nrows=None, backend=None, sheet=None):
+    """Read an input table with the fastest backend available for its type.
+
+    header_row is 1-based (ignored for Parquet). backend forces one reader by
+    name (see READERS); otherwise the backends for the extension are tried in
+    order and a failing one falls back to the next. sheet selects a worksheet
+    by name (Excel only; default: the first one).
+    """
+    kwargs = {"nrows": nrows}
+    if sheet is not None:
+        if os.path.splitext(str(path))[1].lower() not in EXCEL_EXTENSIONS:
+            raise ValueError(f"{os.path.basename(str(path))} has no sheets")
+        kwargs["sheet_name"] = sheet
+
+    if backend is not None:
+        if backend not in READERS:
+            raise ValueError(f"Unknown reader backend: {backend}")
+        return _strip_columns(READERS[backend][0](path, header_row, **kwargs))
+
+    candidates = available_backends(path)
+    if not candidates:
+        raise ImportError(f"No reader installed for {os.path.basename(str(path))}")
+
+    for name in candidates[:-1]:
+        try:
+            return _strip_columns(READERS[name][0](path, header_row, **kwargs))
+        except (FileNotFoundError, PermissionError):
+            raise
+        except Exception:
+            continue
+    return _strip_columns(READERS[candidates[-1]][0](path, header_row, **kwargs))
@@ -0,0 +1,73 @@
+"""Tools of the G-CLIP shell, imported only when first opened.
+
+A tool is a ToolSpec: menu label plus the module and tk.Frame class of its
+page. The shell lists BUILTIN_TOOLS and any spec published by an installed
+package under the "gclip.tools" entry point group, e.g. in pyproject.toml:
+
+    [project.entry-points."gclip.tools"]
+    qc = "gclip_qc.registration:TOOL"
+
+The entry point should name a ToolSpec in a lightweight module; the page
+module itself (and pandas & co. behind it) is imported by load_tool.
+A page module may define warm_up() to preload its data (e.g. the HPO index).
+"""
+import importlib
+import time
+from collections import namedtuple
+from importlib.metadata import entry_points
+
+
+ENTRY_POINT_GROUP = "gclip.tools"
+
+# warm_up: import it in the background after the window is shown
+ToolSpec = namedtuple("ToolSpec", "name label module attr warm_up", defaults=(False,))
+
+BUILTIN_TOOLS = [
+    ToolSpec("csv", "Excel to Emedgene CSV Converter", "tools.emedgene_csv_converter",
+             "CSVConverterPage", warm_up=True),
+]
+
+# seconds spent importing each tool module, by tool name
+import_times = {}
+
+
+def discover_tools():
+    """BUILTIN_TOOLS plus entry point tools, in menu order (names are unique)."""
+    tools = {spec.name: spec for spec in BUILTIN_TOOLS}
+    for ep in entry_points(group=ENTRY_POINT_GROUP):
+        try:
+            spec = ep.load()
+            if not isinstance(spec, ToolSpec):
+                spec = ToolSpec(**spec)
+        except Exception as e:
+            print(f"Skipping tool {ep.name}: {e}")
+            continue
+        tools.setdefault(spec.name, spec)
+    return list(tools.values())
+
+
+def _import(spec):
+    t0 = time.perf_counter()
+    module = importlib.import_module(spec.module)
+    if spec.name not in import_times:
+        import_times[spec.name] = time.perf_counter() - t0
+        print(f"Tool {spec.name}: imported {spec.module} in {import_times[spec.name]:.2f}s")
+    return module
+
+
+def load_tool(spec):
+    """The page class of spec, importing its module on first use."""
+    return getattr(_import(spec), spec.attr)
+
+
+def warm_up_tools(specs):
+    """Import the warm_up tools and run their module's warm_up(); call off the UI thread."""
+    for spec in specs:
+        if not spec.warm_up:
+            continue
+        try:
+            module = _import(spec)
+            if hasattr(module, "warm_up"):
+                module.warm_up()
+        except Exception as e:
+            print(f"Warm-up of {spec.name} failed: {e}")
@@ -0,0 +1,302 @@
+"""Watch folders and convert every workbook dropped into them.
+
+    python -m tools.watch_folder \\\\share\\incoming --output-dir \\\\share\\emedgene
+
+Folders are polled (no external services, works on network drives). A file
+is converted once its size and mtime have been stable for --settle seconds,
+on a bounded pool of worker processes that keep the HPO ontology loaded.
+Every finished file is appended to a ledger in the output folder, so a
+restarted watcher skips what it already converted. Two inputs that would
+write the same _CLEAN.csv (run.xlsx in two watched folders) are not both
+converted: the later one is skipped and recorded as failed.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait
+
+from tools.column_rules import load_rules
+from tools.emedgene_csv_converter_core import (DEFAULT_HPO_PATH, convert_file, header_row_default,
+                                               hpo_column_default, is_output_file, output_paths,
+                                               resource_path, sample_id_column_default)
+from tools.hpo_index import load_hpo_ontology
+from tools.sample_index import DEFAULT_INDEX_PATH, SampleIndex
+from tools.table_readers import INPUT_EXTENSIONS
+
+
+LEDGER_NAME = "processed_ledger.jsonl"
+POLL_SECONDS = 5.0
+SETTLE_SECONDS = 10.0
+
+
+def _log(message):
+    print(time.strftime("%Y-%m-%d %H:%M:%S"), message, flush=True)
+
+
+def _signature(path):
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns
+
+
+def _is_candidate(name):
+    # skip Office lock files, hidden/temp files and our own outputs
+    if name.startswith(("~$", ".")) or name.endswith(".part") or is_output_file(name):
+        return False
+    return os.path.splitext(name)[1].lower() in INPUT_EXTENSIONS
+
+
+def _can_open(path):
+    # Excel on Windows keeps the file locked while it is being saved
+    try:
+        with open(path, "rb"):
+            return True
+    except OSError:
+        return False
+
+
+def _warm_worker(hpo_path):
+    load_hpo_ontology(hpo_path)
+
+
+def _convert_job(path, hpo_path, options):
+    # load_hpo_ontology is an in-memory hit here, revalidated with one stat,
+    # so an updated hp.obo is picked up without restarting the watcher
+    return convert_file(path, load_hpo_ontology(hpo_path), **options)
+
+
+def read_ledger(ledger_path):
+    """{input path: last ledger entry}; unreadable lines are ignored."""
+    entries = {}
+    try:
+        with open(ledger_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    entries[entry["input"]] = entry
+                except (ValueError, KeyError, TypeError):
+                    continue
+    except OSError:
+        pass
+    return entries
+
+
+class FolderWatcher:
+    """Polls input folders and feeds settled files to a worker pool.
+
+    poll() does one scan/submit/collect round and is what run() repeats; it
+    is also what the tests drive directly.
+    """
+
+    def __init__(self, folders, output_dir, hpo_path, workers=2, settle=SETTLE_SECONDS,
+                 options=None):
+        self.folders = [os.path.abspath(f) for f in folders]
+        self.output_dir = os.path.abspath(output_dir)
+        self.hpo_path = hpo_path
+        self.workers = max(1, workers)
+        self.settle = settle
+        self.options = dict(options or {}, output_dir=self.output_dir)
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.ledger_path = os.path.join(self.output_dir, LEDGER_NAME)
+        self.ledger = read_ledger(self.ledger_path)
+        # _CLEAN.csv -> the input that writes it (normcase: Windows names ignore case)
+        self._owners = {os.path.normcase(e["csv"]): path for path, e in self.ledger.items()
+                        if e.get("status") == "ok" and e.get("csv")}
+
+        self._seen = {}         # path -> (signature, first time seen with it)
+        self._queue = deque()   # settled files waiting for a free worker
+        self._running = {}      # future -> (path, signature)
+        self._pool = None
+
+    # -------- lifecycle --------
+    def start(self):
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_warm_worker,
+                                         initargs=(self.hpo_path,))
+
+    def close(self):
+        # files still queued are not in the ledger, so the next start picks them up
+        if self._pool is not None:
+            wait(list(self._running))
+            self._collect()
+            self._pool.shutdown()
+            self._pool = None
+
+    def run(self, interval=POLL_SECONDS, stop_event=None):
+        stop_event = stop_event or threading.Event()
+        self.start()
+        _log(f"Watching {', '.join(self.folders)} -> {self.output_dir}")
+        try:
+            while not stop_event.is_set():
+                self.poll()
+                stop_event.wait(interval)
+        except KeyboardInterrupt:
+            _log("Stopping...")
+        finally:
+            self.close()
+
+    # -------- one round --------
+    def poll(self, now=None):
+        now = time.monotonic() if now is None else now
+        self._collect()
+        self._scan(now)
+        self._submit()
+
+    def wait_idle(self):
+        """Block until every queued and running file is converted and recorded."""
+        while self._queue or self._running:
+            self._submit()
+            wait(list(self._running))
+            self._collect()
+
+    def _scan(self, now):
+        busy = {path for path, _ in self._running.values()} | {path for path, _ in self._queue}
+        present = set()
+        for folder in self.folders:
+            try:
+                names = os.listdir(folder)
+            except OSError as e:
+                _log(f"Cannot list {folder}: {e}")
+                continue
+            for name in names:
+                path = os.path.join(folder, name)
+                if not _is_candidate(name) or not os.path.isfile(path):
+                    continue
+                present.add(path)
+                try:
+                    signature = _signature(path)
+                except OSError:
+                    continue  # removed between listdir and stat
+
+                done = self.ledger.get(path)
+                if path in busy or (done and tuple(done["signature"]) == signature):
+                    continue
+
+                seen = self._seen.get(path)
+                if seen is None or seen[0] != signature:
+                    self._seen[path] = (signature, now)  # new or still being written
+                elif now - seen[1] >= self.settle and _can_open(path):
+                    del self._seen[path]
+                    if self._claim_output(path, signature):
+                        self._queue.append((path, signature))
+
+        for path in set(self._seen) - present:
+            del self._seen[path]
+
+    def _claim_output(self, path, signature):
+        """Reserve path's _CLEAN.csv; False (and a failed ledger entry) if another
+        input that still exists already writes it."""
+        csv = os.path.normcase(output_paths(path, self.output_dir)["csv"])
+        owner = self._owners.get(csv)
+        if owner is not None and owner != path and os.path.exists(owner):
+            error = f"{os.path.basename(csv)} is already written for {owner}"
+            _log(f"SKIPPED {path}: {error}")
+            self._record({"input": path, "signature": list(signature),
+                          "finished_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                          "status": "failed", "error": error})
+            return False
+        self._owners[csv] = path
+        return True
+
+    def _submit(self):
+        # at most one job per worker in flight; the rest wait in our queue
+        while self._queue and len(self._running) < self.workers:
+            path, signature = self._queue.popleft()
+            _log(f"Converting {path}")
+            future = self._pool.submit(_convert_job, path, self.hpo_path, self.options)
+            self._running[future] = (path, signature)
+
+    def _collect(self):
+        for future in [f for f in self._running if f.done()]:
+            path, signature = self._running.pop(future)
+            entry = {"input": path, "signature": list(signature),
+                     "finished_at": time.strftime("%Y-%m-%dT%H:%M:%S")}
+            try:
+                result = future.result()
+                entry.update(status="ok", rows=result["rows"], csv=result["csv"],
+                             invalid_rows=result["invalid_rows"],
+                             hpo_report=result["hpo_report"], date_report=result["date_report"],
+                             validation_report=result["validation_report"])
+                _log(f"Done {path} -> {result['csv']} ({result['rows']} rows)")
+            except Exception as e:
+                # recorded too, so a broken file is retried only once it changes
+                entry.update(status="failed", error=str(e))
+                _log(f"FAILED {path}: {e}")
+            self._record(entry)
+
+    def _record(self, entry):
+        self.ledger[entry["input"]] = entry
+        with open(self.ledger_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m tools.watch_folder",
+        description="Convert workbooks dropped into watched folders.")
+    parser.add_argument("folders", nargs="+", help="Folders to watch")
+    parser.add_argument("--output-dir", required=True,
+                        help="CLEAN CSVs, reports and the processed-files ledger go here")
+    parser.add_argument("--hpo-file", default=None,
+                        help="hp.obo to validate against (default: assets/hp.obo)")
+    parser.add_argument("--workers", type=int, default=2,
+                        help="Files converted at the same time (default: %(default)s)")
+    parser.add_argument("--interval", type=float, default=POLL_SECONDS,
+                        help="Seconds between folder scans (default: %(default)s)")
+    parser.add_argument("--settle", type=float, default=SETTLE_SECONDS,
+                        help="Seconds a file must stay unchanged before it is converted "
+                             "(default: %(default)s)")
+    parser.add_argument("--header-row", type=int, default=header_row_default)
+    parser.add_argument("--hpo-column", default=hpo_column_default)
+    parser.add_argument("--sample-id-column", default=sample_id_column_default)
+    parser.add_argument("--rules", default=None,
+                        help="JSON/YAML column rule file; issues go to _VALIDATION_REPORT.csv")
+    parser.add_argument("--sample-index", nargs="?", const=DEFAULT_INDEX_PATH, default=None,
+                        metavar="PATH",
+                        help="SQLite index of converted sample IDs; repeats and samples "
+                             "from earlier batches go to _VALIDATION_REPORT.csv")
+    return parser
+
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+
+    hpo_path = args.hpo_file or resource_path(DEFAULT_HPO_PATH)
+    if not os.path.exists(hpo_path):
+        print(f"Error: HPO ontology not found: {hpo_path}", file=sys.stderr)
+        return 2
+    missing = [f for f in args.folders if not os.path.isdir(f)]
+    if missing:
+        print(f"Error: not a folder: {', '.join(missing)}", file=sys.stderr)
+        return 2
+
+    options = {
+        "header_row": args.header_row,
+        "hpo_colname": args.hpo_column,
+        "sample_id_col": args.sample_id_column,
+    }
+    if args.rules is not None:
+        try:
+            options["rules"] = load_rules(args.rules)
+        except (OSError, ValueError, ImportError) as e:
+            print(f"Error: cannot load rules {args.rules}: {e}", file=sys.stderr)
+            return 2
+    if args.sample_index is not None:
+        options["sample_index"] = SampleIndex(args.sample_index)
+
+    # build/refresh the compiled index once, before the workers load it
+    load_hpo_ontology(hpo_path)
+
+    watcher = FolderWatcher(args.folders, args.output_dir, hpo_path, workers=args.workers,
+                            settle=args.settle, options=options)
+    watcher.run(interval=args.interval)
+    return 0
+
+
+if __name__ == "__main__":
+    # re-import under the package name so worker processes can pickle the jobs
+    from tools.watch_folder import main as _main
+    sys.exit(_main())